@@ -70,6 +70,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            # O modo batch recria tabelas (cópia, DROP e RENAME); com foreign_keys ativo,
+            # o DROP dispararia os ON DELETE CASCADE e apagaria as linhas dependentes
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
         context.configure(
             connection=connection, target_metadata=target_metadata
         )
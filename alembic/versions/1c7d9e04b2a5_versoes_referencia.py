@@ -0,0 +1,35 @@
+"""versoes referencia
+
+Revision ID: 1c7d9e04b2a5
+Revises: f3b81d5c20e7
+Create Date: 2026-10-19 16:48:12.305981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c7d9e04b2a5'
+down_revision: Union[str, Sequence[str], None] = 'f3b81d5c20e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Versão dos dados de referência (safras e culturas), usada para invalidar o cache de cada worker
+    versoes = op.create_table(
+        'versoes_referencia',
+        sa.Column('nome', sa.String(), nullable=False),
+        sa.Column('versao', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('nome')
+    )
+    op.bulk_insert(versoes, [{'nome': 'referencias', 'versao': 0}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('versoes_referencia')
@@ -0,0 +1,30 @@
+"""version columns
+
+Revision ID: 5b7d3e18c9a4
+Revises: c41e9a07d5f2
+Create Date: 2026-10-19 11:26:08.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d3e18c9a4'
+down_revision: Union[str, Sequence[str], None] = 'c41e9a07d5f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('produtores', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('propriedades', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('propriedades', 'version')
+    op.drop_column('produtores', 'version')
@@ -0,0 +1,64 @@
+"""arquivo safras
+
+Revision ID: 7e5a0c93d1f4
+Revises: 1c7d9e04b2a5
+Create Date: 2026-10-19 18:05:37.441029
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e5a0c93d1f4'
+down_revision: Union[str, Sequence[str], None] = '1c7d9e04b2a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('safras', sa.Column('arquivada', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    # Associações das safras arquivadas, com o id original
+    op.create_table(
+        'propriedade_safra_cultura_arquivo',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('propriedade_id', sa.Integer(), nullable=False),
+        sa.Column('safra_id', sa.Integer(), nullable=False),
+        sa.Column('cultura_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['propriedade_id'], ['propriedades.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['safra_id'], ['safras.id']),
+        sa.ForeignKeyConstraint(['cultura_id'], ['culturas.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_propriedade_safra_cultura_arquivo_safra_id', 'propriedade_safra_cultura_arquivo', ['safra_id']
+    )
+    # Remoção de propriedades/produtores: o CASCADE localiza as associações arquivadas pelo índice
+    op.create_index(
+        'ix_propriedade_safra_cultura_arquivo_propriedade_id', 'propriedade_safra_cultura_arquivo', ['propriedade_id']
+    )
+
+    # Resumos pré-agregados por safra arquivada e cultura
+    op.create_table(
+        'resumo_safra_cultura',
+        sa.Column('safra_id', sa.Integer(), nullable=False),
+        sa.Column('cultura_id', sa.Integer(), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['safra_id'], ['safras.id']),
+        sa.ForeignKeyConstraint(['cultura_id'], ['culturas.id']),
+        sa.PrimaryKeyConstraint('safra_id', 'cultura_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('resumo_safra_cultura')
+    op.drop_index('ix_propriedade_safra_cultura_arquivo_propriedade_id', table_name='propriedade_safra_cultura_arquivo')
+    op.drop_index('ix_propriedade_safra_cultura_arquivo_safra_id', table_name='propriedade_safra_cultura_arquivo')
+    op.drop_table('propriedade_safra_cultura_arquivo')
+    with op.batch_alter_table('safras') as batch_op:
+        batch_op.drop_column('arquivada')
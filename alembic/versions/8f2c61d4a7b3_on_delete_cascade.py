@@ -0,0 +1,47 @@
+"""on delete cascade
+
+Revision ID: 8f2c61d4a7b3
+Revises: 3d0a142a49a2
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c61d4a7b3'
+down_revision: Union[str, Sequence[str], None] = '3d0a142a49a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabela, coluna, tabela referenciada) - nomes gerados pelo Postgres na migração init
+# No SQLite as chaves da init não têm nome: a convenção abaixo nomeia as refletidas pelo modo batch,
+# que recria a tabela (no Postgres o batch emite os mesmos ALTER TABLE)
+CONVENCAO_NOMES = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+FOREIGN_KEYS = [
+    ('propriedades', 'produtor_id', 'produtores'),
+    ('propriedade_safra_cultura', 'propriedade_id', 'propriedades'),
+]
+# safra_id e cultura_id mantêm as chaves da init (sem cascade): safras e culturas em uso não são removidas
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for tabela, coluna, referencia in FOREIGN_KEYS:
+        nome = f'{tabela}_{coluna}_fkey'
+        with op.batch_alter_table(tabela, naming_convention=CONVENCAO_NOMES) as batch_op:
+            batch_op.drop_constraint(nome, type_='foreignkey')
+            batch_op.create_foreign_key(nome, referencia, [coluna], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabela, coluna, referencia in FOREIGN_KEYS:
+        nome = f'{tabela}_{coluna}_fkey'
+        with op.batch_alter_table(tabela, naming_convention=CONVENCAO_NOMES) as batch_op:
+            batch_op.drop_constraint(nome, type_='foreignkey')
+            batch_op.create_foreign_key(nome, referencia, [coluna], ['id'])
@@ -0,0 +1,64 @@
+"""indices fks filtros
+
+Revision ID: 9a4e2c7b1d36
+Revises: e6a2f94b1c08
+Create Date: 2026-10-19 15:12:08.402117
+
+"""
+from typing import Optional, Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4e2c7b1d36'
+down_revision: Union[str, Sequence[str], None] = 'e6a2f94b1c08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nome, tabela, colunas, unico)
+# propriedades.produtor_id já é coberto por uq_propriedades_produtor_id_nome (coluna líder do índice)
+INDICES = [
+    ('ix_propriedades_estado', 'propriedades', ['estado'], False),
+    ('ix_propriedade_safra_cultura_propriedade_id', 'propriedade_safra_cultura', ['propriedade_id'], False),
+    ('ix_propriedade_safra_cultura_safra_id', 'propriedade_safra_cultura', ['safra_id'], False),
+    ('ix_propriedade_safra_cultura_cultura_id', 'propriedade_safra_cultura', ['cultura_id'], False),
+    ('ix_safras_ano', 'safras', ['ano'], True),
+    ('ix_culturas_nome', 'culturas', ['nome'], True),
+]
+
+
+def indice_valido(nome: str, tabela: str) -> Optional[bool]:
+    """None se o índice não existe; no Postgres, False se ficou INVALID (CONCURRENTLY interrompido)"""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        return bind.execute(sa.text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :nome AND pg_table_is_visible(c.oid)"
+        ), {"nome": nome}).scalar()
+    return True if any(indice['name'] == nome for indice in sa.inspect(bind).get_indexes(tabela)) else None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY não bloqueia escritas, mas não pode rodar dentro de uma transação.
+    # Se falhar no meio, o Postgres deixa um índice INVALID: ao rodar a migração novamente ele é removido e
+    # recriado; índices válidos já existentes (ex.: criados pelo modelo) são mantidos.
+    # Os índices únicos exigem que não existam safras com o mesmo ano nem culturas com o mesmo nome.
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas, unico in INDICES:
+            valido = None if context.is_offline_mode() else indice_valido(nome, tabela)
+            if valido:
+                continue
+            if valido is False:
+                op.drop_index(nome, table_name=tabela, postgresql_concurrently=True)
+            op.create_index(nome, tabela, colunas, unique=unico, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nome, tabela, _, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
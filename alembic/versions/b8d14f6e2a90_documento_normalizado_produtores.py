@@ -0,0 +1,57 @@
+"""documento normalizado produtores
+
+Revision ID: b8d14f6e2a90
+Revises: 7e5a0c93d1f4
+Create Date: 2026-10-19 19:22:09.613847
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d14f6e2a90'
+down_revision: Union[str, Sequence[str], None] = '7e5a0c93d1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def somente_digitos(coluna: str) -> str:
+    if op.get_context().dialect.name == 'postgresql':
+        return f"regexp_replace({coluna}, '[^0-9]', '', 'g')"
+    # SQLite não tem regexp_replace; a API só aceitou documentos com esta formatação
+    for separador in ('.', '-', '/', ' '):
+        coluna = f"replace({coluna}, '{separador}', '')"
+    return coluna
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('produtores', sa.Column('documento', sa.String(), nullable=True))
+    op.execute(f"UPDATE produtores SET documento = {somente_digitos('cpf_cnpj')}")
+
+    # Cadastros que só diferem na formatação impediriam o índice único: interromper com a lista
+    if not context.is_offline_mode():
+        duplicados = op.get_bind().execute(sa.text(
+            "SELECT documento, count(*) FROM produtores GROUP BY documento HAVING count(*) > 1"
+        )).all()
+        if duplicados:
+            raise RuntimeError(
+                "Produtores com o mesmo CPF/CNPJ em formatações diferentes; unifique-os antes da migração: "
+                + ", ".join(documento for documento, _ in duplicados)
+            )
+
+    with op.batch_alter_table('produtores') as batch_op:
+        batch_op.alter_column('documento', existing_type=sa.String(), nullable=False)
+        batch_op.drop_index('ix_produtores_cpf_cnpj')
+        batch_op.create_index('ix_produtores_documento', ['documento'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('produtores') as batch_op:
+        batch_op.drop_index('ix_produtores_documento')
+        batch_op.create_index('ix_produtores_cpf_cnpj', ['cpf_cnpj'], unique=True)
+        batch_op.drop_column('documento')
@@ -0,0 +1,41 @@
+"""check constraints areas
+
+Revision ID: c41e9a07d5f2
+Revises: 8f2c61d4a7b3
+Create Date: 2026-10-19 10:03:17.552981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e9a07d5f2'
+down_revision: Union[str, Sequence[str], None] = '8f2c61d4a7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mesmas regras de PropriedadeBase, agora garantidas também pelo banco
+CHECK_CONSTRAINTS = [
+    ('ck_propriedades_area_total_positiva', 'area_total > 0'),
+    ('ck_propriedades_area_agricultavel_positiva', 'area_agricultavel > 0'),
+    ('ck_propriedades_area_vegetacao_positiva', 'area_vegetacao > 0'),
+    ('ck_propriedades_soma_areas', 'area_agricultavel + area_vegetacao <= area_total'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Modo batch: no SQLite a tabela é recriada com as constraints; no Postgres, ALTER TABLE direto
+    with op.batch_alter_table('propriedades') as batch_op:
+        for nome, condicao in CHECK_CONSTRAINTS:
+            batch_op.create_check_constraint(nome, condicao)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('propriedades') as batch_op:
+        for nome, _ in reversed(CHECK_CONSTRAINTS):
+            batch_op.drop_constraint(nome, type_='check')
@@ -0,0 +1,44 @@
+"""unique propriedade produtor nome
+
+Revision ID: e6a2f94b1c08
+Revises: 5b7d3e18c9a4
+Create Date: 2026-10-19 13:47:55.120376
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a2f94b1c08'
+down_revision: Union[str, Sequence[str], None] = '5b7d3e18c9a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Propriedades repetidas no mesmo produtor impediriam o índice único: interromper com a lista
+    if not context.is_offline_mode():
+        duplicados = op.get_bind().execute(sa.text(
+            "SELECT produtor_id, nome, group_concat(id) FROM propriedades "
+            "GROUP BY produtor_id, nome HAVING count(*) > 1"
+            if op.get_context().dialect.name == 'sqlite' else
+            "SELECT produtor_id, nome, string_agg(id::text, ',' ORDER BY id) FROM propriedades "
+            "GROUP BY produtor_id, nome HAVING count(*) > 1"
+        )).all()
+        if duplicados:
+            raise RuntimeError(
+                "Propriedades com o mesmo nome no mesmo produtor; renomeie ou unifique-as antes da migração: "
+                + "; ".join(f"produtor {produtor_id} '{nome}' (ids {ids})" for produtor_id, nome, ids in duplicados)
+            )
+
+    # Chave natural usada pelo upsert (PUT /propriedades/upsert) no ON CONFLICT
+    op.create_index('uq_propriedades_produtor_id_nome', 'propriedades', ['produtor_id', 'nome'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_propriedades_produtor_id_nome', table_name='propriedades')
@@ -0,0 +1,90 @@
+"""particionar psc por safra
+
+Revision ID: f3b81d5c20e7
+Revises: 9a4e2c7b1d36
+Create Date: 2026-10-19 16:03:41.927514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.services.particionamento import PSC_PARTICIONADA, TABELA_PARTICIONADA
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b81d5c20e7'
+down_revision: Union[str, Sequence[str], None] = '9a4e2c7b1d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Opcional: só é aplicada no Postgres com PSC_PARTICIONADA=true (a mesma variável lida pela API)
+# A tabela é recriada e os dados copiados; execute em janela de manutenção
+ANTIGA = f'{TABELA_PARTICIONADA}_antiga'
+# ix_propriedade_safra_cultura_id (init) e os índices das chaves estrangeiras (9a4e2c7b1d36): a chave primária
+# da tabela particionada é (id, safra_id), então id precisa do próprio índice para as consultas por id
+COLUNAS_INDEXADAS = ['id', 'propriedade_id', 'safra_id', 'cultura_id']
+
+
+def _aplicavel() -> bool:
+    return PSC_PARTICIONADA and op.get_bind().dialect.name == 'postgresql'
+
+
+def _recriar_tabela(particionada: bool) -> None:
+    op.rename_table(TABELA_PARTICIONADA, ANTIGA)
+    op.execute(f'ALTER SEQUENCE {TABELA_PARTICIONADA}_id_seq OWNED BY NONE')
+    op.execute(f'ALTER TABLE {ANTIGA} ALTER COLUMN id DROP DEFAULT')
+    op.execute(f'ALTER TABLE {ANTIGA} RENAME CONSTRAINT {TABELA_PARTICIONADA}_pkey TO {ANTIGA}_pkey')
+    for coluna in COLUNAS_INDEXADAS:
+        op.execute(f'ALTER INDEX IF EXISTS ix_{TABELA_PARTICIONADA}_{coluna} RENAME TO ix_{ANTIGA}_{coluna}')
+
+    # Em tabelas particionadas a chave primária precisa conter a chave de partição
+    chave = 'id, safra_id' if particionada else 'id'
+    op.execute(f"""
+        CREATE TABLE {TABELA_PARTICIONADA} (
+            id INTEGER NOT NULL DEFAULT nextval('{TABELA_PARTICIONADA}_id_seq'),
+            propriedade_id INTEGER NOT NULL REFERENCES propriedades (id) ON DELETE CASCADE,
+            safra_id INTEGER NOT NULL REFERENCES safras (id),
+            cultura_id INTEGER NOT NULL REFERENCES culturas (id),
+            CONSTRAINT {TABELA_PARTICIONADA}_pkey PRIMARY KEY ({chave})
+        ){' PARTITION BY LIST (safra_id)' if particionada else ''}
+    """)
+    op.execute(f'ALTER SEQUENCE {TABELA_PARTICIONADA}_id_seq OWNED BY {TABELA_PARTICIONADA}.id')
+
+    if particionada:
+        # Uma partição por safra já cadastrada (as próximas são criadas pela API em POST /safras/)
+        op.execute(f"""
+            DO $$
+            DECLARE safra RECORD;
+            BEGIN
+                FOR safra IN SELECT id FROM safras ORDER BY id LOOP
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF {TABELA_PARTICIONADA} FOR VALUES IN (%s)',
+                        '{TABELA_PARTICIONADA}_s' || safra.id, safra.id
+                    );
+                END LOOP;
+            END $$
+        """)
+        op.execute(f'CREATE TABLE {TABELA_PARTICIONADA}_default PARTITION OF {TABELA_PARTICIONADA} DEFAULT')
+
+    # Índices criados na tabela particionada são propagados para todas as partições
+    for coluna in COLUNAS_INDEXADAS:
+        op.create_index(f'ix_{TABELA_PARTICIONADA}_{coluna}', TABELA_PARTICIONADA, [coluna])
+
+    op.execute(
+        f'INSERT INTO {TABELA_PARTICIONADA} (id, propriedade_id, safra_id, cultura_id) '
+        f'SELECT id, propriedade_id, safra_id, cultura_id FROM {ANTIGA}'
+    )
+    op.drop_table(ANTIGA)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _aplicavel():
+        _recriar_tabela(particionada=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _aplicavel():
+        _recriar_tabela(particionada=False)
@@ -1,13 +1,42 @@
+import os
+import random
 import time
+import uuid
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import produtor, propriedade, safra, cultura, propriedade_safra_cultura, dashboard
-from app.utils.logger import log_api_request, log_error
+from app.routes import produtor, propriedade, safra, cultura, propriedade_safra_cultura, dashboard, metricas, validacao
+from app.models.database import AsyncSessionLeitura
+from app.services.cache_referencia import cache_referencia
+from app.utils.consultas_lentas import consultas_lentas
+from app.utils.instrumentacao_sql import iniciar_instrumentacao, server_timing
+from app.utils.logger import app_logger, esvaziar_logs, log_api_request, log_error
+from app.utils.metricas_http import metricas_http, rota_template
+from app.utils.perfilador import PerfiladorMiddleware
+
+"""
+Inicialização: carrega o cache de dados de referência (safras e culturas)
+- Se o banco estiver indisponível, a API sobe mesmo assim e o cache é carregado na primeira consulta
+"""
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        async with AsyncSessionLeitura() as db:
+            await cache_referencia.carregar(db)
+    except Exception as e:
+        log_error(e, "Carga inicial do cache de referência")
+    yield
+    # Conclui os EXPLAINs de consultas lentas e escreve os logs ainda na fila antes de encerrar
+    await consultas_lentas.aguardar()
+    esvaziar_logs()
+
 
 """
  Configuração da aplicação FastAPI 
 """
-app = FastAPI(title="TestBrainAgriculture API")
+app = FastAPI(title="TestBrainAgriculture API", lifespan=lifespan)
 
 """
 Configurar CORS
@@ -21,29 +50,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+"""
+Profiling sob demanda (X-Profile-Token ou PROFILING_AMOSTRA); desativado, apenas repassa a requisição
+"""
+app.add_middleware(PerfiladorMiddleware)
+
+
+"""
+Middleware de métricas e logs das requisições
+- Latência medida com relógio monotônico (time.perf_counter) e registrada nas métricas da rota (GET /metrics)
+- Consultas SQL da requisição (quantidade, tempo no banco, linhas) no cabeçalho Server-Timing e nas métricas
+- request_id (cabeçalho X-Request-ID recebido ou gerado) em todos os logs da requisição e na resposta
+- Linha de log por requisição para todas as respostas 4xx/5xx; das bem-sucedidas, todas por padrão ou apenas uma
+  amostra (LOG_REQUISICOES_AMOSTRA, fração de 0 a 1); LOG_REQUISICOES=false desativa as linhas de log de requisição
+"""
+LOG_REQUISICOES = os.getenv("LOG_REQUISICOES", "true").lower() == "true"
+LOG_REQUISICOES_AMOSTRA = float(os.getenv("LOG_REQUISICOES_AMOSTRA", "1"))
+
 
-# Middleware para logs
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
-
-    try:
-        response = await call_next(request)
-        duration = time.time() - start_time
-
-        # Log da requisição
-        log_api_request(
-            method=request.method,
-            path=request.url.path,
-            status_code=response.status_code,
-            duration=duration
-        )
-
-        return response
-    except Exception as e:
-        duration = time.time() - start_time
-        log_error(e, f"Request {request.method} {request.url.path}")
-        raise
+    start_time = time.perf_counter()
+    metricas_http.iniciar()
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    consultas = iniciar_instrumentacao(request, request_id)
+
+    with app_logger.contextualize(request_id=request_id):
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            metricas_http.registrar(request.method, rota_template(request), 500, time.perf_counter() - start_time,
+                                    consultas)
+            log_error(e, f"Request {request.method} {request.url.path}")
+            raise
+
+        duration = time.perf_counter() - start_time
+        rota = rota_template(request)
+        metricas_http.registrar(request.method, rota, response.status_code, duration, consultas)
+        response.headers["Server-Timing"] = server_timing(consultas, duration)
+        response.headers["X-Request-ID"] = request_id
+        if LOG_REQUISICOES and (response.status_code >= 400 or random.random() < LOG_REQUISICOES_AMOSTRA):
+            log_api_request(
+                method=request.method,
+                path=request.url.path,
+                status_code=response.status_code,
+                duration=duration,
+                amostra=LOG_REQUISICOES_AMOSTRA if response.status_code < 400 else 1.0,
+                route=rota,
+                db_ms=round(consultas.tempo_s * 1000, 3),
+                db_queries=consultas.consultas,
+                db_rows=consultas.linhas
+            )
+    return response
 
 
 app.include_router(produtor.router)
@@ -52,6 +110,8 @@ app.include_router(safra.router)
 app.include_router(cultura.router)
 app.include_router(propriedade_safra_cultura.router)
 app.include_router(dashboard.router)
+app.include_router(metricas.router)
+app.include_router(validacao.router)
 
 """
 Rota raiz
@@ -59,7 +119,7 @@ Rota raiz
 
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "TestBrainAgriculture API", "docs": "/docs", "version": "0.1.5"}
 
 
@@ -69,5 +129,5 @@ Rota de health check
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "ok"}
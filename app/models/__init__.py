@@ -3,4 +3,6 @@ from .produtor import ProdutorRural
 from .propriedade import Propriedade
 from .safra import Safra
 from .cultura import Cultura
-from .propriedade_safra_cultura import PropriedadeSafraCultura 
\ No newline at end of file
+from .propriedade_safra_cultura import PropriedadeSafraCultura
+from .versao_referencia import VersaoReferencia
+from .arquivo import PropriedadeSafraCulturaArquivo, ResumoSafraCultura
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from .database import Base
+
+
+class PropriedadeSafraCulturaArquivo(Base):
+    """Associações de safras arquivadas, fora da tabela e dos índices consultados pela API no dia a dia"""
+    __tablename__ = "propriedade_safra_cultura_arquivo"
+    # Mesmo id da associação original: o arquivamento pode ser desfeito sem renumerar
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    propriedade_id = Column(Integer, ForeignKey("propriedades.id", ondelete="CASCADE"), nullable=False, index=True)
+    safra_id = Column(Integer, ForeignKey("safras.id"), nullable=False, index=True)
+    cultura_id = Column(Integer, ForeignKey("culturas.id"), nullable=False)
+
+
+class ResumoSafraCultura(Base):
+    """Quantidade de associações por cultura de cada safra arquivada, usada pelo dashboard"""
+    __tablename__ = "resumo_safra_cultura"
+    safra_id = Column(Integer, ForeignKey("safras.id"), primary_key=True)
+    cultura_id = Column(Integer, ForeignKey("culturas.id"), primary_key=True)
+    quantidade = Column(Integer, nullable=False)
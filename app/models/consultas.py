@@ -0,0 +1,88 @@
+from sqlalchemy import ARRAY, Integer, String, any_, bindparam, cast, exists, func, select, union_all
+from .produtor import ProdutorRural
+from .propriedade import Propriedade
+from .safra import Safra
+from .cultura import Cultura
+from .propriedade_safra_cultura import PropriedadeSafraCultura
+from .versao_referencia import VersaoReferencia
+from .arquivo import ResumoSafraCultura
+
+"""
+Statements pré-construídos para as consultas mais frequentes
+- Construídos uma única vez na importação: a chave do cache de compilação do SQLAlchemy é memorizada
+  no próprio objeto e cada execução reaproveita o SQL já compilado, variando apenas os parâmetros
+- Uso: await db.scalar(consultas.PRODUTOR_POR_ID, {"id": produtor_id})
+- Hit rate do cache de compilação: GET /metrics/cache-sql
+"""
+
+# Busca por ID
+PRODUTOR_POR_ID = select(ProdutorRural).where(ProdutorRural.id == bindparam("id"))
+# Documento já normalizado (somente dígitos): uma busca no índice único
+PRODUTOR_POR_DOCUMENTO = select(ProdutorRural).where(ProdutorRural.documento == bindparam("documento"))
+# Documentos cadastrados dentre uma lista: IN expandido (genérico) ou = ANY(array) no Postgres, com um único parâmetro
+DOCUMENTOS_CADASTRADOS = select(ProdutorRural.documento).where(
+    ProdutorRural.documento.in_(bindparam("documentos", expanding=True))
+)
+DOCUMENTOS_CADASTRADOS_ANY = select(ProdutorRural.documento).where(
+    ProdutorRural.documento == any_(bindparam("documentos", type_=ARRAY(String)))
+)
+PROPRIEDADE_POR_ID = select(Propriedade).where(Propriedade.id == bindparam("id"))
+SAFRA_POR_ID = select(Safra).where(Safra.id == bindparam("id"))
+CULTURA_POR_ID = select(Cultura).where(Cultura.id == bindparam("id"))
+ASSOCIACAO_POR_ID = select(PropriedadeSafraCultura).where(PropriedadeSafraCultura.id == bindparam("id"))
+
+# Verificações de existência (SELECT EXISTS, sem carregar a entidade)
+PRODUTOR_EXISTE = select(exists().where(ProdutorRural.id == bindparam("id")))
+PROPRIEDADE_EXISTE = select(exists().where(Propriedade.id == bindparam("id")))
+SAFRA_ANO_EXISTE = select(exists().where(Safra.ano == bindparam("ano")))
+CULTURA_NOME_EXISTE = select(exists().where(Cultura.nome == bindparam("nome")))
+
+_MESMA_ASSOCIACAO = (
+    PropriedadeSafraCultura.propriedade_id == bindparam("propriedade_id"),
+    PropriedadeSafraCultura.safra_id == bindparam("safra_id"),
+    PropriedadeSafraCultura.cultura_id == bindparam("cultura_id"),
+)
+ASSOCIACAO_EXISTE = select(exists().where(*_MESMA_ASSOCIACAO))
+ASSOCIACAO_EXISTE_EM_OUTRA = select(exists().where(
+    *_MESMA_ASSOCIACAO, PropriedadeSafraCultura.id != bindparam("id")
+))
+
+# Agregações do dashboard
+RESUMO_PROPRIEDADES = select(
+    func.count(Propriedade.id),
+    func.coalesce(func.sum(Propriedade.area_total), 0.0),
+    func.coalesce(func.sum(Propriedade.area_agricultavel), 0.0),
+    func.coalesce(func.sum(Propriedade.area_vegetacao), 0.0)
+)
+PROPRIEDADES_POR_ESTADO = select(
+    Propriedade.estado,
+    func.count(Propriedade.id).label('quantidade')
+).group_by(Propriedade.estado)
+# Associações vivas somadas aos resumos das safras arquivadas: o arquivamento não altera os totais
+_CONTAGENS_POR_CULTURA = union_all(
+    select(
+        PropriedadeSafraCultura.cultura_id,
+        func.count(PropriedadeSafraCultura.id).label('quantidade')
+    ).group_by(PropriedadeSafraCultura.cultura_id),
+    select(ResumoSafraCultura.cultura_id, ResumoSafraCultura.quantidade)
+).subquery()
+ASSOCIACOES_POR_CULTURA = select(
+    Cultura.nome,
+    cast(func.sum(_CONTAGENS_POR_CULTURA.c.quantidade), Integer).label('quantidade')
+).join(_CONTAGENS_POR_CULTURA, _CONTAGENS_POR_CULTURA.c.cultura_id == Cultura.id).group_by(Cultura.nome)
+# Filtro direto em safra_id: permite o partition pruning com a tabela particionada
+ASSOCIACOES_POR_CULTURA_NA_SAFRA = select(
+    Cultura.nome,
+    func.count(PropriedadeSafraCultura.id).label('quantidade')
+).join(PropriedadeSafraCultura).where(
+    PropriedadeSafraCultura.safra_id == bindparam("safra_id")
+).group_by(Cultura.nome)
+# Safra arquivada: contagens pré-agregadas no arquivamento
+RESUMO_POR_CULTURA_NA_SAFRA = select(Cultura.nome, ResumoSafraCultura.quantidade).join(
+    ResumoSafraCultura
+).where(ResumoSafraCultura.safra_id == bindparam("safra_id"))
+
+# Cache de dados de referência
+SAFRAS_REFERENCIA = select(Safra.id, Safra.ano, Safra.arquivada)
+CULTURAS_REFERENCIA = select(Cultura.id, Cultura.nome)
+VERSAO_REFERENCIA = select(VersaoReferencia.versao).where(VersaoReferencia.nome == bindparam("nome"))
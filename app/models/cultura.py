@@ -6,5 +6,5 @@ from .database import Base
 class Cultura(Base):
     __tablename__ = "culturas"
     id = Column(Integer, primary_key=True, index=True)
-    nome = Column(String, nullable=False)
-    propriedades = relationship("PropriedadeSafraCultura", back_populates="cultura")
+    nome = Column(String, nullable=False, unique=True, index=True)
+    propriedades = relationship("PropriedadeSafraCultura", back_populates="cultura", passive_deletes=True)
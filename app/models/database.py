@@ -1,9 +1,262 @@
+import asyncio
 import os
-from sqlalchemy import create_engine
+import weakref
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.utils.metricas_pool import AsyncAdaptedQueuePoolMonitorado
+from app.services.orcamento_consultas import iniciar_orcamento
 
 DATABASE_URL = os.getenv("DATABASE_URL", "")
 
+"""
+Drivers assíncronos equivalentes aos drivers síncronos da DATABASE_URL
+"""
+DRIVERS_ASSINCRONOS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def url_assincrona(url: str) -> str:
+    url = make_url(url)
+    return url.set(drivername=DRIVERS_ASSINCRONOS.get(url.drivername, url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or url_assincrona(DATABASE_URL)
+
+# Réplica de leitura opcional; sem ela, as leituras usam o banco primário
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+ASYNC_DATABASE_READ_URL = url_assincrona(DATABASE_READ_URL) if DATABASE_READ_URL else ""
+
+"""
+Configuração do pool de conexões da engine assíncrona
+- DB_POOL_SIZE: conexões mantidas abertas por worker
+- DB_MAX_OVERFLOW: conexões extras abertas sob pico (fechadas ao serem devolvidas)
+- DB_POOL_TIMEOUT: segundos aguardando uma conexão livre antes de erro
+- DB_POOL_RECYCLE: idade máxima (s) de uma conexão; -1 desativa
+- DB_POOL_PRE_PING: testa a conexão antes de entregá-la (descarta conexões derrubadas pelo servidor)
+- DB_PGBOUNCER: desativa o cache de prepared statements do asyncpg, incompatível com
+  o PgBouncer em pool_mode=transaction
+"""
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+
+
+def opcoes_pool(url: str) -> dict:
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        # Em memória o SQLite usa StaticPool (uma única conexão); as opções de fila não se aplicam
+        if url.database in (None, "", ":memory:"):
+            return {}
+        # Em arquivo, o tamanho do pool limita quantas leituras rodam em paralelo (WAL)
+        return {
+            "poolclass": AsyncAdaptedQueuePoolMonitorado,
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        }
+    opcoes = {
+        "poolclass": AsyncAdaptedQueuePoolMonitorado,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if DB_PGBOUNCER and url.get_driver_name() == "asyncpg":
+        opcoes["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    return opcoes
+
+
+# Engine síncrona: usada pelo Alembic e pelos scripts de seed
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Engine assíncrona: usada pelas rotas da API
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **opcoes_pool(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if ASYNC_DATABASE_READ_URL:
+    async_read_engine = create_async_engine(ASYNC_DATABASE_READ_URL, **opcoes_pool(ASYNC_DATABASE_READ_URL))
+    AsyncSessionLeitura = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_read_engine = async_engine
+    AsyncSessionLeitura = AsyncSessionLocal
+
 Base = declarative_base()
+
+
+"""
+Modo SQLite para instalações de um único nó (escritórios regionais, edge)
+- Pragmas aplicados a cada conexão: WAL (leitores não bloqueiam o escritor), synchronous=NORMAL
+  (seguro em WAL; perde no máximo as últimas transações numa queda de energia), mmap e cache de páginas
+- SQLITE_ESCRITOR_UNICO: as transações de escrita do worker aguardam em fila numa trava asyncio,
+  de modo que no máximo uma por processo disputa o lock do arquivo;
+  SQLITE_BUSY_TIMEOUT_MS cobre a disputa entre processos (prefira um único worker)
+"""
+SQLITE_OTIMIZADO = os.getenv("SQLITE_OTIMIZADO", "true").lower() in ("1", "true", "yes")
+SQLITE_ESCRITOR_UNICO = os.getenv("SQLITE_ESCRITOR_UNICO", "true").lower() in ("1", "true", "yes")
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def pragmas_sqlite() -> list:
+    pragmas = ["PRAGMA foreign_keys=ON"]
+    if SQLITE_OTIMIZADO:
+        pragmas += [
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}",
+            # Valor negativo: tamanho em KiB em vez de número de páginas
+            f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}",
+            "PRAGMA temp_store=MEMORY",
+            f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        ]
+    return pragmas
+
+
+class TravaEscrita:
+    """Uma trava por event loop: os testes e o TestClient criam loops distintos no mesmo processo"""
+
+    def __init__(self):
+        self._travas = weakref.WeakKeyDictionary()
+
+    def __call__(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        trava = self._travas.get(loop)
+        if trava is None:
+            trava = self._travas[loop] = asyncio.Lock()
+        return trava
+
+
+trava_escrita = TravaEscrita()
+ESCRITOR_UNICO = SQLITE_ESCRITOR_UNICO and make_url(ASYNC_DATABASE_URL).get_backend_name() == "sqlite"
+
+
+class SessaoEscritaSerializada(AsyncSession):
+    """
+    Sessão de escrita do modo SQLite: adquire a trava do worker antes do primeiro comando de escrita
+    (flush, DML ou commit com alterações pendentes) e a libera ao fim da transação
+    - O sqlite3 só abre a transação no primeiro comando de escrita; as leituras anteriores
+      (verificações de existência) rodam fora da trava, que fica retida apenas durante a escrita
+    """
+
+    _trava = None
+
+    async def _reservar(self):
+        if self._trava is None:
+            trava = trava_escrita()
+            await trava.acquire()
+            self._trava = trava
+
+    def _liberar(self):
+        if self._trava is not None:
+            self._trava.release()
+            self._trava = None
+
+    async def execute(self, statement, *args, **kwargs):
+        if getattr(statement, "is_dml", False):
+            await self._reservar()
+        return await super().execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        if getattr(statement, "is_dml", False):
+            await self._reservar()
+        return await super().scalar(statement, *args, **kwargs)
+
+    async def flush(self, objects=None):
+        await self._reservar()
+        await super().flush(objects)
+
+    async def commit(self):
+        if self.new or self.dirty or self.deleted:
+            await self._reservar()
+        try:
+            await super().commit()
+        finally:
+            self._liberar()
+
+    async def rollback(self):
+        try:
+            await super().rollback()
+        finally:
+            self._liberar()
+
+    async def close(self):
+        try:
+            await super().close()
+        finally:
+            self._liberar()
+
+
+def sessao_escrita() -> AsyncSession:
+    """Sessão no banco primário; no SQLite, serializa as transações de escrita do worker"""
+    if ESCRITOR_UNICO:
+        return SessaoEscritaSerializada(**AsyncSessionLocal.kw)
+    return AsyncSessionLocal()
+
+
+"""
+Provedores de sessão compartilhados pelas rotas
+- get_db: sessão de escrita no banco primário (sessao_escrita)
+- get_db_leitura: sessão somente leitura, na réplica quando DATABASE_READ_URL estiver definida
+- Ambos iniciam o orçamento de consultas da requisição (app/services/orcamento_consultas.py)
+- Leia-suas-escritas: após uma escrita bem-sucedida o cliente recebe o cookie COOKIE_LER_PRIMARIO
+  por DB_FIXACAO_PRIMARIO_S segundos (atraso de replicação tolerado); enquanto o cookie existir,
+  ou se a requisição enviar o cabeçalho HEADER_LER_PRIMARIO, as leituras vão para o primário
+"""
+COOKIE_LER_PRIMARIO = "ler_primario"
+HEADER_LER_PRIMARIO = "X-Ler-Primario"
+DB_FIXACAO_PRIMARIO_S = int(os.getenv("DB_FIXACAO_PRIMARIO_S", "5"))
+
+
+def ler_do_primario(request: Request) -> bool:
+    return (
+        COOKIE_LER_PRIMARIO in request.cookies
+        or request.headers.get(HEADER_LER_PRIMARIO, "").lower() in ("1", "true", "yes")
+    )
+
+
+async def get_db(request: Request, response: Response):
+    iniciar_orcamento(request)
+    # Só é aplicado à resposta se a rota concluir sem erro
+    if AsyncSessionLeitura is not AsyncSessionLocal:
+        response.set_cookie(COOKIE_LER_PRIMARIO, "1", max_age=DB_FIXACAO_PRIMARIO_S, httponly=True)
+    async with sessao_escrita() as db:
+        yield db
+
+
+async def get_db_leitura(request: Request):
+    iniciar_orcamento(request)
+    fabrica = AsyncSessionLocal if ler_do_primario(request) else AsyncSessionLeitura
+    async with fabrica() as db:
+        yield db
+
+
+"""
+Configura cada conexão SQLite (pragmas_sqlite)
+- O SQLite ignora ON DELETE CASCADE a menos que foreign_keys esteja ativo na conexão
+- Em bancos em memória journal_mode=WAL não se aplica e o SQLite mantém o modo "memory"
+- Vale tanto para o driver sqlite3 quanto para o adaptador do aiosqlite
+"""
+
+
+@event.listens_for(Engine, "connect")
+def configurar_conexao_sqlite(dbapi_connection, connection_record):
+    if "sqlite" in type(dbapi_connection).__module__:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas_sqlite():
+            cursor.execute(pragma)
+        cursor.close()
@@ -1,11 +1,25 @@
 from sqlalchemy import Column, Integer, String
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from .database import Base
+from app.services.validators import normalizar_documento
 
 
 class ProdutorRural(Base):
     __tablename__ = "produtores"
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String, nullable=False)
-    cpf_cnpj = Column(String, unique=True, nullable=False, index=True)
-    propriedades = relationship("Propriedade", back_populates="produtor")
+    # Documento como enviado pelo cliente; a unicidade vale para a forma canônica (somente dígitos)
+    cpf_cnpj = Column(String, nullable=False)
+    documento = Column(String, unique=True, nullable=False, index=True)
+    version = Column(Integer, nullable=False, server_default="1")
+    propriedades = relationship(
+        "Propriedade", back_populates="produtor", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
+    @validates("cpf_cnpj")
+    def _normalizar_documento(self, chave, valor):
+        # Toda escrita de cpf_cnpj (rotas, seeds) atualiza o documento normalizado
+        self.documento = normalizar_documento(valor)
+        return valor
@@ -1,17 +1,29 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 
 
 class Propriedade(Base):
     __tablename__ = "propriedades"
+    __table_args__ = (
+        CheckConstraint("area_total > 0", name="ck_propriedades_area_total_positiva"),
+        CheckConstraint("area_agricultavel > 0", name="ck_propriedades_area_agricultavel_positiva"),
+        CheckConstraint("area_vegetacao > 0", name="ck_propriedades_area_vegetacao_positiva"),
+        CheckConstraint("area_agricultavel + area_vegetacao <= area_total", name="ck_propriedades_soma_areas"),
+        Index("uq_propriedades_produtor_id_nome", "produtor_id", "nome", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String, nullable=False)
     cidade = Column(String, nullable=False)
-    estado = Column(String, nullable=False)
+    estado = Column(String, nullable=False, index=True)
     area_total = Column(Float, nullable=False)
     area_agricultavel = Column(Float, nullable=False)
     area_vegetacao = Column(Float, nullable=False)
-    produtor_id = Column(Integer, ForeignKey("produtores.id"), nullable=False)
+    produtor_id = Column(Integer, ForeignKey("produtores.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False, server_default="1")
     produtor = relationship("ProdutorRural", back_populates="propriedades")
-    culturas = relationship("PropriedadeSafraCultura", back_populates="propriedade")
+    culturas = relationship(
+        "PropriedadeSafraCultura", back_populates="propriedade", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    __mapper_args__ = {"version_id_col": version}
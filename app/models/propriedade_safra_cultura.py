@@ -6,9 +6,10 @@ from .database import Base
 class PropriedadeSafraCultura(Base):
     __tablename__ = "propriedade_safra_cultura"
     id = Column(Integer, primary_key=True, index=True)
-    propriedade_id = Column(Integer, ForeignKey("propriedades.id"), nullable=False)
-    safra_id = Column(Integer, ForeignKey("safras.id"), nullable=False)
-    cultura_id = Column(Integer, ForeignKey("culturas.id"), nullable=False)
+    propriedade_id = Column(Integer, ForeignKey("propriedades.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Safras e culturas com associações não podem ser removidas (RESTRICT): remova as associações antes
+    safra_id = Column(Integer, ForeignKey("safras.id"), nullable=False, index=True)
+    cultura_id = Column(Integer, ForeignKey("culturas.id"), nullable=False, index=True)
 
     propriedade = relationship("Propriedade", back_populates="culturas")
     safra = relationship("Safra", back_populates="culturas")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer
+from sqlalchemy import Boolean, Column, Integer, false
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -6,5 +6,7 @@ from .database import Base
 class Safra(Base):
     __tablename__ = "safras"
     id = Column(Integer, primary_key=True, index=True)
-    ano = Column(Integer, nullable=False)
-    culturas = relationship("PropriedadeSafraCultura", back_populates="safra")
+    ano = Column(Integer, nullable=False, unique=True, index=True)
+    # Safra encerrada cujas associações foram movidas para o arquivo (app/utils/arquivamento.py)
+    arquivada = Column(Boolean, nullable=False, default=False, server_default=false())
+    culturas = relationship("PropriedadeSafraCultura", back_populates="safra", passive_deletes=True)
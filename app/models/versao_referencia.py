@@ -0,0 +1,8 @@
+from sqlalchemy import Column, Integer, String
+from .database import Base
+
+
+class VersaoReferencia(Base):
+    __tablename__ = "versoes_referencia"
+    nome = Column(String, primary_key=True)
+    versao = Column(Integer, nullable=False, server_default="0")
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Cultura
-from app.models.database import SessionLocal
+from app.models import consultas
+from app.models.database import get_db, get_db_leitura
 from app.schemas.cultura import CulturaCreate, CulturaRead, CulturaUpdate
+from app.services.cache_referencia import cache_referencia
+from app.services.orcamento_consultas import limitar_linhas, conferir_linhas
 from typing import List
 
 """
@@ -11,30 +16,28 @@ Rota para gerenciar Culturas
 router = APIRouter(prefix="/culturas", tags=["Culturas"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 """
 Criação de uma nova cultura
 """
 
 
 @router.post("/", response_model=CulturaRead, status_code=status.HTTP_201_CREATED)
-def create_cultura(cultura: CulturaCreate, db: Session = Depends(get_db)):
+async def create_cultura(cultura: CulturaCreate, db: AsyncSession = Depends(get_db)):
     # Verificar se já existe uma cultura com o mesmo nome
-    existing_cultura = db.query(Cultura).filter(Cultura.nome == cultura.nome).first()
-    if existing_cultura:
+    if await db.scalar(consultas.CULTURA_NOME_EXISTE, {"nome": cultura.nome}):
         raise HTTPException(status_code=400, detail="Já existe uma cultura com este nome")
 
     db_cultura = Cultura(**cultura.dict())
     db.add(db_cultura)
-    db.commit()
-    db.refresh(db_cultura)
+    try:
+        await cache_referencia.registrar_alteracao(db)
+        await db.commit()
+    except IntegrityError:
+        # Outra requisição cadastrou o mesmo nome entre a verificação e o INSERT (índice único ix_culturas_nome)
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Já existe uma cultura com este nome")
+    cache_referencia.invalidar()
+    await db.refresh(db_cultura)
     return db_cultura
 
 
@@ -44,8 +47,8 @@ Listar todas as culturas
 
 
 @router.get("/", response_model=List[CulturaRead])
-def list_culturas(db: Session = Depends(get_db)):
-    return db.query(Cultura).order_by(Cultura.nome).all()
+async def list_culturas(db: AsyncSession = Depends(get_db_leitura)):
+    return conferir_linhas((await db.scalars(limitar_linhas(select(Cultura).order_by(Cultura.nome)))).all())
 
 
 """
@@ -54,8 +57,8 @@ Obter uma cultura específica pelo ID
 
 
 @router.get("/{cultura_id}", response_model=CulturaRead)
-def get_cultura(cultura_id: int, db: Session = Depends(get_db)):
-    cultura = db.query(Cultura).filter(Cultura.id == cultura_id).first()
+async def get_cultura(cultura_id: int, db: AsyncSession = Depends(get_db_leitura)):
+    cultura = await db.scalar(consultas.CULTURA_POR_ID, {"id": cultura_id})
     if not cultura:
         raise HTTPException(status_code=404, detail="Cultura não encontrada")
     return cultura
@@ -67,22 +70,27 @@ Atualizar uma cultura específica pelo ID
 
 
 @router.put("/{cultura_id}", response_model=CulturaRead)
-def update_cultura(cultura_id: int, cultura: CulturaUpdate, db: Session = Depends(get_db)):
-    db_cultura = db.query(Cultura).filter(Cultura.id == cultura_id).first()
+async def update_cultura(cultura_id: int, cultura: CulturaUpdate, db: AsyncSession = Depends(get_db)):
+    db_cultura = await db.scalar(consultas.CULTURA_POR_ID, {"id": cultura_id})
     if not db_cultura:
         raise HTTPException(status_code=404, detail="Cultura não encontrada")
 
     # Verificar se o novo nome já existe em outra cultura
     if cultura.nome and cultura.nome != db_cultura.nome:
-        existing_cultura = db.query(Cultura).filter(Cultura.nome == cultura.nome).first()
-        if existing_cultura:
+        if await db.scalar(consultas.CULTURA_NOME_EXISTE, {"nome": cultura.nome}):
             raise HTTPException(status_code=400, detail="Já existe uma cultura com este nome")
 
     for key, value in cultura.dict(exclude_unset=True).items():
         setattr(db_cultura, key, value)
 
-    db.commit()
-    db.refresh(db_cultura)
+    try:
+        await cache_referencia.registrar_alteracao(db)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Já existe uma cultura com este nome")
+    cache_referencia.invalidar()
+    await db.refresh(db_cultura)
     return db_cultura
 
 
@@ -92,10 +100,17 @@ Deletar uma cultura específica pelo ID
 
 
 @router.delete("/{cultura_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_cultura(cultura_id: int, db: Session = Depends(get_db)):
-    db_cultura = db.query(Cultura).filter(Cultura.id == cultura_id).first()
+async def delete_cultura(cultura_id: int, db: AsyncSession = Depends(get_db)):
+    db_cultura = await db.scalar(consultas.CULTURA_POR_ID, {"id": cultura_id})
     if not db_cultura:
         raise HTTPException(status_code=404, detail="Cultura não encontrada")
-    db.delete(db_cultura)
-    db.commit()
+    await db.delete(db_cultura)
+    await cache_referencia.registrar_alteracao(db)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Chaves sem cascade: associações (em aberto ou arquivadas) impedem a remoção
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Cultura possui associações com propriedades; remova-as antes")
+    cache_referencia.invalidar()
     return None
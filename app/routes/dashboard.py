@@ -1,8 +1,8 @@
+import os
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models import Propriedade, PropriedadeSafraCultura, Cultura
-from app.models.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import consultas
+from app.models.database import get_db_leitura
 from app.schemas.dashboard import (
     DashboardData,
     DashboardStats,
@@ -10,20 +10,42 @@ from app.schemas.dashboard import (
     GraficoCultura,
     GraficoUsoSolo
 )
-from typing import List
+from typing import List, Optional
+from app.services.cache_referencia import cache_referencia
+from app.services.orcamento_consultas import orcamento_rota
 
 """
 Rota para o Dashboard
+- Agregações sobre tabelas inteiras: tempo limite por statement próprio (DB_STATEMENT_TIMEOUT_DASHBOARD_MS)
+"""
+DB_STATEMENT_TIMEOUT_DASHBOARD_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_DASHBOARD_MS", "15000"))
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"],
+    dependencies=[Depends(orcamento_rota(timeout_ms=DB_STATEMENT_TIMEOUT_DASHBOARD_MS))]
+)
+
+
+"""
+Quantidade de associações por cultura, opcionalmente restrita a um ano de safra
+- O ano é resolvido para safra_id e o filtro é aplicado diretamente na tabela de associações,
+  permitindo o partition pruning quando ela está particionada por safra
+- Safras arquivadas são respondidas pelos resumos pré-agregados (resumo_safra_cultura);
+  sem filtro, os resumos são somados às associações das safras em aberto
 """
-router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def contar_culturas(db: AsyncSession, ano: Optional[int] = None):
+    if ano is None:
+        return (await db.execute(consultas.ASSOCIACOES_POR_CULTURA)).all()
+
+    safra_id = await cache_referencia.safra_id_por_ano(db, ano)
+    if safra_id is None:
+        return []
+    if cache_referencia.safra_arquivada(safra_id):
+        return (await db.execute(consultas.RESUMO_POR_CULTURA_NA_SAFRA, {"safra_id": safra_id})).all()
+    return (await db.execute(consultas.ASSOCIACOES_POR_CULTURA_NA_SAFRA, {"safra_id": safra_id})).all()
 
 
 """
@@ -32,16 +54,14 @@ Endpoint para obter dados do dashboard
 
 
 @router.get("/", response_model=DashboardData)
-def get_dashboard_data(db: Session = Depends(get_db)):
-    # Estatísticas gerais
-    total_fazendas = db.query(func.count(Propriedade.id)).scalar()
-    total_hectares = db.query(func.sum(Propriedade.area_total)).scalar() or 0.0
+async def get_dashboard_data(ano: Optional[int] = None, db: AsyncSession = Depends(get_db_leitura)):
+    # Estatísticas gerais e áreas em uma única consulta
+    total_fazendas, total_hectares, area_agricultavel, area_vegetacao = (
+        await db.execute(consultas.RESUMO_PROPRIEDADES)
+    ).one()
 
     # Gráfico por estado
-    estados_data = db.query(
-        Propriedade.estado,
-        func.count(Propriedade.id).label('quantidade')
-    ).group_by(Propriedade.estado).all()
+    estados_data = (await db.execute(consultas.PROPRIEDADES_POR_ESTADO)).all()
 
     grafico_estados = []
     for estado, quantidade in estados_data:
@@ -52,11 +72,8 @@ def get_dashboard_data(db: Session = Depends(get_db)):
             percentual=round(percentual, 2)
         ))
 
-    # Gráfico por cultura plantada
-    culturas_data = db.query(
-        Cultura.nome,
-        func.count(PropriedadeSafraCultura.id).label('quantidade')
-    ).join(PropriedadeSafraCultura).group_by(Cultura.nome).all()
+    # Gráfico por cultura plantada (único gráfico afetado pelo filtro de ano)
+    culturas_data = await contar_culturas(db, ano)
 
     total_culturas = sum(qtd for _, qtd in culturas_data)
     grafico_culturas = []
@@ -69,9 +86,6 @@ def get_dashboard_data(db: Session = Depends(get_db)):
         ))
 
     # Gráfico por uso do solo
-    area_agricultavel = db.query(func.sum(Propriedade.area_agricultavel)).scalar() or 0.0
-    area_vegetacao = db.query(func.sum(Propriedade.area_vegetacao)).scalar() or 0.0
-
     grafico_uso_solo = []
     if total_hectares > 0:
         grafico_uso_solo.extend([
@@ -104,9 +118,8 @@ Endpoint para obter estatísticas do dashboard
 
 
 @router.get("/estatisticas", response_model=DashboardStats)
-def get_estatisticas(db: Session = Depends(get_db)):
-    total_fazendas = db.query(func.count(Propriedade.id)).scalar()
-    total_hectares = db.query(func.sum(Propriedade.area_total)).scalar() or 0.0
+async def get_estatisticas(db: AsyncSession = Depends(get_db_leitura)):
+    total_fazendas, total_hectares, _, _ = (await db.execute(consultas.RESUMO_PROPRIEDADES)).one()
 
     return DashboardStats(
         total_fazendas=total_fazendas,
@@ -120,13 +133,10 @@ Endpoint para obter gráficos por estado, cultura e uso do solo
 
 
 @router.get("/grafico-estados", response_model=List[GraficoEstado])
-def get_grafico_estados(db: Session = Depends(get_db)):
-    total_fazendas = db.query(func.count(Propriedade.id)).scalar()
+async def get_grafico_estados(db: AsyncSession = Depends(get_db_leitura)):
+    total_fazendas, _, _, _ = (await db.execute(consultas.RESUMO_PROPRIEDADES)).one()
 
-    estados_data = db.query(
-        Propriedade.estado,
-        func.count(Propriedade.id).label('quantidade')
-    ).group_by(Propriedade.estado).all()
+    estados_data = (await db.execute(consultas.PROPRIEDADES_POR_ESTADO)).all()
 
     grafico_estados = []
     for estado, quantidade in estados_data:
@@ -146,11 +156,8 @@ Endpoint para obter gráfico de culturas plantadas
 
 
 @router.get("/grafico-culturas", response_model=List[GraficoCultura])
-def get_grafico_culturas(db: Session = Depends(get_db)):
-    culturas_data = db.query(
-        Cultura.nome,
-        func.count(PropriedadeSafraCultura.id).label('quantidade')
-    ).join(PropriedadeSafraCultura).group_by(Cultura.nome).all()
+async def get_grafico_culturas(ano: Optional[int] = None, db: AsyncSession = Depends(get_db_leitura)):
+    culturas_data = await contar_culturas(db, ano)
 
     total_culturas = sum(qtd for _, qtd in culturas_data)
     grafico_culturas = []
@@ -171,10 +178,8 @@ Endpoint para obter gráfico de uso do solo
 
 
 @router.get("/grafico-uso-solo", response_model=List[GraficoUsoSolo])
-def get_grafico_uso_solo(db: Session = Depends(get_db)):
-    total_hectares = db.query(func.sum(Propriedade.area_total)).scalar() or 0.0
-    area_agricultavel = db.query(func.sum(Propriedade.area_agricultavel)).scalar() or 0.0
-    area_vegetacao = db.query(func.sum(Propriedade.area_vegetacao)).scalar() or 0.0
+async def get_grafico_uso_solo(db: AsyncSession = Depends(get_db_leitura)):
+    _, total_hectares, area_agricultavel, area_vegetacao = (await db.execute(consultas.RESUMO_PROPRIEDADES)).one()
 
     grafico_uso_solo = []
     if total_hectares > 0:
@@ -0,0 +1,137 @@
+import hmac
+import os
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from app.models.database import async_engine
+from app.schemas.metricas import ConsultaLenta, MetricasPool, MetricasCacheSql
+from app.services.cache_referencia import cache_referencia
+from app.utils.consultas_lentas import consultas_lentas
+from app.utils.metricas_http import metricas_http
+from app.utils.metricas_pool import estado_pool, estatisticas_pool
+from app.utils.metricas_sql import estatisticas_cache_sql, tamanho_cache_compilacao
+from app.utils.prometheus import CONTENT_TYPE, Exposicao
+
+"""
+Rota para métricas operacionais
+"""
+router = APIRouter(prefix="/metrics", tags=["Métricas"])
+
+# Token das rotas administrativas (cabeçalho X-Admin-Token); sem ADMIN_TOKEN definido elas ficam indisponíveis
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def exigir_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN or x_admin_token is None or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Acesso restrito à administração")
+
+
+"""
+Estado do pool de conexões do worker atual
+- em_uso/ociosas/overflow: fotografia instantânea do pool
+- espera_segundos: histograma acumulado do tempo para obter uma conexão
+- timeouts: checkouts que excederam DB_POOL_TIMEOUT (pool subdimensionado)
+"""
+
+
+@router.get("/pool", response_model=MetricasPool)
+async def metricas_pool():
+    return MetricasPool(
+        **estado_pool(async_engine.pool),
+        checkouts=estatisticas_pool.checkouts,
+        timeouts=estatisticas_pool.timeouts,
+        espera_segundos=estatisticas_pool.espera.snapshot()
+    )
+
+
+"""
+Cache de compilação de statements do SQLAlchemy no worker atual
+- hit_rate: fração das execuções cacheáveis que reaproveitaram o SQL compilado
+- cache: ocupação do cache da engine assíncrona (query_cache_size)
+"""
+
+
+@router.get("/cache-sql", response_model=MetricasCacheSql)
+async def metricas_cache_sql():
+    return MetricasCacheSql(
+        **estatisticas_cache_sql.snapshot(),
+        cache=tamanho_cache_compilacao(async_engine.sync_engine)
+    )
+
+
+"""
+Consultas lentas registradas pelo worker atual, mais recentes primeiro (rota administrativa)
+- SQL, formato dos parâmetros, duração, rota, request_id e o plano obtido com EXPLAIN
+- rota: filtra pelo template da rota (ex.: /dashboard/)
+- O histórico de todos os workers fica em logs/consultas_lentas.log
+"""
+
+
+@router.get("/consultas-lentas", response_model=List[ConsultaLenta], dependencies=[Depends(exigir_admin)])
+async def listar_consultas_lentas(limite: int = Query(50, ge=1, le=1000), rota: Optional[str] = None):
+    return consultas_lentas.listar(limite, rota)
+
+
+"""
+Métricas do worker atual no formato do Prometheus (scrape em /metrics)
+- Requisições HTTP: latência por rota (template do caminho), respostas por status, em andamento
+- Pool de conexões: estado, checkouts, timeouts e espera por conexão
+- Caches: contagens do cache de compilação do SQLAlchemy e consultas/acertos do cache de referência
+"""
+
+
+@router.get("", include_in_schema=False)
+async def metricas_prometheus():
+    exposicao = Exposicao()
+
+    http = metricas_http.snapshot()
+    exposicao.histograma(
+        "http_request_duration_seconds", "Latência das requisições por rota",
+        [((("method", metodo), ("route", rota)), snapshot) for (metodo, rota), snapshot in http["latencias"].items()]
+    )
+    exposicao.metrica(
+        "http_requests_total", "counter", "Respostas por rota e status",
+        [((("method", metodo), ("route", rota), ("status", status)), quantidade)
+         for (metodo, rota, status), quantidade in http["respostas"].items()]
+    )
+    exposicao.metrica("http_requests_in_progress", "gauge", "Requisições em andamento no worker",
+                      [((), http["em_andamento"])])
+    for indice, (nome, ajuda) in enumerate((
+        ("http_db_queries_total", "Consultas SQL executadas pelas requisições da rota"),
+        ("http_db_seconds_total", "Tempo no banco das requisições da rota"),
+        ("http_db_rows_total", "Linhas retornadas às requisições da rota"),
+        ("http_db_n_plus_one_total", "Statements repetidos acima de SQL_N_MAIS_1_LIMITE (possível N+1)"),
+    )):
+        exposicao.metrica(nome, "counter", ajuda, [
+            ((("method", metodo), ("route", rota)), valores[indice])
+            for (metodo, rota), valores in http["banco"].items()
+        ])
+
+    pool = estado_pool(async_engine.pool)
+    for nome, campo in (("size", "tamanho"), ("checked_out", "em_uso"), ("idle", "ociosas"), ("overflow", "overflow")):
+        exposicao.metrica(f"db_pool_{nome}", "gauge", f"Pool de conexões: {campo}", [((), pool[campo])])
+    exposicao.metrica("db_pool_checkouts_total", "counter", "Conexões entregues pelo pool",
+                      [((), estatisticas_pool.checkouts)])
+    exposicao.metrica("db_pool_timeouts_total", "counter", "Checkouts que excederam DB_POOL_TIMEOUT",
+                      [((), estatisticas_pool.timeouts)])
+    exposicao.histograma("db_pool_wait_seconds", "Espera por uma conexão do pool",
+                         [((), estatisticas_pool.espera.snapshot())])
+
+    cache_sql = estatisticas_cache_sql.snapshot()
+    exposicao.metrica(
+        "sqlalchemy_compiled_cache_total", "counter", "Execuções por situação no cache de compilação",
+        [((("result", situacao),), quantidade) for situacao, quantidade in cache_sql["contagens"].items()]
+    )
+    exposicao.metrica("sqlalchemy_compiled_cache_hit_ratio", "gauge",
+                      "Fração de CACHE_HIT entre as execuções cacheáveis", [((), cache_sql["hit_rate"])])
+    exposicao.metrica("sqlalchemy_compiled_cache_entries", "gauge", "Entradas no cache de compilação",
+                      [((), tamanho_cache_compilacao(async_engine.sync_engine)["entradas"])])
+
+    consultas, acertos = cache_referencia.consultas, cache_referencia.acertos
+    exposicao.metrica("cache_referencia_lookups_total", "counter",
+                      "Consultas de safras/culturas ao cache de referência", [((), consultas)])
+    exposicao.metrica("cache_referencia_hits_total", "counter", "Consultas respondidas sem recarga forçada",
+                      [((), acertos)])
+    exposicao.metrica("cache_referencia_hit_ratio", "gauge", "Fração das consultas respondidas sem recarga forçada",
+                      [((), acertos / consultas if consultas else 0.0)])
+
+    return Response(content=exposicao.texto(), media_type=CONTENT_TYPE)
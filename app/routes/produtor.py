@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header, Response, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.exc import IntegrityError
-from app.models import ProdutorRural
-from app.models.database import SessionLocal
+from app.models import ProdutorRural, Propriedade
+from app.models import consultas
+from app.models.database import get_db, get_db_leitura
 from app.schemas.produtor import ProdutorCreate, ProdutorRead, ProdutorUpdate
-from typing import List
-from app.services.validators import validar_cpf_cnpj
+from typing import List, Optional
+from app.services.validators import normalizar_documento, validar_cpf_cnpj
+from app.services.concorrencia import versao_if_match, definir_etag, erro_conflito_versao
+from app.services.orcamento_consultas import limitar_linhas, conferir_linhas
+from app.utils.arquivamento import descontar_dos_resumos
 
 """
 Rota para gerenciar Produtores Rurais
@@ -13,12 +19,15 @@ Rota para gerenciar Produtores Rurais
 router = APIRouter(prefix="/produtores", tags=["Produtores"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+"""
+Violação do índice único do documento normalizado
+- SQLite: "UNIQUE constraint failed: produtores.documento"
+- Postgres: 'duplicate key value violates unique constraint "ix_produtores_documento"'
+"""
+
+
+def documento_duplicado(erro: IntegrityError) -> bool:
+    return "documento" in str(erro.orig)
 
 
 """
@@ -27,19 +36,19 @@ Criação de um novo produtor rural
 
 
 @router.post("/", response_model=ProdutorRead, status_code=status.HTTP_201_CREATED)
-def create_produtor(produtor: ProdutorCreate, db: Session = Depends(get_db)):
+async def create_produtor(produtor: ProdutorCreate, db: AsyncSession = Depends(get_db)):
     if not validar_cpf_cnpj(produtor.cpf_cnpj):
         raise HTTPException(status_code=400, detail="CPF ou CNPJ inválido")
     
     try:
         db_produtor = ProdutorRural(**produtor.model_dump())
         db.add(db_produtor)
-        db.commit()
-        db.refresh(db_produtor)
+        await db.commit()
+        await db.refresh(db_produtor)
         return db_produtor
     except IntegrityError as e:
-        db.rollback()
-        if "UNIQUE constraint failed" in str(e) and "cpf_cnpj" in str(e):
+        await db.rollback()
+        if documento_duplicado(e):
             raise HTTPException(status_code=400, detail="CPF ou CNPJ já cadastrado")
         raise HTTPException(status_code=400, detail="Erro ao criar produtor")
 
@@ -50,8 +59,26 @@ Listar todos os produtores rurais
 
 
 @router.get("/", response_model=List[ProdutorRead])
-def list_produtores(db: Session = Depends(get_db)):
-    return db.query(ProdutorRural).all()
+async def list_produtores(db: AsyncSession = Depends(get_db_leitura)):
+    return conferir_linhas((await db.scalars(limitar_linhas(select(ProdutorRural)))).all())
+
+
+"""
+Obter um produtor rural pelo CPF/CNPJ, com ou sem formatação
+- O documento é normalizado para somente dígitos: uma busca no índice único de produtores.documento
+- path: CNPJs formatados contêm "/"
+"""
+
+
+@router.get("/por-documento/{doc:path}", response_model=ProdutorRead)
+async def get_produtor_por_documento(doc: str, response: Response, db: AsyncSession = Depends(get_db_leitura)):
+    if not validar_cpf_cnpj(doc):
+        raise HTTPException(status_code=400, detail="CPF ou CNPJ inválido")
+    produtor = await db.scalar(consultas.PRODUTOR_POR_DOCUMENTO, {"documento": normalizar_documento(doc)})
+    if not produtor:
+        raise HTTPException(status_code=404, detail="Produtor não encontrado")
+    definir_etag(response, produtor.version)
+    return produtor
 
 
 """
@@ -60,10 +87,11 @@ Obter um produtor rural específico pelo ID
 
 
 @router.get("/{produtor_id}", response_model=ProdutorRead)
-def get_produtor(produtor_id: int, db: Session = Depends(get_db)):
-    produtor = db.query(ProdutorRural).filter(ProdutorRural.id == produtor_id).first()
+async def get_produtor(produtor_id: int, response: Response, db: AsyncSession = Depends(get_db_leitura)):
+    produtor = await db.scalar(consultas.PRODUTOR_POR_ID, {"id": produtor_id})
     if not produtor:
         raise HTTPException(status_code=404, detail="Produtor não encontrado")
+    definir_etag(response, produtor.version)
     return produtor
 
 
@@ -73,10 +101,19 @@ Atualizar um produtor rural específico pelo ID
 
 
 @router.put("/{produtor_id}", response_model=ProdutorRead)
-def update_produtor(produtor_id: int, produtor: ProdutorUpdate, db: Session = Depends(get_db)):
-    db_produtor = db.query(ProdutorRural).filter(ProdutorRural.id == produtor_id).first()
+async def update_produtor(
+        produtor_id: int,
+        produtor: ProdutorUpdate,
+        response: Response,
+        if_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_db)
+):
+    versao = versao_if_match(if_match)
+    db_produtor = await db.scalar(consultas.PRODUTOR_POR_ID, {"id": produtor_id})
     if not db_produtor:
         raise HTTPException(status_code=404, detail="Produtor não encontrado")
+    if versao is not None and db_produtor.version != versao:
+        raise erro_conflito_versao()
     
     if produtor.cpf_cnpj and not validar_cpf_cnpj(produtor.cpf_cnpj):
         raise HTTPException(status_code=400, detail="CPF ou CNPJ inválido")
@@ -84,12 +121,17 @@ def update_produtor(produtor_id: int, produtor: ProdutorUpdate, db: Session = De
     try:
         for key, value in produtor.model_dump(exclude_unset=True).items():
             setattr(db_produtor, key, value)
-        db.commit()
-        db.refresh(db_produtor)
+        # O UPDATE inclui "WHERE version = ?"; uma escrita concorrente gera StaleDataError
+        await db.commit()
+        await db.refresh(db_produtor)
+        definir_etag(response, db_produtor.version)
         return db_produtor
+    except StaleDataError:
+        await db.rollback()
+        raise erro_conflito_versao()
     except IntegrityError as e:
-        db.rollback()
-        if "UNIQUE constraint failed" in str(e) and "cpf_cnpj" in str(e):
+        await db.rollback()
+        if documento_duplicado(e):
             raise HTTPException(status_code=400, detail="CPF ou CNPJ já cadastrado")
         raise HTTPException(status_code=400, detail="Erro ao atualizar produtor")
 
@@ -100,10 +142,11 @@ Deletar um produtor rural específico pelo ID
 
 
 @router.delete("/{produtor_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_produtor(produtor_id: int, db: Session = Depends(get_db)):
-    db_produtor = db.query(ProdutorRural).filter(ProdutorRural.id == produtor_id).first()
-    if not db_produtor:
+async def delete_produtor(produtor_id: int, db: AsyncSession = Depends(get_db)):
+    # Propriedades e associações (inclusive as arquivadas) são removidas pelo ON DELETE CASCADE do banco
+    await descontar_dos_resumos(db, select(Propriedade.id).where(Propriedade.produtor_id == produtor_id))
+    result = await db.execute(delete(ProdutorRural).where(ProdutorRural.id == produtor_id))
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Produtor não encontrado")
-    db.delete(db_produtor)
-    db.commit()
+    await db.commit()
     return None
@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import math
+from fastapi import APIRouter, Depends, HTTPException, Header, Response, status
+from sqlalchemy import delete, update, select, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from app.models import Propriedade, ProdutorRural
-from app.models.database import SessionLocal
-from app.schemas.propriedade import PropriedadeCreate, PropriedadeRead, PropriedadeUpdate
-from typing import List
+from app.models import consultas
+from app.models.database import get_db, get_db_leitura
+from app.schemas.propriedade import PropriedadeCreate, PropriedadeRead, PropriedadeUpdate, ResultadoUpsert
+from typing import List, Optional, Union
+from app.services.concorrencia import versao_if_match, definir_etag, erro_conflito_versao
+from app.services.orcamento_consultas import (
+    DB_STATEMENT_TIMEOUT_LOTE_MS, conferir_linhas, limitar_linhas, orcamento_rota, reservar_consultas
+)
+from app.utils.arquivamento import descontar_dos_resumos
 
 """
 Rota para gerenciar Propriedades
@@ -11,20 +21,31 @@ Rota para gerenciar Propriedades
 router = APIRouter(prefix="/propriedades", tags=["Propriedades"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+"""
+Regras garantidas pelas constraints de propriedades
+- Mapeia a constraint violada para a mesma mensagem de erro usada na validação dos schemas
+- O SQLite não informa o nome de índices únicos, apenas as colunas
+"""
+MENSAGENS_CONSTRAINTS = {
+    "ck_propriedades_soma_areas": "Soma das áreas agricultável e vegetação não pode ultrapassar a área total",
+    "ck_propriedades_area_total_positiva": "Área deve ser maior que zero",
+    "ck_propriedades_area_agricultavel_positiva": "Área deve ser maior que zero",
+    "ck_propriedades_area_vegetacao_positiva": "Área deve ser maior que zero",
+    "uq_propriedades_produtor_id_nome": "Já existe uma propriedade com este nome para o produtor",
+    "propriedades.produtor_id, propriedades.nome": "Já existe uma propriedade com este nome para o produtor",
+}
+
+# Colunas atualizadas pelo upsert; (produtor_id, nome) é a chave natural
+COLUNAS_UPSERT = ["cidade", "estado", "area_total", "area_agricultavel", "area_vegetacao"]
+TAMANHO_LOTE_UPSERT = 1000
 
 
-def validar_areas_propriedade(area_total: float, area_agricultavel: float, area_vegetacao: float):
-    if area_agricultavel + area_vegetacao > area_total:
-        raise HTTPException(
-            status_code=400,
-            detail="Soma das áreas agricultável e vegetação não pode ultrapassar a área total"
-        )
+def erro_integridade_propriedade(erro: IntegrityError, detalhe_padrao: str) -> HTTPException:
+    mensagem = str(erro.orig)
+    for constraint, detalhe in MENSAGENS_CONSTRAINTS.items():
+        if constraint in mensagem:
+            return HTTPException(status_code=400, detail=detalhe)
+    return HTTPException(status_code=400, detail=detalhe_padrao)
 
 
 """
@@ -33,24 +54,21 @@ Criação de uma nova propriedade
 
 
 @router.post("/", response_model=PropriedadeRead, status_code=status.HTTP_201_CREATED)
-def create_propriedade(propriedade: PropriedadeCreate, db: Session = Depends(get_db)):
+async def create_propriedade(propriedade: PropriedadeCreate, db: AsyncSession = Depends(get_db)):
     # Verificar se o produtor existe
-    produtor = db.query(ProdutorRural).filter(ProdutorRural.id == propriedade.produtor_id).first()
-    if not produtor:
+    if not await db.scalar(consultas.PRODUTOR_EXISTE, {"id": propriedade.produtor_id}):
         raise HTTPException(status_code=404, detail="Produtor não encontrado")
 
-    # Validar áreas
-    validar_areas_propriedade(
-        propriedade.area_total,
-        propriedade.area_agricultavel,
-        propriedade.area_vegetacao
-    )
-
-    db_propriedade = Propriedade(**propriedade.dict())
-    db.add(db_propriedade)
-    db.commit()
-    db.refresh(db_propriedade)
-    return db_propriedade
+    # Regras de área já validadas pelo schema e garantidas pelas CHECK constraints
+    try:
+        db_propriedade = Propriedade(**propriedade.dict())
+        db.add(db_propriedade)
+        await db.commit()
+        await db.refresh(db_propriedade)
+        return db_propriedade
+    except IntegrityError as e:
+        await db.rollback()
+        raise erro_integridade_propriedade(e, "Erro ao criar propriedade")
 
 
 """
@@ -59,8 +77,65 @@ Listar todas as propriedades
 
 
 @router.get("/", response_model=List[PropriedadeRead])
-def list_propriedades(db: Session = Depends(get_db)):
-    return db.query(Propriedade).all()
+async def list_propriedades(db: AsyncSession = Depends(get_db_leitura)):
+    return conferir_linhas((await db.scalars(limitar_linhas(select(Propriedade)))).all())
+
+
+"""
+Upsert de propriedades (item único ou lote) pela chave (produtor_id, nome)
+- INSERT ... ON CONFLICT DO UPDATE em lotes de TAMANHO_LOTE_UPSERT linhas
+- Linhas cujos valores não mudaram não são reescritas (nem têm a versão incrementada)
+- Um statement por lote, reservado no orçamento de consultas: a sincronização diária não esbarra em DB_MAX_CONSULTAS
+"""
+
+
+@router.put("/upsert", response_model=ResultadoUpsert,
+            dependencies=[Depends(orcamento_rota(timeout_ms=DB_STATEMENT_TIMEOUT_LOTE_MS))])
+async def upsert_propriedades(
+        propriedades: Union[PropriedadeCreate, List[PropriedadeCreate]],
+        db: AsyncSession = Depends(get_db)
+):
+    if not isinstance(propriedades, list):
+        propriedades = [propriedades]
+
+    # Em caso de chave repetida no mesmo envio, a última ocorrência prevalece
+    linhas = list({(p.produtor_id, p.nome): p.model_dump() for p in propriedades}.values())
+    if not linhas:
+        return ResultadoUpsert(inseridos=0, atualizados=0, inalterados=0)
+
+    produtores_ids = {linha["produtor_id"] for linha in linhas}
+    encontrados = set(await db.scalars(select(ProdutorRural.id).where(ProdutorRural.id.in_(produtores_ids))))
+    if produtores_ids - encontrados:
+        raise HTTPException(status_code=404, detail="Produtor não encontrado")
+
+    dialeto = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    tabela = Propriedade.__table__
+    stmt = dialeto.insert(tabela)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabela.c.produtor_id, tabela.c.nome],
+        set_={**{coluna: stmt.excluded[coluna] for coluna in COLUNAS_UPSERT}, "version": tabela.c.version + 1},
+        where=or_(*[tabela.c[coluna].is_distinct_from(stmt.excluded[coluna]) for coluna in COLUNAS_UPSERT])
+    ).returning(tabela.c.version)
+
+    # Linhas inseridas voltam com version = 1; atualizadas com version > 1; inalteradas não voltam
+    inseridos = atualizados = 0
+    reservar_consultas(math.ceil(len(linhas) / TAMANHO_LOTE_UPSERT))
+    try:
+        for inicio in range(0, len(linhas), TAMANHO_LOTE_UPSERT):
+            versoes = (await db.scalars(stmt, linhas[inicio:inicio + TAMANHO_LOTE_UPSERT])).all()
+            novos = sum(1 for versao in versoes if versao == 1)
+            inseridos += novos
+            atualizados += len(versoes) - novos
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise erro_integridade_propriedade(e, "Erro ao sincronizar propriedades")
+
+    return ResultadoUpsert(
+        inseridos=inseridos,
+        atualizados=atualizados,
+        inalterados=len(linhas) - inseridos - atualizados
+    )
 
 
 """
@@ -69,10 +144,11 @@ Obter uma propriedade específica pelo ID
 
 
 @router.get("/{propriedade_id}", response_model=PropriedadeRead)
-def get_propriedade(propriedade_id: int, db: Session = Depends(get_db)):
-    propriedade = db.query(Propriedade).filter(Propriedade.id == propriedade_id).first()
+async def get_propriedade(propriedade_id: int, response: Response, db: AsyncSession = Depends(get_db_leitura)):
+    propriedade = await db.scalar(consultas.PROPRIEDADE_POR_ID, {"id": propriedade_id})
     if not propriedade:
         raise HTTPException(status_code=404, detail="Propriedade não encontrada")
+    definir_etag(response, propriedade.version)
     return propriedade
 
 
@@ -82,27 +158,45 @@ Atualizar uma propriedade existente
 
 
 @router.put("/{propriedade_id}", response_model=PropriedadeRead)
-def update_propriedade(propriedade_id: int, propriedade: PropriedadeUpdate, db: Session = Depends(get_db)):
-    db_propriedade = db.query(Propriedade).filter(Propriedade.id == propriedade_id).first()
-    if not db_propriedade:
-        raise HTTPException(status_code=404, detail="Propriedade não encontrada")
-
-    # Preparar dados para validação
+async def update_propriedade(
+        propriedade_id: int,
+        propriedade: PropriedadeUpdate,
+        response: Response,
+        if_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_db)
+):
+    versao = versao_if_match(if_match)
     update_data = propriedade.dict(exclude_unset=True)
-    area_total = update_data.get('area_total', db_propriedade.area_total)
-    area_agricultavel = update_data.get('area_agricultavel', db_propriedade.area_agricultavel)
-    area_vegetacao = update_data.get('area_vegetacao', db_propriedade.area_vegetacao)
+    if not update_data:
+        return await get_propriedade(propriedade_id, response, db)
+
+    # UPDATE ... RETURNING em uma única ida ao banco; as CHECK constraints validam
+    # as áreas contra os valores atuais da linha, sem um SELECT prévio.
+    # A versão é incrementada no próprio UPDATE e, com If-Match, faz parte do WHERE.
+    filtros = [Propriedade.id == propriedade_id]
+    if versao is not None:
+        filtros.append(Propriedade.version == versao)
 
-    # Validar áreas se alguma foi fornecida
-    if 'area_total' in update_data or 'area_agricultavel' in update_data or 'area_vegetacao' in update_data:
-        validar_areas_propriedade(area_total, area_agricultavel, area_vegetacao)
+    try:
+        db_propriedade = (await db.execute(
+            update(Propriedade)
+            .where(*filtros)
+            .values(**update_data, version=Propriedade.version + 1)
+            .returning(Propriedade)
+        )).scalar_one_or_none()
+    except IntegrityError as e:
+        await db.rollback()
+        raise erro_integridade_propriedade(e, "Erro ao atualizar propriedade")
 
-    for key, value in update_data.items():
-        setattr(db_propriedade, key, value)
+    if not db_propriedade:
+        if versao is not None and await db.scalar(consultas.PROPRIEDADE_EXISTE, {"id": propriedade_id}):
+            raise erro_conflito_versao()
+        raise HTTPException(status_code=404, detail="Propriedade não encontrada")
 
-    db.commit()
-    db.refresh(db_propriedade)
-    return db_propriedade
+    resposta = PropriedadeRead.model_validate(db_propriedade)
+    await db.commit()
+    definir_etag(response, resposta.version)
+    return resposta
 
 
 """
@@ -111,10 +205,11 @@ Deletar uma propriedade existente
 
 
 @router.delete("/{propriedade_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_propriedade(propriedade_id: int, db: Session = Depends(get_db)):
-    db_propriedade = db.query(Propriedade).filter(Propriedade.id == propriedade_id).first()
-    if not db_propriedade:
+async def delete_propriedade(propriedade_id: int, db: AsyncSession = Depends(get_db)):
+    # Associações (inclusive as arquivadas) são removidas pelo ON DELETE CASCADE do banco
+    await descontar_dos_resumos(db, select(Propriedade.id).where(Propriedade.id == propriedade_id))
+    result = await db.execute(delete(Propriedade).where(Propriedade.id == propriedade_id))
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Propriedade não encontrada")
-    db.delete(db_propriedade)
-    db.commit()
+    await db.commit()
     return None
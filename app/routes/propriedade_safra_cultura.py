@@ -1,14 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from app.models import PropriedadeSafraCultura, Propriedade, Safra, Cultura
-from app.models.database import SessionLocal
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import PropriedadeSafraCultura, PropriedadeSafraCulturaArquivo, Propriedade
+from app.models import consultas
+from app.models.database import get_db, get_db_leitura, sessao_escrita
 from app.schemas.propriedade_safra_cultura import (
     PropriedadeSafraCulturaCreate,
     PropriedadeSafraCulturaRead,
     PropriedadeSafraCulturaUpdate,
-    PropriedadeSafraCulturaDetail
+    PropriedadeSafraCulturaDetail,
+    RemocaoEmLote
+)
+from typing import List, Optional
+from app.services.escrita_agrupada import AgrupadorEscritas, PSC_AGRUPAR_ESCRITAS
+from app.services.cache_referencia import cache_referencia
+from app.services.orcamento_consultas import (
+    DB_STATEMENT_TIMEOUT_LOTE_MS, conferir_linhas, limitar_linhas, orcamento_rota
 )
-from typing import List
 
 """
 Rota para gerenciar Propriedade Safra Cultura
@@ -16,12 +25,8 @@ Rota para gerenciar Propriedade Safra Cultura
 router = APIRouter(prefix="/propriedade-safra-cultura", tags=["Propriedade-Safra-Cultura"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Modo opcional de escrita agrupada (group commit) para criações em alta taxa
+agrupador = AgrupadorEscritas(sessao_escrita) if PSC_AGRUPAR_ESCRITAS else None
 
 
 """
@@ -30,33 +35,29 @@ Criação de uma nova associação entre Propriedade, Safra e Cultura
 
 
 @router.post("/", response_model=PropriedadeSafraCulturaRead, status_code=status.HTTP_201_CREATED)
-def create_propriedade_safra_cultura(
+async def create_propriedade_safra_cultura(
         psc: PropriedadeSafraCulturaCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
+    if agrupador is not None:
+        return await agrupador.submeter(psc)
+
     # Verificar se a propriedade existe
-    propriedade = db.query(Propriedade).filter(Propriedade.id == psc.propriedade_id).first()
-    if not propriedade:
+    if not await db.scalar(consultas.PROPRIEDADE_EXISTE, {"id": psc.propriedade_id}):
         raise HTTPException(status_code=404, detail="Propriedade não encontrada")
 
-    # Verificar se a safra existe
-    safra = db.query(Safra).filter(Safra.id == psc.safra_id).first()
-    if not safra:
+    # Verificar se a safra e a cultura existem (cache de referência, sem query)
+    if not await cache_referencia.safra_existe(db, psc.safra_id):
         raise HTTPException(status_code=404, detail="Safra não encontrada")
 
-    # Verificar se a cultura existe
-    cultura = db.query(Cultura).filter(Cultura.id == psc.cultura_id).first()
-    if not cultura:
+    if cache_referencia.safra_arquivada(psc.safra_id):
+        raise HTTPException(status_code=400, detail="Safra arquivada não aceita novas associações")
+
+    if not await cache_referencia.cultura_existe(db, psc.cultura_id):
         raise HTTPException(status_code=404, detail="Cultura não encontrada")
 
     # Verificar se já existe esta associação
-    existing = db.query(PropriedadeSafraCultura).filter(
-        PropriedadeSafraCultura.propriedade_id == psc.propriedade_id,
-        PropriedadeSafraCultura.safra_id == psc.safra_id,
-        PropriedadeSafraCultura.cultura_id == psc.cultura_id
-    ).first()
-
-    if existing:
+    if await db.scalar(consultas.ASSOCIACAO_EXISTE, psc.model_dump()):
         raise HTTPException(
             status_code=400,
             detail="Esta associação já existe"
@@ -64,23 +65,78 @@ def create_propriedade_safra_cultura(
 
     db_psc = PropriedadeSafraCultura(**psc.dict())
     db.add(db_psc)
-    db.commit()
-    db.refresh(db_psc)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Safra ou cultura removida por outro worker antes de o cache ser atualizado
+        await db.rollback()
+        cache_referencia.invalidar()
+        raise HTTPException(status_code=400, detail="Erro ao criar associação")
+    await db.refresh(db_psc)
     return db_psc
 
 
 """
-Listar todas as associações entre Propriedade, Safra e Cultura
+Consulta das associações com o nome da propriedade
+- Ano da safra e nome da cultura vêm do cache de referência (formato de PropriedadeSafraCulturaDetail)
+- modelo: PropriedadeSafraCulturaArquivo para as associações de safras arquivadas
+"""
+
+
+def select_detalhes(modelo=PropriedadeSafraCultura):
+    return select(
+        modelo.id,
+        modelo.propriedade_id,
+        Propriedade.nome.label("propriedade_nome"),
+        modelo.safra_id,
+        modelo.cultura_id
+    ).join(Propriedade, Propriedade.id == modelo.propriedade_id)
+
+
+async def detalhar(db: AsyncSession, linhas) -> List[dict]:
+    await cache_referencia.garantir(
+        db, {linha["safra_id"] for linha in linhas}, {linha["cultura_id"] for linha in linhas}
+    )
+    return [
+        {
+            **linha,
+            "safra_ano": cache_referencia.safras.get(linha["safra_id"]),
+            "cultura_nome": cache_referencia.culturas.get(linha["cultura_id"])
+        }
+        for linha in linhas
+    ]
+
+
+"""
+Listar as associações entre Propriedade, Safra e Cultura
+- Filtros opcionais por safra_id ou ano; o ano é resolvido para safra_id antes da consulta
+  para que, com a tabela particionada, apenas a partição da safra seja lida
+- Safra arquivada: as associações vêm do arquivo; sem filtro, apenas as safras em aberto são listadas
 """
 
 
 @router.get("/", response_model=List[PropriedadeSafraCulturaDetail])
-def list_propriedade_safra_cultura(db: Session = Depends(get_db)):
-    return db.query(PropriedadeSafraCultura).options(
-        joinedload(PropriedadeSafraCultura.propriedade),
-        joinedload(PropriedadeSafraCultura.safra),
-        joinedload(PropriedadeSafraCultura.cultura)
-    ).all()
+async def list_propriedade_safra_cultura(
+        safra_id: Optional[int] = None,
+        ano: Optional[int] = None,
+        db: AsyncSession = Depends(get_db_leitura)
+):
+    if ano is not None:
+        safra_ano_id = await cache_referencia.safra_id_por_ano(db, ano)
+        if safra_ano_id is None or (safra_id is not None and safra_id != safra_ano_id):
+            return []
+        safra_id = safra_ano_id
+
+    modelo = PropriedadeSafraCultura
+    if safra_id is not None and await cache_referencia.safra_existe(db, safra_id):
+        if cache_referencia.safra_arquivada(safra_id):
+            modelo = PropriedadeSafraCulturaArquivo
+
+    query = select_detalhes(modelo)
+    if safra_id is not None:
+        query = query.where(modelo.safra_id == safra_id)
+    linhas = (await db.execute(limitar_linhas(query.order_by(modelo.id)))).mappings().all()
+    return await detalhar(db, conferir_linhas(linhas))
 
 
 """
@@ -89,16 +145,12 @@ Obter uma associação específica entre Propriedade, Safra e Cultura pelo ID
 
 
 @router.get("/{psc_id}", response_model=PropriedadeSafraCulturaDetail)
-def get_propriedade_safra_cultura(psc_id: int, db: Session = Depends(get_db)):
-    psc = db.query(PropriedadeSafraCultura).options(
-        joinedload(PropriedadeSafraCultura.propriedade),
-        joinedload(PropriedadeSafraCultura.safra),
-        joinedload(PropriedadeSafraCultura.cultura)
-    ).filter(PropriedadeSafraCultura.id == psc_id).first()
+async def get_propriedade_safra_cultura(psc_id: int, db: AsyncSession = Depends(get_db_leitura)):
+    psc = (await db.execute(select_detalhes().where(PropriedadeSafraCultura.id == psc_id))).mappings().first()
 
     if not psc:
         raise HTTPException(status_code=404, detail="Associação não encontrada")
-    return psc
+    return (await detalhar(db, [psc]))[0]
 
 
 """
@@ -107,12 +159,12 @@ Atualizar uma associação existente entre Propriedade, Safra e Cultura
 
 
 @router.put("/{psc_id}", response_model=PropriedadeSafraCulturaRead)
-def update_propriedade_safra_cultura(
+async def update_propriedade_safra_cultura(
         psc_id: int,
         psc: PropriedadeSafraCulturaUpdate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
-    db_psc = db.query(PropriedadeSafraCultura).filter(PropriedadeSafraCultura.id == psc_id).first()
+    db_psc = await db.scalar(consultas.ASSOCIACAO_POR_ID, {"id": psc_id})
     if not db_psc:
         raise HTTPException(status_code=404, detail="Associação não encontrada")
 
@@ -120,37 +172,34 @@ def update_propriedade_safra_cultura(
 
     # Validar entidades relacionadas se fornecidas
     if 'propriedade_id' in update_data:
-        propriedade = db.query(Propriedade).filter(Propriedade.id == update_data['propriedade_id']).first()
-        if not propriedade:
+        if not await db.scalar(consultas.PROPRIEDADE_EXISTE, {"id": update_data['propriedade_id']}):
             raise HTTPException(status_code=404, detail="Propriedade não encontrada")
 
     if 'safra_id' in update_data:
-        safra = db.query(Safra).filter(Safra.id == update_data['safra_id']).first()
-        if not safra:
+        if not await cache_referencia.safra_existe(db, update_data['safra_id']):
             raise HTTPException(status_code=404, detail="Safra não encontrada")
+        if cache_referencia.safra_arquivada(update_data['safra_id']):
+            raise HTTPException(status_code=400, detail="Safra arquivada não aceita novas associações")
 
     if 'cultura_id' in update_data:
-        cultura = db.query(Cultura).filter(Cultura.id == update_data['cultura_id']).first()
-        if not cultura:
+        if not await cache_referencia.cultura_existe(db, update_data['cultura_id']):
             raise HTTPException(status_code=404, detail="Cultura não encontrada")
 
     # Verificar duplicação se todos os campos foram fornecidos
     if len(update_data) == 3:
-        existing = db.query(PropriedadeSafraCultura).filter(
-            PropriedadeSafraCultura.propriedade_id == update_data['propriedade_id'],
-            PropriedadeSafraCultura.safra_id == update_data['safra_id'],
-            PropriedadeSafraCultura.cultura_id == update_data['cultura_id'],
-            PropriedadeSafraCultura.id != psc_id
-        ).first()
-
-        if existing:
+        if await db.scalar(consultas.ASSOCIACAO_EXISTE_EM_OUTRA, {**update_data, "id": psc_id}):
             raise HTTPException(status_code=400, detail="Esta associação já existe")
 
     for key, value in update_data.items():
         setattr(db_psc, key, value)
 
-    db.commit()
-    db.refresh(db_psc)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        cache_referencia.invalidar()
+        raise HTTPException(status_code=400, detail="Erro ao atualizar associação")
+    await db.refresh(db_psc)
     return db_psc
 
 
@@ -160,10 +209,43 @@ Deletar uma associação entre Propriedade, Safra e Cultura
 
 
 @router.delete("/{psc_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_propriedade_safra_cultura(psc_id: int, db: Session = Depends(get_db)):
-    db_psc = db.query(PropriedadeSafraCultura).filter(PropriedadeSafraCultura.id == psc_id).first()
+async def delete_propriedade_safra_cultura(psc_id: int, db: AsyncSession = Depends(get_db)):
+    db_psc = await db.scalar(consultas.ASSOCIACAO_POR_ID, {"id": psc_id})
     if not db_psc:
         raise HTTPException(status_code=404, detail="Associação não encontrada")
-    db.delete(db_psc)
-    db.commit()
+    await db.delete(db_psc)
+    await db.commit()
     return None
+
+
+"""
+Remover em lote as associações que atendem aos filtros informados
+- Ex.: DELETE /propriedade-safra-cultura/?safra_id=1 limpa uma safra inteira em uma única query
+- A query pode alcançar uma safra inteira: usa o tempo limite de lote (DB_STATEMENT_TIMEOUT_LOTE_MS)
+"""
+
+
+@router.delete("/", response_model=RemocaoEmLote,
+               dependencies=[Depends(orcamento_rota(timeout_ms=DB_STATEMENT_TIMEOUT_LOTE_MS))])
+async def delete_propriedade_safra_cultura_em_lote(
+        safra_id: Optional[int] = None,
+        propriedade_id: Optional[int] = None,
+        cultura_id: Optional[int] = None,
+        db: AsyncSession = Depends(get_db)
+):
+    filtros = []
+    if safra_id is not None:
+        filtros.append(PropriedadeSafraCultura.safra_id == safra_id)
+    if propriedade_id is not None:
+        filtros.append(PropriedadeSafraCultura.propriedade_id == propriedade_id)
+    if cultura_id is not None:
+        filtros.append(PropriedadeSafraCultura.cultura_id == cultura_id)
+
+    if not filtros:
+        raise HTTPException(status_code=400, detail="Informe ao menos um filtro para remoção em lote")
+
+    result = await db.execute(
+        delete(PropriedadeSafraCultura).where(*filtros).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return RemocaoEmLote(removidos=result.rowcount)
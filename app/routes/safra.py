@@ -1,8 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Safra
-from app.models.database import SessionLocal
+from app.models import consultas
+from app.models.database import get_db, get_db_leitura
 from app.schemas.safra import SafraCreate, SafraRead, SafraUpdate
+from app.services.particionamento import criar_particao_safra
+from app.services.cache_referencia import cache_referencia
+from app.services.orcamento_consultas import limitar_linhas, conferir_linhas
 from typing import List
 
 """
@@ -11,30 +17,31 @@ Rota para gerenciar Safras
 router = APIRouter(prefix="/safras", tags=["Safras"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 """
 Criação de uma nova safra
 """
 
 
 @router.post("/", response_model=SafraRead, status_code=status.HTTP_201_CREATED)
-def create_safra(safra: SafraCreate, db: Session = Depends(get_db)):
+async def create_safra(safra: SafraCreate, db: AsyncSession = Depends(get_db)):
     # Verificar se já existe uma safra com o mesmo ano
-    existing_safra = db.query(Safra).filter(Safra.ano == safra.ano).first()
-    if existing_safra:
+    if await db.scalar(consultas.SAFRA_ANO_EXISTE, {"ano": safra.ano}):
         raise HTTPException(status_code=400, detail="Já existe uma safra para este ano")
 
     db_safra = Safra(**safra.dict())
     db.add(db_safra)
-    db.commit()
-    db.refresh(db_safra)
+    try:
+        await db.flush()
+        # Partição da nova safra em propriedade_safra_cultura, na mesma transação (PSC_PARTICIONADA)
+        await criar_particao_safra(db, db_safra.id)
+        await cache_referencia.registrar_alteracao(db)
+        await db.commit()
+    except IntegrityError:
+        # Outra requisição cadastrou o mesmo ano entre a verificação e o INSERT (índice único ix_safras_ano)
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Já existe uma safra para este ano")
+    cache_referencia.invalidar()
+    await db.refresh(db_safra)
     return db_safra
 
 
@@ -44,8 +51,8 @@ Listar todas as safras
 
 
 @router.get("/", response_model=List[SafraRead])
-def list_safras(db: Session = Depends(get_db)):
-    return db.query(Safra).order_by(Safra.ano.desc()).all()
+async def list_safras(db: AsyncSession = Depends(get_db_leitura)):
+    return conferir_linhas((await db.scalars(limitar_linhas(select(Safra).order_by(Safra.ano.desc())))).all())
 
 
 """
@@ -54,8 +61,8 @@ Obter uma safra específica pelo ID
 
 
 @router.get("/{safra_id}", response_model=SafraRead)
-def get_safra(safra_id: int, db: Session = Depends(get_db)):
-    safra = db.query(Safra).filter(Safra.id == safra_id).first()
+async def get_safra(safra_id: int, db: AsyncSession = Depends(get_db_leitura)):
+    safra = await db.scalar(consultas.SAFRA_POR_ID, {"id": safra_id})
     if not safra:
         raise HTTPException(status_code=404, detail="Safra não encontrada")
     return safra
@@ -67,22 +74,27 @@ Atualizar uma safra existente
 
 
 @router.put("/{safra_id}", response_model=SafraRead)
-def update_safra(safra_id: int, safra: SafraUpdate, db: Session = Depends(get_db)):
-    db_safra = db.query(Safra).filter(Safra.id == safra_id).first()
+async def update_safra(safra_id: int, safra: SafraUpdate, db: AsyncSession = Depends(get_db)):
+    db_safra = await db.scalar(consultas.SAFRA_POR_ID, {"id": safra_id})
     if not db_safra:
         raise HTTPException(status_code=404, detail="Safra não encontrada")
 
     # Verificar se o novo ano já existe em outra safra
     if safra.ano and safra.ano != db_safra.ano:
-        existing_safra = db.query(Safra).filter(Safra.ano == safra.ano).first()
-        if existing_safra:
+        if await db.scalar(consultas.SAFRA_ANO_EXISTE, {"ano": safra.ano}):
             raise HTTPException(status_code=400, detail="Já existe uma safra para este ano")
 
     for key, value in safra.dict(exclude_unset=True).items():
         setattr(db_safra, key, value)
 
-    db.commit()
-    db.refresh(db_safra)
+    try:
+        await cache_referencia.registrar_alteracao(db)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Já existe uma safra para este ano")
+    cache_referencia.invalidar()
+    await db.refresh(db_safra)
     return db_safra
 
 
@@ -92,10 +104,17 @@ Deletar uma safra
 
 
 @router.delete("/{safra_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_safra(safra_id: int, db: Session = Depends(get_db)):
-    db_safra = db.query(Safra).filter(Safra.id == safra_id).first()
+async def delete_safra(safra_id: int, db: AsyncSession = Depends(get_db)):
+    db_safra = await db.scalar(consultas.SAFRA_POR_ID, {"id": safra_id})
     if not db_safra:
         raise HTTPException(status_code=404, detail="Safra não encontrada")
-    db.delete(db_safra)
-    db.commit()
+    await db.delete(db_safra)
+    await cache_referencia.registrar_alteracao(db)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Chaves sem cascade: associações (em aberto ou arquivadas) impedem a remoção
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Safra possui associações com propriedades; remova-as antes")
+    cache_referencia.invalidar()
     return None
@@ -0,0 +1,84 @@
+import math
+import os
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Set
+from app.models import consultas
+from app.models.database import get_db_leitura
+from app.schemas.validacao import ValidacaoDocumentosRequest, ValidacaoDocumentosResponse
+from app.services.orcamento_consultas import reservar_consultas
+from app.services.validators import analisar_lote, normalizar_documento
+
+"""
+Rota para validação prévia de documentos (sistemas parceiros)
+"""
+router = APIRouter(prefix="/validacao", tags=["Validação"])
+
+# Documentos aceitos por requisição (413 ao exceder)
+VALIDACAO_MAX_DOCUMENTOS = int(os.getenv("VALIDACAO_MAX_DOCUMENTOS", "50000"))
+# Documentos por IN fora do Postgres (limite de parâmetros por statement do SQLite)
+VALIDACAO_LOTE_IN = int(os.getenv("VALIDACAO_LOTE_IN", "10000"))
+
+TIPOS = {11: "CPF", 14: "CNPJ"}
+
+
+"""
+Documentos já cadastrados dentre os informados (já normalizados)
+- Postgres: uma única consulta documento = ANY(:documentos), com a lista inteira em um só parâmetro
+- Demais bancos: IN expandido em blocos de VALIDACAO_LOTE_IN documentos, reservados no orçamento de consultas
+Em ambos os casos a busca usa o índice único de produtores.documento
+"""
+
+
+async def documentos_cadastrados(db: AsyncSession, documentos: List[str]) -> Set[str]:
+    if not documentos:
+        return set()
+    if db.bind.dialect.name == "postgresql":
+        return set(await db.scalars(consultas.DOCUMENTOS_CADASTRADOS_ANY, {"documentos": documentos}))
+    cadastrados = set()
+    reservar_consultas(math.ceil(len(documentos) / VALIDACAO_LOTE_IN))
+    for inicio in range(0, len(documentos), VALIDACAO_LOTE_IN):
+        lote = documentos[inicio:inicio + VALIDACAO_LOTE_IN]
+        cadastrados.update(await db.scalars(consultas.DOCUMENTOS_CADASTRADOS, {"documentos": lote}))
+    return cadastrados
+
+
+"""
+Validação de CPF/CNPJ em lote, sem tentativa de escrita
+- valido: dígitos verificadores conferidos de uma vez para todo o lote (validação vetorizada)
+- tipo: CPF ou CNPJ pela quantidade de dígitos; nulo quando o documento é inválido
+- cadastrado: já existe produtor com o documento (comparação pela forma normalizada)
+Os resultados seguem a ordem dos documentos enviados
+"""
+
+
+@router.post("/documentos", response_model=ValidacaoDocumentosResponse)
+async def validar_documentos(requisicao: ValidacaoDocumentosRequest, db: AsyncSession = Depends(get_db_leitura)):
+    documentos = requisicao.documentos
+    if len(documentos) > VALIDACAO_MAX_DOCUMENTOS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"O lote excede o limite de {VALIDACAO_MAX_DOCUMENTOS} documentos; divida a requisição"
+        )
+
+    validos, quantidade = analisar_lote(documentos)
+    validos = validos.tolist()
+    normalizados = [normalizar_documento(doc) if valido else None for doc, valido in zip(documentos, validos)]
+    cadastrados = await documentos_cadastrados(db, sorted({doc for doc in normalizados if doc}))
+
+    # Dicionários simples: o response_model valida a lista de uma vez, sem instanciar um modelo por documento
+    resultados = [
+        {
+            "documento": doc,
+            "valido": valido,
+            "tipo": TIPOS[digitos] if valido else None,
+            "cadastrado": normalizado in cadastrados
+        }
+        for doc, valido, digitos, normalizado in zip(documentos, validos, quantidade.tolist(), normalizados)
+    ]
+    return {
+        "total": len(resultados),
+        "validos": sum(validos),
+        "cadastrados": sum(resultado["cadastrado"] for resultado in resultados),
+        "resultados": resultados
+    }
@@ -0,0 +1,45 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Union
+
+
+class HistogramaEspera(BaseModel):
+    buckets: Dict[str, int]
+    soma: float
+    contagem: int
+
+
+class MetricasPool(BaseModel):
+    tamanho: int
+    em_uso: int
+    ociosas: int
+    overflow: int
+    max_overflow: int
+    timeout: float
+    checkouts: int
+    timeouts: int
+    espera_segundos: HistogramaEspera
+
+
+class CacheCompilacao(BaseModel):
+    entradas: int
+    capacidade: int
+
+
+class MetricasCacheSql(BaseModel):
+    contagens: Dict[str, int]
+    hit_rate: float
+    cache: CacheCompilacao
+
+
+class ConsultaLenta(BaseModel):
+    time: str
+    request_id: Optional[str]
+    method: Optional[str]
+    route: Optional[str]
+    duration_ms: float
+    sql: str
+    parametros: Union[List[str], Dict[str, str]]
+    lote: Optional[int]
+    explain: str
+    plano: Optional[List[str]]
+    erro: Optional[str] = None
@@ -18,4 +18,6 @@ class ProdutorUpdate(BaseModel):
 
 class ProdutorRead(ProdutorBase):
     id: int
+    documento: str
+    version: int
     model_config = ConfigDict(from_attributes=True)
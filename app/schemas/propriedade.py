@@ -53,4 +53,11 @@ class PropriedadeUpdate(BaseModel):
 
 class PropriedadeRead(PropriedadeBase):
     id: int
+    version: int
     model_config = ConfigDict(from_attributes=True)
+
+
+class ResultadoUpsert(BaseModel):
+    inseridos: int
+    atualizados: int
+    inalterados: int
@@ -35,3 +35,7 @@ class PropriedadeSafraCulturaDetail(BaseModel):
     cultura_id: int
     cultura_nome: str
     model_config = ConfigDict(from_attributes=True)
+
+
+class RemocaoEmLote(BaseModel):
+    removidos: int
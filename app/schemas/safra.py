@@ -27,4 +27,5 @@ class SafraUpdate(BaseModel):
 
 class SafraRead(SafraBase):
     id: int
+    arquivada: bool = False
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, constr
+from typing import List, Optional
+
+# Caracteres por documento enviado (o CNPJ formatado tem 18); itens maiores respondem 422
+TAMANHO_MAXIMO_DOCUMENTO = 32
+
+
+class ValidacaoDocumentosRequest(BaseModel):
+    documentos: List[constr(max_length=TAMANHO_MAXIMO_DOCUMENTO)]
+
+
+class ResultadoDocumento(BaseModel):
+    documento: str
+    valido: bool
+    tipo: Optional[str] = None
+    cadastrado: bool
+
+
+class ValidacaoDocumentosResponse(BaseModel):
+    total: int
+    validos: int
+    cadastrados: int
+    resultados: List[ResultadoDocumento]
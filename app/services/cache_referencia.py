@@ -0,0 +1,117 @@
+import os
+import time
+from typing import Dict, Iterable, Optional, Set
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import VersaoReferencia, consultas
+
+"""
+Cache local (por processo) dos dados de referência: safras e culturas
+- Carregado na inicialização da API e recarregado quando a versão no banco muda
+- Escritas em safras/culturas incrementam versoes_referencia na mesma transação;
+  os demais workers percebem a mudança ao conferir a versão a cada CACHE_REFERENCIA_INTERVALO_S
+- Um id ausente força uma recarga antes de ser tratado como inexistente (ex.: safra recém-criada
+  em outro worker), limitada a uma por CACHE_REFERENCIA_RECARGA_MINIMA_S
+- Alterações feitas fora da API (seeds, SQL manual) aparecem em até CACHE_REFERENCIA_TTL_S
+"""
+
+CACHE_REFERENCIA_INTERVALO_S = float(os.getenv("CACHE_REFERENCIA_INTERVALO_S", "5"))
+CACHE_REFERENCIA_TTL_S = float(os.getenv("CACHE_REFERENCIA_TTL_S", "300"))
+CACHE_REFERENCIA_RECARGA_MINIMA_S = float(os.getenv("CACHE_REFERENCIA_RECARGA_MINIMA_S", "1"))
+
+VERSAO_REFERENCIAS = "referencias"
+
+
+class CacheReferencia:
+    def __init__(self, intervalo_s: float = CACHE_REFERENCIA_INTERVALO_S, ttl_s: float = CACHE_REFERENCIA_TTL_S,
+                 recarga_minima_s: float = CACHE_REFERENCIA_RECARGA_MINIMA_S):
+        self.intervalo = intervalo_s
+        self.ttl = ttl_s
+        self.recarga_minima = recarga_minima_s
+        self.safras: Dict[int, int] = {}
+        self.safras_por_ano: Dict[int, int] = {}
+        self.safras_arquivadas: Set[int] = set()
+        self.culturas: Dict[int, str] = {}
+        self.versao: Optional[int] = None
+        self.carregado = False
+        self._carregado_em = 0.0
+        self._verificado_em = 0.0
+        # Consultas por id e quantas foram respondidas sem recarga forçada (hit ratio em /metrics)
+        self.consultas = 0
+        self.acertos = 0
+
+    async def carregar(self, db: AsyncSession):
+        versao = await self._versao_banco(db)
+        linhas_safras = (await db.execute(consultas.SAFRAS_REFERENCIA)).all()
+        safras = {safra_id: ano for safra_id, ano, _ in linhas_safras}
+        culturas = dict((await db.execute(consultas.CULTURAS_REFERENCIA)).all())
+
+        # Dicionários novos substituem os antigos de uma vez: leitores nunca veem um estado parcial
+        self.safras = safras
+        self.safras_por_ano = {ano: safra_id for safra_id, ano in safras.items()}
+        self.safras_arquivadas = {safra_id for safra_id, _, arquivada in linhas_safras if arquivada}
+        self.culturas = culturas
+        self.versao = versao
+        self.carregado = True
+        self._carregado_em = self._verificado_em = time.monotonic()
+
+    async def atualizar(self, db: AsyncSession):
+        """Recarrega se o cache estiver vazio, expirado ou com versão diferente da do banco"""
+        agora = time.monotonic()
+        if not self.carregado or agora - self._carregado_em >= self.ttl:
+            await self.carregar(db)
+        elif agora - self._verificado_em >= self.intervalo:
+            self._verificado_em = agora
+            if await self._versao_banco(db) != self.versao:
+                await self.carregar(db)
+
+    async def _recarregar_se_ausente(self, db: AsyncSession, presente) -> bool:
+        await self.atualizar(db)
+        self.consultas += 1
+        if presente():
+            self.acertos += 1
+            return True
+        if time.monotonic() - self._carregado_em < self.recarga_minima:
+            return False
+        await self.carregar(db)
+        return presente()
+
+    async def garantir(self, db: AsyncSession, safra_ids: Iterable[int] = (), cultura_ids: Iterable[int] = ()) -> bool:
+        """Indica se todas as safras e culturas informadas existem"""
+        safra_ids, cultura_ids = set(safra_ids), set(cultura_ids)
+        return await self._recarregar_se_ausente(
+            db, lambda: safra_ids <= self.safras.keys() and cultura_ids <= self.culturas.keys()
+        )
+
+    async def safra_existe(self, db: AsyncSession, safra_id: int) -> bool:
+        return await self.garantir(db, safra_ids=[safra_id])
+
+    async def cultura_existe(self, db: AsyncSession, cultura_id: int) -> bool:
+        return await self.garantir(db, cultura_ids=[cultura_id])
+
+    async def safra_id_por_ano(self, db: AsyncSession, ano: int) -> Optional[int]:
+        await self._recarregar_se_ausente(db, lambda: ano in self.safras_por_ano)
+        return self.safras_por_ano.get(ano)
+
+    def safra_arquivada(self, safra_id: int) -> bool:
+        """Safra cujas associações estão no arquivo; consultar após safra_existe/garantir"""
+        return safra_id in self.safras_arquivadas
+
+    async def registrar_alteracao(self, db: AsyncSession):
+        """Incrementa a versão no banco; chamar na transação que altera safras ou culturas, antes do commit"""
+        result = await db.execute(
+            update(VersaoReferencia).where(VersaoReferencia.nome == VERSAO_REFERENCIAS)
+            .values(versao=VersaoReferencia.versao + 1)
+        )
+        if result.rowcount == 0:
+            await db.execute(insert(VersaoReferencia).values(nome=VERSAO_REFERENCIAS, versao=1))
+
+    def invalidar(self):
+        """Descarta o cache deste processo; a próxima consulta o recarrega"""
+        self.carregado = False
+
+    async def _versao_banco(self, db: AsyncSession) -> Optional[int]:
+        return await db.scalar(consultas.VERSAO_REFERENCIA, {"nome": VERSAO_REFERENCIAS})
+
+
+cache_referencia = CacheReferencia()
@@ -0,0 +1,31 @@
+from typing import Optional
+from fastapi import HTTPException, Response
+
+"""
+Controle de concorrência otimista
+- A coluna version (version_id_col) de cada linha é exposta como ETag
+- O cliente reenvia o valor em If-Match no PUT; versão divergente resulta em 409
+"""
+
+
+def versao_if_match(if_match: Optional[str]) -> Optional[int]:
+    if if_match is None or if_match.strip() == "*":
+        return None
+    valor = if_match.strip()
+    if valor.startswith("W/"):
+        valor = valor[2:]
+    try:
+        return int(valor.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cabeçalho If-Match inválido")
+
+
+def definir_etag(response: Response, versao: int):
+    response.headers["ETag"] = f'"{versao}"'
+
+
+def erro_conflito_versao() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="Registro alterado por outra requisição; recarregue e tente novamente"
+    )
@@ -0,0 +1,161 @@
+import asyncio
+import contextvars
+import os
+from typing import Callable, List, Tuple
+from fastapi import HTTPException
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import PropriedadeSafraCultura, Propriedade
+from app.schemas.propriedade_safra_cultura import PropriedadeSafraCulturaCreate, PropriedadeSafraCulturaRead
+from app.services.cache_referencia import cache_referencia
+from app.utils.logger import log_error
+
+"""
+Escrita agrupada (group commit) para associações Propriedade-Safra-Cultura
+- Requisições de criação entram em uma fila asyncio e aguardam por até PSC_JANELA_MS milissegundos
+- Cada lote (até PSC_LOTE_MAXIMO itens) é validado com poucas queries e gravado
+  em um único INSERT multi-linha, com um único commit
+- Cada requisição recebe seu próprio resultado ou erro
+"""
+
+PSC_AGRUPAR_ESCRITAS = os.getenv("PSC_AGRUPAR_ESCRITAS", "false").lower() in ("1", "true", "yes")
+PSC_JANELA_MS = float(os.getenv("PSC_JANELA_MS", "5"))
+PSC_LOTE_MAXIMO = int(os.getenv("PSC_LOTE_MAXIMO", "500"))
+
+ItemFila = Tuple[PropriedadeSafraCulturaCreate, asyncio.Future]
+
+
+def _resolver(futuro: asyncio.Future, resultado=None, erro: Exception = None):
+    # A requisição pode ter sido cancelada (cliente desconectou) enquanto aguardava o lote
+    if futuro.done():
+        return
+    if erro is not None:
+        futuro.set_exception(erro)
+    else:
+        futuro.set_result(resultado)
+
+
+class AgrupadorEscritas:
+    def __init__(self, session_factory: Callable[[], AsyncSession], janela_ms: float = PSC_JANELA_MS,
+                 lote_maximo: int = PSC_LOTE_MAXIMO):
+        self.session_factory = session_factory
+        self.janela = janela_ms / 1000
+        self.lote_maximo = lote_maximo
+        self._loop = None
+        self._fila: "asyncio.Queue[ItemFila]" = None
+        self._tarefa: asyncio.Task = None
+
+    async def submeter(self, psc: PropriedadeSafraCulturaCreate) -> PropriedadeSafraCulturaRead:
+        """Enfileira a criação e aguarda até o lote correspondente ser gravado"""
+        self._iniciar()
+        futuro = self._loop.create_future()
+        self._fila.put_nowait((psc, futuro))
+        return await futuro
+
+    def _iniciar(self):
+        # Uma tarefa de escrita por event loop (um por worker do uvicorn)
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tarefa is not None and not self._tarefa.done():
+            return
+        self._loop = loop
+        self._fila = asyncio.Queue()
+        # Contexto vazio: a tarefa não herda o orçamento de consultas da requisição que a iniciou
+        self._tarefa = contextvars.Context().run(loop.create_task, self._executar())
+
+    async def _executar(self):
+        while True:
+            lote = [await self._fila.get()]
+            prazo = self._loop.time() + self.janela
+            while len(lote) < self.lote_maximo:
+                restante = prazo - self._loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._gravar_lote(lote)
+            except Exception as e:
+                log_error(e, "Escrita agrupada de associações")
+                for _, futuro in lote:
+                    _resolver(futuro, erro=e)
+
+    async def _gravar_lote(self, lote: List[ItemFila]):
+        async with self.session_factory() as db:
+            validos = await self._validar_lote(db, lote)
+            if not validos:
+                return
+            try:
+                criados = (await db.scalars(
+                    insert(PropriedadeSafraCultura).returning(
+                        PropriedadeSafraCultura, sort_by_parameter_order=True
+                    ),
+                    [psc.model_dump() for psc, _ in validos]
+                )).all()
+                resultados = [PropriedadeSafraCulturaRead.model_validate(obj) for obj in criados]
+                await db.commit()
+            except IntegrityError:
+                # Corrida com outra escrita (ex.: entidade removida); grava item a item
+                await db.rollback()
+                await self._gravar_individualmente(db, validos)
+                return
+            for (_, futuro), resultado in zip(validos, resultados):
+                _resolver(futuro, resultado)
+
+    async def _validar_lote(self, db: AsyncSession, lote: List[ItemFila]) -> List[ItemFila]:
+        """Aplica as mesmas validações da criação individual; safras e culturas vêm do cache de referência"""
+        propriedades = set(await db.scalars(
+            select(Propriedade.id).where(Propriedade.id.in_({psc.propriedade_id for psc, _ in lote}))
+        ))
+        await cache_referencia.garantir(db, {psc.safra_id for psc, _ in lote}, {psc.cultura_id for psc, _ in lote})
+        safras = cache_referencia.safras
+        culturas = cache_referencia.culturas
+
+        chaves = {(psc.propriedade_id, psc.safra_id, psc.cultura_id) for psc, _ in lote}
+        existentes = {tuple(linha) for linha in await db.execute(
+            select(
+                PropriedadeSafraCultura.propriedade_id,
+                PropriedadeSafraCultura.safra_id,
+                PropriedadeSafraCultura.cultura_id
+            ).where(tuple_(
+                PropriedadeSafraCultura.propriedade_id,
+                PropriedadeSafraCultura.safra_id,
+                PropriedadeSafraCultura.cultura_id
+            ).in_(chaves))
+        )}
+
+        validos = []
+        for psc, futuro in lote:
+            chave = (psc.propriedade_id, psc.safra_id, psc.cultura_id)
+            if psc.propriedade_id not in propriedades:
+                _resolver(futuro, erro=HTTPException(status_code=404, detail="Propriedade não encontrada"))
+            elif psc.safra_id not in safras:
+                _resolver(futuro, erro=HTTPException(status_code=404, detail="Safra não encontrada"))
+            elif cache_referencia.safra_arquivada(psc.safra_id):
+                _resolver(futuro, erro=HTTPException(
+                    status_code=400, detail="Safra arquivada não aceita novas associações"
+                ))
+            elif psc.cultura_id not in culturas:
+                _resolver(futuro, erro=HTTPException(status_code=404, detail="Cultura não encontrada"))
+            elif chave in existentes:
+                _resolver(futuro, erro=HTTPException(status_code=400, detail="Esta associação já existe"))
+            else:
+                # Duplicatas dentro do próprio lote também são rejeitadas
+                existentes.add(chave)
+                validos.append((psc, futuro))
+        return validos
+
+    async def _gravar_individualmente(self, db: AsyncSession, itens: List[ItemFila]):
+        for psc, futuro in itens:
+            try:
+                db_psc = PropriedadeSafraCultura(**psc.model_dump())
+                db.add(db_psc)
+                await db.flush()
+                resultado = PropriedadeSafraCulturaRead.model_validate(db_psc)
+                await db.commit()
+                _resolver(futuro, resultado)
+            except IntegrityError:
+                await db.rollback()
+                _resolver(futuro, erro=HTTPException(status_code=400, detail="Erro ao criar associação"))
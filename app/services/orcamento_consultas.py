@@ -0,0 +1,161 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+"""
+Orçamento de consultas por requisição
+- Tempo máximo por statement: SET LOCAL statement_timeout no Postgres; progress handler no SQLite
+- Quantidade máxima de consultas por requisição (503 ao exceder) e de linhas nas listagens (413 ao exceder):
+  opcionais, desativadas com o padrão 0
+- Ativar DB_MAX_CONSULTAS/DB_MAX_LINHAS muda o contrato da API: requisições que antes respondiam 200 passam a
+  responder 503/413 acima dos limites
+- Os limites padrão vêm do ambiente e podem ser alterados por rota/router com orcamento_rota
+- Rotas em lote (upsert, remoção em lote) usam DB_STATEMENT_TIMEOUT_LOTE_MS por statement e ampliam o limite de
+  consultas com reservar_consultas, um statement por lote: o total cresce com o envio, não com N+1
+"""
+
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+# 0 desativa o limite
+DB_MAX_CONSULTAS = int(os.getenv("DB_MAX_CONSULTAS", "0"))
+DB_MAX_LINHAS = int(os.getenv("DB_MAX_LINHAS", "0"))
+DB_STATEMENT_TIMEOUT_LOTE_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_LOTE_MS", "30000"))
+
+# Instruções da VM do SQLite entre chamadas do progress handler
+INTERVALO_PROGRESSO_SQLITE = 1000
+CHAVE_PRAZO_SQLITE = "orcamento_prazo"
+
+
+class Orcamento:
+    def __init__(self, timeout_ms: Optional[int] = None, max_consultas: Optional[int] = None,
+                 max_linhas: Optional[int] = None):
+        self.timeout_ms = DB_STATEMENT_TIMEOUT_MS if timeout_ms is None else timeout_ms
+        self.max_consultas = DB_MAX_CONSULTAS if max_consultas is None else max_consultas
+        self.max_linhas = DB_MAX_LINHAS if max_linhas is None else max_linhas
+        self.consultas = 0
+
+
+_orcamento_atual: ContextVar[Optional[Orcamento]] = ContextVar("orcamento_consultas", default=None)
+
+
+def orcamento_atual() -> Optional[Orcamento]:
+    return _orcamento_atual.get()
+
+
+def iniciar_orcamento(request: Optional[Request] = None) -> Orcamento:
+    """Inicia o orçamento da requisição com os limites definidos pela rota (orcamento_rota) ou os padrões"""
+    limites = getattr(request.state, "limites_orcamento", {}) if request is not None else {}
+    orcamento = Orcamento(**limites)
+    _orcamento_atual.set(orcamento)
+    return orcamento
+
+
+def orcamento_rota(timeout_ms: Optional[int] = None, max_consultas: Optional[int] = None,
+                   max_linhas: Optional[int] = None):
+    """Dependência para limites específicos: APIRouter(..., dependencies=[Depends(orcamento_rota(...))])"""
+
+    async def definir_limites(request: Request):
+        request.state.limites_orcamento = {
+            "timeout_ms": timeout_ms, "max_consultas": max_consultas, "max_linhas": max_linhas
+        }
+
+    return definir_limites
+
+
+def reservar_consultas(quantidade: int):
+    """Amplia o limite de consultas da requisição com os statements previstos pelo tamanho do lote"""
+    orcamento = orcamento_atual()
+    if orcamento is not None and orcamento.max_consultas > 0:
+        orcamento.max_consultas += quantidade
+
+
+"""
+Limite de linhas das listagens
+- A consulta busca uma linha além do limite apenas para detectar o excesso
+"""
+
+
+def limitar_linhas(query):
+    orcamento = orcamento_atual()
+    return query if orcamento is None or orcamento.max_linhas <= 0 else query.limit(orcamento.max_linhas + 1)
+
+
+def conferir_linhas(linhas: List) -> List:
+    orcamento = orcamento_atual()
+    if orcamento is not None and 0 < orcamento.max_linhas < len(linhas):
+        raise HTTPException(
+            status_code=413,
+            detail=f"O resultado excede o limite de {orcamento.max_linhas} linhas; refine os filtros"
+        )
+    return linhas
+
+
+"""
+Eventos do SQLAlchemy
+- Sem orçamento ativo (Alembic, seeds, tarefas em segundo plano) nenhum limite é aplicado
+"""
+
+
+@event.listens_for(Engine, "connect")
+def instalar_progress_handler_sqlite(dbapi_connection, connection_record):
+    if "sqlite" not in type(dbapi_connection).__module__:
+        return
+    # O handler roda na thread do driver (aiosqlite), por isso o prazo fica no registro da conexão
+    estado = connection_record.info[CHAVE_PRAZO_SQLITE] = {"prazo": None}
+
+    def interromper_se_expirado():
+        prazo = estado["prazo"]
+        return 1 if prazo is not None and time.monotonic() > prazo else 0
+
+    if hasattr(dbapi_connection, "run_async"):
+        dbapi_connection.run_async(
+            lambda conexao: conexao.set_progress_handler(interromper_se_expirado, INTERVALO_PROGRESSO_SQLITE)
+        )
+    else:
+        dbapi_connection.set_progress_handler(interromper_se_expirado, INTERVALO_PROGRESSO_SQLITE)
+
+
+@event.listens_for(Session, "after_begin")
+def aplicar_statement_timeout(session, transaction, connection):
+    orcamento = orcamento_atual()
+    if orcamento is not None and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {int(orcamento.timeout_ms)}",
+            execution_options={"fora_do_orcamento": True}
+        )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def contar_consulta(conn, cursor, statement, parameters, context, executemany):
+    orcamento = orcamento_atual()
+    if orcamento is None or (context is not None and context.execution_options.get("fora_do_orcamento")):
+        return
+    orcamento.consultas += 1
+    if 0 < orcamento.max_consultas < orcamento.consultas:
+        raise HTTPException(status_code=503, detail="Limite de consultas por requisição excedido")
+    estado = conn.info.get(CHAVE_PRAZO_SQLITE)
+    if estado is not None:
+        estado["prazo"] = time.monotonic() + orcamento.timeout_ms / 1000
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def encerrar_prazo(conn, cursor, statement, parameters, context, executemany):
+    estado = conn.info.get(CHAVE_PRAZO_SQLITE)
+    if estado is not None:
+        estado["prazo"] = None
+
+
+@event.listens_for(Engine, "handle_error")
+def tratar_tempo_esgotado(contexto):
+    if contexto.connection is not None and not contexto.connection.closed:
+        encerrar_prazo(contexto.connection, None, None, None, None, False)
+    if orcamento_atual() is None:
+        return
+    erro = contexto.original_exception
+    # 57014 = query_canceled (statement_timeout); "interrupted" = progress handler do SQLite
+    if "57014" in (getattr(erro, "sqlstate", None), getattr(erro, "pgcode", None)) or str(erro) == "interrupted":
+        raise HTTPException(status_code=503, detail="Tempo limite da consulta excedido")
@@ -0,0 +1,34 @@
+import os
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+"""
+Particionamento opcional de propriedade_safra_cultura por safra (Postgres)
+- Com PSC_PARTICIONADA=true, a migração f3b81d5c20e7 converte a tabela em particionada
+  por LIST (safra_id), com uma partição por safra e uma partição DEFAULT
+- Cada nova safra ganha sua partição na mesma transação do cadastro
+- Consultas por ano devem resolver o ano para safra_id antes de filtrar a tabela de associações:
+  o Postgres só descarta partições (partition pruning) com filtro direto na chave de partição
+"""
+
+PSC_PARTICIONADA = os.getenv("PSC_PARTICIONADA", "false").lower() in ("1", "true", "yes")
+
+TABELA_PARTICIONADA = "propriedade_safra_cultura"
+
+
+def nome_particao(safra_id: int) -> str:
+    return f"{TABELA_PARTICIONADA}_s{int(safra_id)}"
+
+
+def sql_criar_particao(safra_id: int) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {nome_particao(safra_id)} "
+        f"PARTITION OF {TABELA_PARTICIONADA} FOR VALUES IN ({int(safra_id)})"
+    )
+
+
+async def criar_particao_safra(db: AsyncSession, safra_id: int):
+    """Cria a partição da safra; sem efeito fora do Postgres ou com o particionamento desativado"""
+    if not PSC_PARTICIONADA or db.get_bind().dialect.name != "postgresql":
+        return
+    await db.execute(text(sql_criar_particao(safra_id)))
@@ -1,4 +1,18 @@
 import re
+from typing import Iterable, Tuple
+import numpy as np
+
+NAO_DIGITOS = re.compile(r'[^0-9]')
+
+
+"""
+Forma canônica de CPF/CNPJ: somente dígitos (ex.: "529.982.247-25" -> "52998224725")
+"""
+
+
+def normalizar_documento(valor: str) -> str:
+    return NAO_DIGITOS.sub('', valor)
+
 
 """
 Validador de CPF
@@ -6,7 +20,10 @@ Validador de CPF
 
 
 def validar_cpf(cpf: str) -> bool:
-    cpf = re.sub(r'[^0-9]', '', cpf)
+    return _validar_cpf_digitos(NAO_DIGITOS.sub('', cpf))
+
+
+def _validar_cpf_digitos(cpf: str) -> bool:
     if len(cpf) != 11 or cpf == cpf[0] * 11:
         return False
     soma = sum(int(cpf[i]) * (10 - i) for i in range(9))
@@ -22,7 +39,10 @@ Validador de CNPJ
 
 
 def validar_cnpj(cnpj: str) -> bool:
-    cnpj = re.sub(r'[^0-9]', '', cnpj)
+    return _validar_cnpj_digitos(NAO_DIGITOS.sub('', cnpj))
+
+
+def _validar_cnpj_digitos(cnpj: str) -> bool:
     if len(cnpj) != 14 or cnpj == cnpj[0] * 14:
         return False
     pesos1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
@@ -38,8 +58,87 @@ def validar_cnpj(cnpj: str) -> bool:
 
 """
 Validador de CPF ou CNPJ
+- A quantidade de dígitos decide o tipo: apenas um dos validadores é executado
 """
 
 
 def validar_cpf_cnpj(valor: str) -> bool:
-    return validar_cpf(valor) or validar_cnpj(valor)
+    digitos = NAO_DIGITOS.sub('', valor)
+    if len(digitos) == 11:
+        return _validar_cpf_digitos(digitos)
+    if len(digitos) == 14:
+        return _validar_cnpj_digitos(digitos)
+    return False
+
+
+"""
+Validação vetorizada de CPF/CNPJ em lote (cargas de produtores, auditorias)
+- Mesmo resultado de validar_cpf_cnpj para cada documento, devolvido como array booleano
+- Os documentos viram uma matriz de códigos de caractere; o tipo é decidido pela quantidade de dígitos
+  de cada linha (11: CPF, 14: CNPJ, demais: inválido) antes de qualquer cálculo
+- Os dígitos verificadores de todas as linhas de um tipo saem de produtos escalares com os pesos de cada posição
+- A matriz tem a largura do maior texto: acima de TAMANHO_MAXIMO_FORMATADO caracteres (CNPJ formatado) o documento
+  entra apenas com os seus primeiros 15 dígitos, o que preserva o resultado (11 ou 14 dígitos seguem iguais; 15 ou
+  mais continuam inválidos) sem que um texto enorme multiplique a memória do lote inteiro
+"""
+
+TAMANHO_MAXIMO_FORMATADO = 18
+
+PESOS_CPF_1 = np.arange(10, 1, -1)
+PESOS_CPF_2 = np.arange(11, 1, -1)
+PESOS_CNPJ_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+PESOS_CNPJ_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+def _limitado(doc: str) -> str:
+    return doc if len(doc) <= TAMANHO_MAXIMO_FORMATADO else NAO_DIGITOS.sub('', doc)[:15]
+
+
+def _codigos(docs: Iterable[str]):
+    """Matriz de códigos de caractere (uma linha por documento), máscara de dígitos e quantidade de dígitos"""
+    docs = np.asarray(list(docs), dtype=str)
+    largura = max(docs.dtype.itemsize // 4, 1)
+    codigos = docs.reshape(-1).view(np.uint32).reshape(-1, largura)
+    eh_digito = (codigos >= ord('0')) & (codigos <= ord('9'))
+    return codigos, eh_digito, eh_digito.sum(axis=1)
+
+
+def _digitos(codigos, eh_digito, linhas, tamanho: int):
+    # A máscara percorre as linhas em ordem; com exatamente `tamanho` dígitos por linha, o reshape remonta a matriz
+    return (codigos[linhas][eh_digito[linhas]] - ord('0')).astype(np.int64).reshape(-1, tamanho)
+
+
+def _verificador_cpf(soma):
+    return ((soma * 10) % 11) % 10
+
+
+def _verificador_cnpj(soma):
+    digito = 11 - soma % 11
+    return np.where(digito < 10, digito, 0)
+
+
+def analisar_lote(docs: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Validade e quantidade de dígitos de cada documento (11: CPF, 14: CNPJ; limitada a 15 nos textos longos)"""
+    codigos, eh_digito, quantidade = _codigos(_limitado(doc) for doc in docs)
+    validos = np.zeros(len(codigos), dtype=bool)
+
+    linhas = quantidade == 11
+    cpf = _digitos(codigos, eh_digito, linhas, 11)
+    validos[linhas] = (
+        (cpf != cpf[:, :1]).any(axis=1)
+        & (_verificador_cpf(cpf[:, :9] @ PESOS_CPF_1) == cpf[:, 9])
+        & (_verificador_cpf(cpf[:, :10] @ PESOS_CPF_2) == cpf[:, 10])
+    )
+
+    linhas = quantidade == 14
+    cnpj = _digitos(codigos, eh_digito, linhas, 14)
+    validos[linhas] = (
+        (cnpj != cnpj[:, :1]).any(axis=1)
+        & (_verificador_cnpj(cnpj[:, :12] @ PESOS_CNPJ_1) == cnpj[:, 12])
+        & (_verificador_cnpj(cnpj[:, :13] @ PESOS_CNPJ_2) == cnpj[:, 13])
+    )
+    return validos, quantidade
+
+
+def validar_lote(docs: Iterable[str]) -> np.ndarray:
+    return analisar_lote(docs)[0]
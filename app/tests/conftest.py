@@ -1,52 +1,94 @@
 import pytest
+from fastapi import Request
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.models.database import Base
+from app.models import database
+from app.models.database import Base, get_db, get_db_leitura
 from app.models import ProdutorRural, Propriedade, Safra, Cultura, PropriedadeSafraCultura
-# Importar todos os get_db das rotas
-from app.routes.produtor import get_db as get_db_produtor
-from app.routes.propriedade import get_db as get_db_propriedade
-from app.routes.safra import get_db as get_db_safra
-from app.routes.cultura import get_db as get_db_cultura
-from app.routes.propriedade_safra_cultura import get_db as get_db_assoc
-from app.routes.dashboard import get_db as get_db_dashboard
+from app.services.cache_referencia import cache_referencia
+from app.services.orcamento_consultas import iniciar_orcamento
+from app.utils.instrumentacao_sql import ler_server_timing
 
 
-# Configuração do banco de teste em memória para isolamento
+# Banco SQLite em arquivo temporário por teste: as fixtures usam a engine síncrona
+# e as rotas a engine assíncrona (aiosqlite), ambas apontando para o mesmo arquivo
 @pytest.fixture(scope="function")
-def db_session():
-    """Cria uma sessão de teste isolada, usando a mesma conexão para todo o teste."""
-    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
-    connection = engine.connect()
-    Base.metadata.create_all(bind=connection)
-    TransactionSession = sessionmaker(autocommit=False, autoflush=False, bind=connection)
-    session = TransactionSession()
+def db_path(tmp_path):
+    return tmp_path / "test.db"
+
+
+@pytest.fixture(scope="function")
+def db_session(db_path):
+    """Cria uma sessão síncrona de teste isolada para preparar e conferir dados."""
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    TestSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = TestSession()
     yield session
     session.close()
-    connection.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def async_session_factory(db_session, db_path):
+    """Fábrica de sessões assíncronas sobre o mesmo banco de teste."""
+    # NullPool: o TestClient pode usar um event loop diferente a cada requisição
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    # O cache de referência é global ao processo: descarta o conteúdo do banco do teste anterior
+    cache_referencia.invalidar()
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture
-def client(db_session):
-    """Cria um cliente de teste com banco isolado e conexão fixa."""
-
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-
-    app.dependency_overrides[get_db_produtor] = override_get_db
-    app.dependency_overrides[get_db_propriedade] = override_get_db
-    app.dependency_overrides[get_db_safra] = override_get_db
-    app.dependency_overrides[get_db_cultura] = override_get_db
-    app.dependency_overrides[get_db_assoc] = override_get_db
-    app.dependency_overrides[get_db_dashboard] = override_get_db
+def client(async_session_factory):
+    """Cria um cliente de teste com banco isolado."""
+
+    async def override_get_db(request: Request):
+        iniciar_orcamento(request)
+        async with async_session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_leitura] = override_get_db
     return TestClient(app)
 
 
+@pytest.fixture
+def client_replica(async_session_factory, tmp_path, monkeypatch):
+    """Cliente com primário e réplica em arquivos distintos (a réplica não recebe as escritas)."""
+    caminho_replica = tmp_path / "replica.db"
+    engine = create_engine(f"sqlite:///{caminho_replica}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    engine_replica = create_async_engine(f"sqlite+aiosqlite:///{caminho_replica}", poolclass=NullPool)
+
+    monkeypatch.setattr(app, "dependency_overrides", {})
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_session_factory)
+    monkeypatch.setattr(database, "AsyncSessionLeitura", async_sessionmaker(
+        engine_replica, autoflush=False, expire_on_commit=False
+    ))
+    return TestClient(app)
+
+
+@pytest.fixture
+def orcamento_sql():
+    """Confere o orçamento de consultas de uma resposta (cabeçalho Server-Timing): orcamento_sql(response, 3)"""
+
+    def conferir(response, max_consultas: int) -> int:
+        consultas = int(ler_server_timing(response.headers["Server-Timing"])["db-consultas"])
+        assert consultas <= max_consultas, (
+            f"{response.request.method} {response.request.url.path}: {consultas} consultas "
+            f"(orçamento: {max_consultas})"
+        )
+        return consultas
+
+    return conferir
+
+
 # Dados mockados para testes
 @pytest.fixture
 def mock_produtor_data():
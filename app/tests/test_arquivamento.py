@@ -0,0 +1,95 @@
+import asyncio
+from app.models import PropriedadeSafraCultura, PropriedadeSafraCulturaArquivo, ResumoSafraCultura
+from app.services.cache_referencia import cache_referencia
+from app.utils.arquivamento import arquivar_safra, restaurar_safra
+
+"""
+Testes para o arquivamento de safras encerradas
+"""
+
+
+def executar(async_session_factory, operacao, safra_id):
+    async def cenario():
+        async with async_session_factory() as db:
+            movidas = await operacao(db, safra_id, lote=1)
+            await cache_referencia.registrar_alteracao(db)
+            await db.commit()
+        return movidas
+
+    movidas = asyncio.run(cenario())
+    # Equivale ao worker perceber a nova versão dos dados de referência
+    cache_referencia.invalidar()
+    return movidas
+
+
+class TestArquivamento:
+    """
+    Testa que a safra arquivada sai da tabela principal e continua visível pelo arquivo e pelos resumos
+    """
+
+    def test_arquivar_safra(self, client, db_session, async_session_factory, sample_associacao, sample_safra):
+        assert executar(async_session_factory, arquivar_safra, sample_safra.id) == 1
+
+        assert db_session.query(PropriedadeSafraCultura).count() == 0
+        assert db_session.query(PropriedadeSafraCulturaArquivo).count() == 1
+        resumo = db_session.query(ResumoSafraCultura).one()
+        assert (resumo.cultura_id, resumo.quantidade) == (sample_associacao.cultura_id, 1)
+
+        # Dashboard: totais e gráfico da safra vêm dos resumos
+        assert client.get("/dashboard/grafico-culturas").json()[0]["quantidade"] == 1
+        por_ano = client.get(f"/dashboard/grafico-culturas?ano={sample_safra.ano}").json()
+        assert [(item["cultura"], item["quantidade"]) for item in por_ano] == [("Milho", 1)]
+
+        # Listagem da safra vem do arquivo; sem filtro, apenas safras em aberto
+        listagem = client.get(f"/propriedade-safra-cultura/?ano={sample_safra.ano}").json()
+        assert [item["id"] for item in listagem] == [sample_associacao.id]
+        assert client.get("/propriedade-safra-cultura/").json() == []
+
+        assert client.get(f"/safras/{sample_safra.id}").json()["arquivada"] is True
+
+    """
+    Testa que a safra arquivada não recebe novas associações
+    """
+
+    def test_safra_arquivada_recusa_associacao(self, client, async_session_factory, sample_associacao, sample_safra):
+        executar(async_session_factory, arquivar_safra, sample_safra.id)
+
+        response = client.post("/propriedade-safra-cultura/", json={
+            "propriedade_id": sample_associacao.propriedade_id,
+            "safra_id": sample_safra.id,
+            "cultura_id": sample_associacao.cultura_id
+        })
+        assert response.status_code == 400
+        assert "arquivada" in response.json()["detail"]
+
+    """
+    Testa que a restauração devolve as associações com o id original e remove os resumos
+    """
+
+    def test_restaurar_safra(self, client, db_session, async_session_factory, sample_associacao, sample_safra):
+        executar(async_session_factory, arquivar_safra, sample_safra.id)
+        assert executar(async_session_factory, restaurar_safra, sample_safra.id) == 1
+
+        db_session.expire_all()
+        assert [psc.id for psc in db_session.query(PropriedadeSafraCultura)] == [sample_associacao.id]
+        assert db_session.query(PropriedadeSafraCulturaArquivo).count() == 0
+        assert db_session.query(ResumoSafraCultura).count() == 0
+        assert client.get(f"/propriedade-safra-cultura/{sample_associacao.id}").status_code == 200
+
+    """
+    Testa a remoção de uma propriedade com associações arquivadas: o arquivo e os resumos acompanham a remoção
+    e a safra continua restaurável
+    """
+
+    def test_remover_propriedade_arquivada(self, client, db_session, async_session_factory, sample_associacao,
+                                           sample_safra):
+        executar(async_session_factory, arquivar_safra, sample_safra.id)
+
+        assert client.delete(f"/propriedades/{sample_associacao.propriedade_id}").status_code == 204
+        db_session.expire_all()
+        assert db_session.query(PropriedadeSafraCulturaArquivo).count() == 0
+        assert db_session.query(ResumoSafraCultura).count() == 0
+        assert client.get(f"/dashboard/grafico-culturas?ano={sample_safra.ano}").json() == []
+
+        assert executar(async_session_factory, restaurar_safra, sample_safra.id) == 0
+        assert client.get(f"/safras/{sample_safra.id}").json()["arquivada"] is False
@@ -0,0 +1,61 @@
+from sqlalchemy import text
+from app.utils.auditoria import auditar
+
+"""
+Testes para a auditoria de integridade do banco
+"""
+
+
+def inserir_linhas_invalidas(db_session, sample_associacao):
+    # Simula cargas feitas por fora da API: sem checagem de restrições nem de chaves estrangeiras
+    db_session.execute(text("PRAGMA foreign_keys=OFF"))
+    db_session.execute(text("PRAGMA ignore_check_constraints=ON"))
+    db_session.execute(text(
+        "INSERT INTO produtores (id, nome, cpf_cnpj, documento) "
+        "VALUES (90, 'Inválido', '123.456.789-00', '12345678900')"
+    ))
+    db_session.execute(text(
+        "INSERT INTO propriedades "
+        "(id, nome, cidade, estado, area_total, area_agricultavel, area_vegetacao, produtor_id) VALUES "
+        "(91, 'Excedida', 'Cidade', 'GO', 100, 80, 30, :produtor), (92, 'Órfã', 'Cidade', 'GO', 100, 50, 50, 999)"
+    ), {"produtor": sample_associacao.propriedade.produtor_id})
+    db_session.execute(text(
+        "INSERT INTO propriedade_safra_cultura (id, propriedade_id, safra_id, cultura_id)"
+        " VALUES (93, :propriedade, :safra, :cultura), (94, 999, :safra, :cultura)"
+    ), {"propriedade": sample_associacao.propriedade_id, "safra": sample_associacao.safra_id,
+        "cultura": sample_associacao.cultura_id})
+    db_session.commit()
+
+
+class TestAuditoria:
+    """
+    Testa que cada regra aponta os ids que a violam, com blocos menores que a tabela
+    """
+
+    def test_violacoes(self, db_session, db_path, sample_associacao):
+        inserir_linhas_invalidas(db_session, sample_associacao)
+
+        relatorio = auditar(f"sqlite:///{db_path}", lote=1, processos=1)
+        violacoes = {resultado["tabela"]: resultado["violacoes"] for resultado in relatorio["tabelas"]}
+        assert violacoes["produtores"] == {"documento_invalido": [90]}
+        assert violacoes["propriedades"] == {
+            "area_nao_positiva": [], "soma_areas_excede_total": [91], "produtor_inexistente": [92]
+        }
+        assert violacoes["propriedade_safra_cultura"] == {
+            "propriedade_inexistente": [94], "safra_inexistente": [], "cultura_inexistente": [],
+            "plantio_duplicado": [93]
+        }
+        assert relatorio["violacoes"] == 5
+        assert relatorio["linhas"] == 8
+
+    """
+    Testa a execução em paralelo (um processo por tabela) com o mesmo resultado
+    """
+
+    def test_processos(self, db_session, db_path, sample_associacao):
+        inserir_linhas_invalidas(db_session, sample_associacao)
+
+        sequencial = auditar(f"sqlite:///{db_path}", processos=1)
+        paralelo = auditar(f"sqlite:///{db_path}", processos=2)
+        assert [r["violacoes"] for r in paralelo["tabelas"]] == [r["violacoes"] for r in sequencial["tabelas"]]
+        assert paralelo["linhas_por_segundo"] > 0
@@ -0,0 +1,50 @@
+import asyncio
+from app.models import Cultura
+from app.services.cache_referencia import CacheReferencia
+
+"""
+Testes para o cache de dados de referência (safras e culturas)
+"""
+
+
+class TestCacheReferencia:
+    """
+    Testa que a alteração registrada por um worker invalida o cache de outro worker
+    """
+
+    def test_invalidacao_entre_workers(self, async_session_factory, sample_safra, sample_cultura):
+        worker_a = CacheReferencia(intervalo_s=0, recarga_minima_s=3600)
+        worker_b = CacheReferencia(intervalo_s=0, recarga_minima_s=3600)
+
+        async def cenario():
+            async with async_session_factory() as db:
+                await worker_a.carregar(db)
+                await worker_b.carregar(db)
+                assert await worker_b.safra_id_por_ano(db, sample_safra.ano) == sample_safra.id
+
+            async with async_session_factory() as db:
+                db.add(Cultura(nome="Café"))
+                await worker_a.registrar_alteracao(db)
+                await db.commit()
+
+            async with async_session_factory() as db:
+                await worker_b.atualizar(db)
+                assert "Café" in worker_b.culturas.values()
+
+        asyncio.run(cenario())
+
+    """
+    Testa associação com safra criada pela API após a carga do cache
+    """
+
+    def test_safra_nova_visivel(self, client, sample_propriedade, sample_cultura):
+        assert client.get("/dashboard/grafico-culturas?ano=2030").json() == []
+
+        safra = client.post("/safras/", json={"ano": 2030}).json()
+        response = client.post("/propriedade-safra-cultura/", json={
+            "propriedade_id": sample_propriedade.id, "safra_id": safra["id"], "cultura_id": sample_cultura.id
+        })
+        assert response.status_code == 201
+
+        response = client.get("/propriedade-safra-cultura/?ano=2030")
+        assert [item["cultura_nome"] for item in response.json()] == [sample_cultura.nome]
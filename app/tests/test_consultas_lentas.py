@@ -0,0 +1,71 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from app.routes import metricas
+from app.utils import instrumentacao_sql
+from app.utils.consultas_lentas import RegistroConsultasLentas
+
+"""
+Testes para o registro de consultas lentas
+"""
+
+
+class TestConsultasLentas:
+    """
+    Testa o registro com rota, request_id e formato dos parâmetros, e a rota administrativa
+    """
+
+    def test_registro_por_rota(self, client, sample_produtor, monkeypatch):
+        registro = RegistroConsultasLentas(limite_ms=0)
+        linhas = []
+        registro.escrever = linhas.append
+        monkeypatch.setattr(instrumentacao_sql, "consultas_lentas", registro)
+        monkeypatch.setattr(metricas, "consultas_lentas", registro)
+        monkeypatch.setattr(metricas, "ADMIN_TOKEN", "segredo")
+
+        response = client.get(f"/produtores/{sample_produtor.id}", headers={"X-Request-ID": "req-lenta"})
+        assert response.status_code == 200
+        assert json.loads(linhas[0])["request_id"] == "req-lenta"
+
+        assert client.get("/metrics/consultas-lentas").status_code == 403
+        assert client.get("/metrics/consultas-lentas", headers={"X-Admin-Token": "errado"}).status_code == 403
+        response = client.get("/metrics/consultas-lentas", headers={"X-Admin-Token": "segredo"})
+        assert response.status_code == 200
+        consulta = response.json()[0]
+        assert consulta["route"] == "/produtores/{produtor_id}"
+        assert consulta["method"] == "GET"
+        assert consulta["sql"].startswith("SELECT") and "FROM produtores" in consulta["sql"]
+        # Apenas o formato: o id consultado não aparece no registro
+        assert consulta["parametros"][0] == "int"
+        assert str(sample_produtor.id) not in json.dumps(consulta["parametros"])
+
+        response = client.get("/metrics/consultas-lentas?rota=/dashboard/", headers={"X-Admin-Token": "segredo"})
+        assert response.json() == []
+
+    """
+    Testa o EXPLAIN em segundo plano (um por statement no intervalo) e a linha gravada com o plano
+    """
+
+    def test_explain(self, async_session_factory, sample_produtor):
+        engine = async_session_factory.kw["bind"].sync_engine
+        conn = SimpleNamespace(engine=engine)
+        consultas = SimpleNamespace(request=None, request_id="req-1")
+        statement = "SELECT id, nome FROM produtores WHERE documento = ?"
+        registro = RegistroConsultasLentas(limite_ms=0)
+        linhas = []
+        registro.escrever = linhas.append
+
+        async def executar():
+            registro.registrar(conn, statement, (sample_produtor.documento,), False, 0.5, consultas)
+            await registro.aguardar()
+            registro.registrar(conn, statement, (sample_produtor.documento,), False, 0.4, consultas)
+            registro.registrar(conn, "BEGIN", (), False, 0.3, consultas)
+
+        asyncio.run(executar())
+        primeira, segunda, terceira = (json.loads(linha) for linha in linhas)
+        assert primeira["explain"] == "obtido"
+        assert primeira["parametros"] == [f"str[{len(sample_produtor.documento)}]"]
+        assert any("produtores" in no for no in primeira["plano"])
+        assert segunda["explain"] == "reaproveitado" and segunda["plano"] == primeira["plano"]
+        assert terceira["explain"] == "indisponivel" and terceira["plano"] is None
+        assert [consulta["duration_ms"] for consulta in registro.listar(10)] == [300.0, 400.0, 500.0]
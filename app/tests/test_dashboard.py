@@ -148,3 +148,18 @@ class TestDashboardCalculations:
             percentuais = [item["percentual"] for item in data]
             total_percentual = sum(percentuais)
             assert abs(total_percentual - 100.0) < 0.01  # Tolerância para float
+
+    """
+    Testa gráfico de culturas filtrado por ano da safra
+    """
+
+    def test_grafico_culturas_por_ano(self, client, sample_associacao, sample_safra):
+        response = client.get(f"/dashboard/grafico-culturas?ano={sample_safra.ano}")
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["cultura"] for item in data] == ["Milho"]
+        assert data[0]["percentual"] == 100.0
+
+        response = client.get("/dashboard/grafico-culturas?ano=1900")
+        assert response.status_code == 200
+        assert response.json() == []
@@ -0,0 +1,51 @@
+from app.utils.instrumentacao_sql import ConsultasRequisicao, ler_server_timing
+
+"""
+Testes para a instrumentação das consultas SQL por requisição
+"""
+
+
+class TestInstrumentacaoSql:
+    """
+    Testa os totais da requisição no cabeçalho Server-Timing
+    """
+
+    def test_server_timing(self, client, sample_produtor):
+        response = client.get(f"/produtores/{sample_produtor.id}")
+        itens = ler_server_timing(response.headers["Server-Timing"])
+        assert itens["db-consultas"] == "1"
+        assert itens["db-linhas"] == "1"
+        assert float(itens["db"]) > 0
+        assert float(itens["total"]) >= float(itens["db"])
+
+        assert ler_server_timing(client.get("/health").headers["Server-Timing"])["db-consultas"] == "0"
+
+    """
+    Testa o orçamento de consultas por endpoint com a fixture orcamento_sql
+    """
+
+    def test_orcamento_por_endpoint(self, client, orcamento_sql, sample_propriedade, sample_safra, sample_cultura):
+        orcamento_sql(client.get(f"/propriedades/{sample_propriedade.id}"), 1)
+        orcamento_sql(client.get("/dashboard/"), 6)
+        # Com o cache de referência carregado: propriedade, duplicidade, INSERT e refresh
+        client.get(f"/propriedade-safra-cultura/?ano={sample_safra.ano}")
+        orcamento_sql(client.post("/propriedade-safra-cultura/", json={
+            "propriedade_id": sample_propriedade.id,
+            "safra_id": sample_safra.id,
+            "cultura_id": sample_cultura.id
+        }), 4)
+
+    """
+    Testa o aviso de N+1 (uma vez por statement) e os totais por rota em /metrics
+    """
+
+    def test_n_mais_1(self, client, sample_produtor):
+        consultas = ConsultasRequisicao(limite_repeticoes=2)
+        for _ in range(5):
+            consultas.registrar("SELECT * FROM produtores WHERE id = ?", 0.001, 1)
+        consultas.registrar("SELECT * FROM safras", 0.001, 0)
+        assert (consultas.consultas, consultas.linhas, consultas.avisos_n_mais_1) == (6, 5, 1)
+
+        client.get(f"/produtores/{sample_produtor.id}")
+        texto = client.get("/metrics").text
+        assert 'http_db_queries_total{method="GET",route="/produtores/{produtor_id}"}' in texto
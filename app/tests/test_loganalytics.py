@@ -0,0 +1,108 @@
+import json
+import sys
+import zipfile
+from app.utils import loganalytics
+from app.utils.loganalytics import analisar, arquivos_de_log
+from app.utils.logger import FORMATO_TEXTO, app_logger, formatar_json, log_api_request
+
+"""
+Testes para a análise de latência a partir dos logs
+"""
+
+
+def linha_texto(minuto: str, metodo: str, caminho: str, status: int, segundos: float) -> str:
+    return (f"{minuto}:30 | INFO     | app.utils.logger:log_api_request:183 - "
+            f"API Request: {metodo} {caminho} - {status} ({segundos:.3f}s)\n")
+
+
+def escrever_logs(diretorio):
+    # Rotacionado e compactado: 100 requisições de 1 a 100 ms, 5 delas com 500
+    rotacionado = diretorio / "app.2025-01-01_10-00-00_000000.log"
+    with zipfile.ZipFile(f"{rotacionado}.zip", "w", zipfile.ZIP_DEFLATED) as compactado:
+        compactado.writestr(rotacionado.name, "".join(
+            linha_texto("2025-01-01 10:00", "GET", f"/produtores/{i}", 500 if i > 95 else 200, i / 1000)
+            for i in range(1, 101)
+        ) + "2025-01-01 10:00:31 | DEBUG    | app.models:carregar:10 - outra mensagem\n")
+    # Atual: texto e JSON (LOG_FORMATO=json), uma hora depois
+    atual = diretorio / "app.log"
+    atual.write_text(
+        linha_texto("2025-01-01 11:00", "POST", "/propriedades/", 422, 0.020)
+        + json.dumps({"time": "2025-01-01T11:01:00.123456-03:00", "level": "INFO",
+                      "message": "API Request: GET /produtores/7 - 200 (0.010s)", "method": "GET",
+                      "path": "/produtores/7", "status": 200, "duration_ms": 10.0,
+                      "route": "/produtores/{produtor_id}"}) + "\n"
+    )
+    return arquivos_de_log(str(diretorio))
+
+
+class TestLogAnalytics:
+    """
+    Testa os percentis, vazão e taxas de erro por rota e por intervalo, lendo o .zip sem extraí-lo
+    """
+
+    def test_percentis_por_rota_e_intervalo(self, tmp_path):
+        arquivos = escrever_logs(tmp_path)
+        assert [arquivo.name for arquivo in arquivos][-1] == "app.log"
+
+        resultado = analisar(arquivos, intervalo_s=3600)
+        assert resultado["linhas_de_requisicao"] == 102
+
+        # Linha JSON (GET /produtores/7) e linhas de texto somadas na mesma rota
+        produtores = resultado["rotas"]["GET /produtores/{id}"]
+        assert produtores["requisicoes"] == 101
+        # Histograma com erro relativo de até 1%
+        assert abs(produtores["p50_ms"] - 50) <= 0.5
+        assert abs(produtores["p95_ms"] - 95) <= 1
+        assert abs(produtores["p99_ms"] - 99) <= 1
+        assert produtores["taxa_5xx"] == round(5 / 101, 4) and produtores["taxa_4xx"] == 0.0
+        assert resultado["rotas"]["POST /propriedades/"]["taxa_4xx"] == 1.0
+        assert list(resultado["rotas"]) == ["GET /produtores/{id}", "POST /propriedades/"]
+
+        assert list(resultado["intervalos"]) == ["2025-01-01 10:00:00", "2025-01-01 11:00:00"]
+        assert resultado["intervalos"]["2025-01-01 10:00:00"]["requisicoes"] == 100
+        assert resultado["intervalos"]["2025-01-01 10:00:00"]["req_por_s"] == round(100 / 3600, 3)
+
+    """
+    Testa a CLI: filtro por rota, ponderação pela amostragem dos logs e relatório JSON
+    """
+
+    def test_cli(self, tmp_path, monkeypatch, capsys):
+        escrever_logs(tmp_path)
+        relatorio = tmp_path / "latencias.json"
+        monkeypatch.setattr(sys, "argv", [
+            "loganalytics", "--dir", str(tmp_path), "--intervalo", "30m", "--amostra", "0.1",
+            "--rota", "GET /produtores/{id}", "--relatorio", str(relatorio)
+        ])
+        loganalytics.main()
+
+        assert "GET /produtores/{id}" in capsys.readouterr().out
+        resultado = json.loads(relatorio.read_text())
+        assert list(resultado["rotas"]) == ["GET /produtores/{id}"]
+        # 96 bem-sucedidas (95 no texto e 1 no JSON) registradas com amostra de 10% (960) mais as 5 respostas 500
+        produtores = resultado["rotas"]["GET /produtores/{id}"]
+        assert produtores["requisicoes"] == 965
+        assert produtores["taxa_5xx"] == round(5 / 965, 4)
+
+    """
+    Testa a ponderação pela amostra gravada em cada linha (texto e JSON), sem --amostra
+    """
+
+    def test_amostra_gravada_na_linha(self, tmp_path):
+        linhas = []
+        sinks = [app_logger.add(linhas.append, format=FORMATO_TEXTO, level="INFO", colorize=False),
+                 app_logger.add(linhas.append, format=formatar_json, level="INFO")]
+        try:
+            log_api_request("GET", "/safras/3", 200, 0.005, amostra=0.1)
+            log_api_request("GET", "/safras/3", 500, 0.020)
+        finally:
+            for sink in sinks:
+                app_logger.remove(sink)
+        assert "[amostra 0.1]" in linhas[0] and json.loads(linhas[1])["amostra"] == 0.1
+
+        (tmp_path / "app.log").write_text("".join(linhas))
+        resultado = analisar(arquivos_de_log(str(tmp_path)))
+        # Em cada formato, a linha amostrada vale 10 requisições e a resposta 500 vale uma
+        safras = resultado["rotas"]["GET /safras/{id}"]
+        assert resultado["linhas_de_requisicao"] == 4
+        assert safras["requisicoes"] == 22
+        assert safras["taxa_5xx"] == round(2 / 22, 4)
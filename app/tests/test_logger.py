@@ -0,0 +1,48 @@
+import json
+from app.utils.logger import app_logger, formatar_json
+
+"""
+Testes para os logs estruturados
+"""
+
+
+class TestLogsEstruturados:
+    """
+    Testa o registro JSON com os campos de contexto no primeiro nível
+    """
+
+    def test_formato_json(self):
+        linhas = []
+        sink = app_logger.add(linhas.append, format=formatar_json, level="INFO")
+        try:
+            app_logger.bind(route="/safras/{safra_id}", status=200).info("mensagem")
+        finally:
+            app_logger.remove(sink)
+
+        registro = json.loads(linhas[0])
+        assert registro["message"] == "mensagem"
+        assert registro["level"] == "INFO"
+        assert (registro["route"], registro["status"]) == ("/safras/{safra_id}", 200)
+        assert "_json" not in registro
+
+    """
+    Testa o request_id nos logs da requisição e no cabeçalho da resposta
+    """
+
+    def test_request_id(self, client):
+        registros = []
+        sink = app_logger.add(lambda mensagem: registros.append(mensagem.record), level="INFO")
+        try:
+            # 4xx é sempre registrado, independentemente da amostragem
+            response = client.get("/safras/999999", headers={"X-Request-ID": "req-123"})
+        finally:
+            app_logger.remove(sink)
+
+        assert response.headers["X-Request-ID"] == "req-123"
+        requisicao = [r for r in registros if r["message"].startswith("API Request")][0]
+        assert requisicao["extra"]["request_id"] == "req-123"
+        assert requisicao["extra"]["route"] == "/safras/{safra_id}"
+        assert requisicao["extra"]["status"] == 404
+        assert "db_queries" in requisicao["extra"]
+
+        assert len(client.get("/health").headers["X-Request-ID"]) == 32
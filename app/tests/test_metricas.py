@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from app.utils.metricas_pool import QueuePoolMonitorado, estado_pool, estatisticas_pool
+
+"""
+Testes para as métricas do pool de conexões
+"""
+
+
+class TestMetricasPool:
+    """
+    Testa o formato do endpoint (o SQLite dos testes não usa pool com fila)
+    """
+
+    def test_metricas_pool_endpoint(self, client):
+        response = client.get("/metrics/pool")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["em_uso"] == 0
+        assert "+Inf" in data["espera_segundos"]["buckets"]
+        assert data["espera_segundos"]["contagem"] == data["checkouts"] + data["timeouts"]
+
+    """
+    Testa checkouts, overflow e timeouts medidos pelo pool monitorado
+    """
+
+    def test_pool_monitorado(self, db_path):
+        engine = create_engine(f"sqlite:///{db_path}", poolclass=QueuePoolMonitorado,
+                               pool_size=1, max_overflow=1, pool_timeout=0.01)
+        checkouts = estatisticas_pool.checkouts
+        timeouts = estatisticas_pool.timeouts
+
+        primeira = engine.connect()
+        segunda = engine.connect()
+        estado = estado_pool(engine.pool)
+        assert estado["em_uso"] == 2
+        assert estado["overflow"] == 1
+
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+        primeira.close()
+        segunda.close()
+        engine.dispose()
+        assert estatisticas_pool.checkouts == checkouts + 2
+        assert estatisticas_pool.timeouts == timeouts + 1
+
+
+class TestMetricasCacheSql:
+    """
+    Testa que consultas pré-construídas repetidas são atendidas pelo cache de compilação
+    """
+
+    def test_cache_hit_consultas_repetidas(self, client, sample_safra):
+        client.get(f"/safras/{sample_safra.id}")
+        antes = client.get("/metrics/cache-sql").json()["contagens"].get("CACHE_HIT", 0)
+
+        for _ in range(3):
+            assert client.get(f"/safras/{sample_safra.id}").status_code == 200
+
+        data = client.get("/metrics/cache-sql").json()
+        assert data["contagens"]["CACHE_HIT"] >= antes + 3
+        assert 0.0 < data["hit_rate"] <= 1.0
+
+
+class TestMetricasPrometheus:
+    """
+    Testa que as requisições são agregadas pelo template da rota, não pelo caminho com o id
+    """
+
+    def test_metricas_por_rota(self, client, sample_safra):
+        for _ in range(2):
+            assert client.get(f"/safras/{sample_safra.id}").status_code == 200
+        assert client.get("/safras/999999").status_code == 404
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        texto = response.text
+        assert 'http_requests_total{method="GET",route="/safras/{safra_id}",status="404"}' in texto
+        assert f"/safras/{sample_safra.id}\"" not in texto
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/safras/{safra_id}",le="+Inf"}' in texto
+        assert "http_requests_in_progress 1" in texto
+        assert "db_pool_checkouts_total" in texto
+        assert "sqlalchemy_compiled_cache_hit_ratio" in texto
+        assert "cache_referencia_hit_ratio" in texto
+
+    """
+    Testa que caminhos sem rota compartilham uma única série
+    """
+
+    def test_rota_nao_mapeada(self, client):
+        client.get("/caminho/inexistente/123")
+        assert 'route="nao_mapeada",status="404"' in client.get("/metrics").text
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+from app.models import Safra
+from app.services import orcamento_consultas
+from app.services.orcamento_consultas import iniciar_orcamento
+
+"""
+Testes para o orçamento de consultas por requisição
+"""
+
+
+class TestOrcamentoConsultas:
+    """
+    Testa limite de consultas por requisição
+    """
+
+    def test_limite_consultas(self, client, sample_propriedade, monkeypatch):
+        monkeypatch.setattr(orcamento_consultas, "DB_MAX_CONSULTAS", 2)
+        response = client.get("/dashboard/")
+        assert response.status_code == 503
+        assert "consultas" in response.json()["detail"]
+
+        # Rotas com poucas consultas seguem funcionando
+        assert client.get(f"/propriedades/{sample_propriedade.id}").status_code == 200
+
+        # Padrão 0: sem limite
+        monkeypatch.setattr(orcamento_consultas, "DB_MAX_CONSULTAS", 0)
+        assert client.get("/dashboard/").status_code == 200
+
+    """
+    Testa limite de linhas nas listagens
+    """
+
+    def test_limite_linhas(self, client, db_session, monkeypatch):
+        db_session.add_all([Safra(ano=2021), Safra(ano=2022)])
+        db_session.commit()
+        monkeypatch.setattr(orcamento_consultas, "DB_MAX_LINHAS", 1)
+        response = client.get("/safras/")
+        assert response.status_code == 413
+
+        monkeypatch.setattr(orcamento_consultas, "DB_MAX_LINHAS", 2)
+        assert len(client.get("/safras/").json()) == 2
+
+        monkeypatch.setattr(orcamento_consultas, "DB_MAX_LINHAS", 0)
+        assert len(client.get("/safras/").json()) == 2
+
+    """
+    Testa interrupção de statement lento no SQLite (progress handler)
+    """
+
+    def test_tempo_limite_sqlite(self, async_session_factory, monkeypatch):
+        monkeypatch.setattr(orcamento_consultas, "DB_STATEMENT_TIMEOUT_MS", 50)
+        consulta_lenta = text(
+            "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) SELECT count(*) FROM r"
+        )
+
+        async def cenario():
+            iniciar_orcamento()
+            async with async_session_factory() as db:
+                with pytest.raises(HTTPException) as erro:
+                    await db.execute(consulta_lenta)
+                assert erro.value.status_code == 503
+                await db.rollback()
+                # A conexão continua utilizável depois da interrupção
+                assert await db.scalar(text("SELECT 1")) == 1
+
+        asyncio.run(cenario())
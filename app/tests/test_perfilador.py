@@ -0,0 +1,87 @@
+import asyncio
+import re
+import sys
+import threading
+import time
+from app.utils import perfilador
+from app.utils.perfilador import AMOSTRA_OCIOSA, AMOSTRA_OUTRAS_TAREFAS, AmostradorPilhas
+
+"""
+Testes para o profiling sob demanda
+"""
+
+
+def calcular_por(segundos: float):
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        sum(range(100))
+
+
+def calcular_em_outra_tarefa(segundos: float):
+    calcular_por(segundos)
+
+
+class TestPerfilador:
+    """
+    Testa a amostragem de pilhas no formato colapsado (raiz à esquerda, quantidade de amostras ao final)
+    """
+
+    def test_amostrador(self):
+        amostrador = AmostradorPilhas(threading.get_ident(), 0.001)
+        amostrador.iniciar()
+        calcular_por(0.05)
+        amostrador.parar()
+
+        linhas = amostrador.colapsado().splitlines()
+        assert linhas and all(re.fullmatch(r".+ \d+", linha) for linha in linhas)
+        assert any("calcular_por (test_perfilador.py" in linha for linha in linhas)
+
+    """
+    Testa que, no event loop, apenas a tarefa perfilada aparece com a pilha completa
+    """
+
+    def test_apenas_a_tarefa_perfilada(self):
+        async def requisicao():
+            amostrador = AmostradorPilhas(threading.get_ident(), 0.001, sys._getframe())
+            amostrador.iniciar()
+            for _ in range(5):
+                calcular_por(0.01)
+                await asyncio.sleep(0)
+            await asyncio.sleep(0.02)
+            amostrador.parar()
+            return amostrador
+
+        async def outra_requisicao():
+            for _ in range(5):
+                calcular_em_outra_tarefa(0.01)
+                await asyncio.sleep(0)
+
+        async def cenario():
+            amostrador, _ = await asyncio.gather(requisicao(), outra_requisicao())
+            return amostrador
+
+        pilhas = asyncio.run(cenario()).pilhas
+        assert any("calcular_por (test_perfilador.py" in pilha for pilha in pilhas)
+        assert not any("calcular_em_outra_tarefa" in pilha for pilha in pilhas)
+        assert pilhas.get(AMOSTRA_OUTRAS_TAREFAS, 0) > 0
+        assert pilhas.get(AMOSTRA_OCIOSA, 0) > 0
+
+    """
+    Testa que apenas o token de administração ativa o profiling e que o arquivo é gravado
+    """
+
+    def test_token(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(perfilador, "PROFILING_TOKEN", "segredo")
+        monkeypatch.setattr(perfilador, "DIRETORIO_PROFILES", tmp_path)
+
+        assert "X-Profile-Arquivo" not in client.get("/health").headers
+        assert "X-Profile-Arquivo" not in client.get("/health", headers={"X-Profile-Token": "errado"}).headers
+
+        response = client.get("/safras/", headers={"X-Profile-Token": "segredo"})
+        assert response.status_code == 200
+        arquivo = response.headers["X-Profile-Arquivo"]
+        assert arquivo.startswith(str(tmp_path)) and arquivo.endswith(".folded")
+        assert list(tmp_path.iterdir())
+
+        response = client.get("/health?__profile=segredo")
+        assert "X-Profile-Arquivo" in response.headers
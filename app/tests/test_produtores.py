@@ -89,6 +89,22 @@ class TestProdutoresAPI:
         assert data["nome"] == "Nome Atualizado"
         assert data["cpf_cnpj"] == sample_produtor.cpf_cnpj
 
+    """
+    Testa atualização com versão desatualizada (If-Match)
+    """
+
+    def test_update_produtor_if_match_conflito(self, client, sample_produtor):
+        response = client.put(
+            f"/produtores/{sample_produtor.id}", json={"nome": "Outro"}, headers={"If-Match": '"1"'}
+        )
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+
+        response = client.put(
+            f"/produtores/{sample_produtor.id}", json={"nome": "Mais um"}, headers={"If-Match": '"1"'}
+        )
+        assert response.status_code == 409
+
     """
     Testa atualização com CPF inválido
     """
@@ -117,6 +133,19 @@ class TestProdutoresAPI:
         response = client.delete(f"/produtores/{sample_produtor.id}")
         assert response.status_code == 204
 
+    """
+    Testa exclusão de produtor com propriedades e associações (ON DELETE CASCADE)
+    """
+
+    def test_delete_produtor_cascade(self, client, orcamento_sql, sample_produtor, sample_associacao):
+        propriedade_id, associacao_id = sample_associacao.propriedade_id, sample_associacao.id
+        response = client.delete(f"/produtores/{sample_produtor.id}")
+        assert response.status_code == 204
+        # Sem associações arquivadas: o EXISTS dos resumos e o DELETE com cascade
+        orcamento_sql(response, 2)
+        assert client.get(f"/propriedades/{propriedade_id}").status_code == 404
+        assert client.get(f"/propriedade-safra-cultura/{associacao_id}").status_code == 404
+
     """
     Testa exclusão de produtor inexistente
     """
@@ -168,3 +197,55 @@ class TestProdutorValidations:
         }
         response = client.post("/produtores/", json=invalid_data)
         assert response.status_code == 400
+
+
+class TestDocumentoNormalizado:
+    """
+    Testa que o mesmo CPF com e sem formatação é tratado como duplicado
+    """
+
+    def test_duplicado_em_outra_formatacao(self, client, mock_produtor_data):
+        assert client.post("/produtores/", json=mock_produtor_data).status_code == 201
+
+        response = client.post("/produtores/", json={"nome": "Outro Nome", "cpf_cnpj": "52998224725"})
+        assert response.status_code == 400
+        assert "CPF ou CNPJ já cadastrado" in response.json()["detail"]
+
+    """
+    Testa a busca por documento com e sem formatação, inclusive CNPJ com barra
+    """
+
+    def test_busca_por_documento(self, client):
+        cnpj = client.post("/produtores/", json={"nome": "Empresa", "cpf_cnpj": "11.222.333/0001-81"}).json()
+        assert cnpj["documento"] == "11222333000181"
+
+        for doc in ("11.222.333/0001-81", "11222333000181"):
+            response = client.get(f"/produtores/por-documento/{doc}")
+            assert response.status_code == 200
+            assert response.json()["id"] == cnpj["id"]
+
+        assert client.get("/produtores/por-documento/529.982.247-25").status_code == 404
+        assert client.get("/produtores/por-documento/123").status_code == 400
+
+
+class TestLeituraReplica:
+    """
+    Testa o roteamento de leituras para a réplica e a fixação no primário após escritas
+    """
+
+    def test_leia_suas_escritas(self, client_replica, mock_produtor_data):
+        response = client_replica.post("/produtores/", json=mock_produtor_data)
+        assert response.status_code == 201
+        assert "ler_primario" in response.cookies
+        produtor_id = response.json()["id"]
+
+        # Com o cookie, a leitura vai ao primário e enxerga a escrita
+        assert client_replica.get(f"/produtores/{produtor_id}").status_code == 200
+
+        # Sem o cookie, a leitura vai à réplica (ainda sem o registro)
+        client_replica.cookies.clear()
+        assert client_replica.get(f"/produtores/{produtor_id}").status_code == 404
+
+        # O cabeçalho força a leitura no primário
+        response = client_replica.get(f"/produtores/{produtor_id}", headers={"X-Ler-Primario": "1"})
+        assert response.status_code == 200
@@ -0,0 +1,123 @@
+import asyncio
+from fastapi import HTTPException
+from app.models import PropriedadeSafraCultura
+from app.schemas.propriedade_safra_cultura import PropriedadeSafraCulturaCreate
+from app.services.escrita_agrupada import AgrupadorEscritas
+
+"""
+Testes para a API de Propriedade Safra Cultura
+"""
+
+
+class TestPropriedadeSafraCulturaAPI:
+    """
+    Testa remoção em lote por safra
+    """
+
+    def test_delete_em_lote_por_safra(self, client, db_session, sample_associacao):
+        response = client.delete(f"/propriedade-safra-cultura/?safra_id={sample_associacao.safra_id}")
+        assert response.status_code == 200
+        assert response.json()["removidos"] == 1
+        assert db_session.query(PropriedadeSafraCultura).count() == 0
+
+    """
+    Testa remoção em lote sem filtros
+    """
+
+    def test_delete_em_lote_sem_filtros(self, client, sample_associacao):
+        response = client.delete("/propriedade-safra-cultura/")
+        assert response.status_code == 400
+        assert "filtro" in response.json()["detail"]
+
+    """
+    Testa remoção em lote sem associações correspondentes
+    """
+
+    def test_delete_em_lote_sem_resultados(self, client, sample_associacao):
+        response = client.delete("/propriedade-safra-cultura/?safra_id=999")
+        assert response.status_code == 200
+        assert response.json()["removidos"] == 0
+
+    """
+    Testa listagem com nomes das entidades e filtro por ano da safra
+    """
+
+    def test_list_por_ano(self, client, sample_associacao, sample_safra):
+        response = client.get(f"/propriedade-safra-cultura/?ano={sample_safra.ano}")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["safra_ano"] == sample_safra.ano
+        assert data[0]["cultura_nome"] == "Milho"
+
+        response = client.get("/propriedade-safra-cultura/?ano=1900")
+        assert response.status_code == 200
+        assert response.json() == []
+
+    """
+    Testa obtenção de associação com detalhes
+    """
+
+    def test_get_detalhe(self, client, sample_associacao, sample_propriedade):
+        response = client.get(f"/propriedade-safra-cultura/{sample_associacao.id}")
+        assert response.status_code == 200
+        assert response.json()["propriedade_nome"] == sample_propriedade.nome
+
+        response = client.get("/propriedade-safra-cultura/999")
+        assert response.status_code == 404
+
+    """
+    Testa que safras e culturas com associações não são removidas (sem cascade nas associações)
+    """
+
+    def test_delete_safra_e_cultura_em_uso(self, client, db_session, sample_associacao):
+        response = client.delete(f"/safras/{sample_associacao.safra_id}")
+        assert response.status_code == 400
+        assert "associações" in response.json()["detail"]
+        assert client.delete(f"/culturas/{sample_associacao.cultura_id}").status_code == 400
+        assert db_session.query(PropriedadeSafraCultura).count() == 1
+
+        client.delete(f"/propriedade-safra-cultura/?safra_id={sample_associacao.safra_id}")
+        assert client.delete(f"/safras/{sample_associacao.safra_id}").status_code == 204
+        assert client.delete(f"/culturas/{sample_associacao.cultura_id}").status_code == 204
+
+
+"""
+Testes para a escrita agrupada (group commit) de associações
+"""
+
+
+class TestEscritaAgrupada:
+    """
+    Testa que cada requisição de um lote recebe seu próprio resultado ou erro
+    """
+
+    def test_lote_com_resultados_individuais(
+            self, db_session, async_session_factory, sample_propriedade, sample_safra, sample_cultura
+    ):
+        agrupador = AgrupadorEscritas(async_session_factory, janela_ms=50, lote_maximo=10)
+        valido = PropriedadeSafraCulturaCreate(
+            propriedade_id=sample_propriedade.id, safra_id=sample_safra.id, cultura_id=sample_cultura.id
+        )
+        sem_safra = PropriedadeSafraCulturaCreate(
+            propriedade_id=sample_propriedade.id, safra_id=999, cultura_id=sample_cultura.id
+        )
+
+        async def submeter_concorrente():
+            tarefas = [agrupador.submeter(psc) for psc in (valido, sem_safra, valido)]
+            return await asyncio.gather(*tarefas, return_exceptions=True)
+
+        resultados = asyncio.run(submeter_concorrente())
+
+        criados = [r for r in resultados if not isinstance(r, HTTPException)]
+        erros = sorted(r.status_code for r in resultados if isinstance(r, HTTPException))
+        assert len(criados) == 1
+        assert criados[0].id is not None
+        assert erros == [400, 404]
+        assert db_session.query(PropriedadeSafraCultura).count() == 1
+
+        # Associação já gravada em um lote anterior
+        async def submeter_repetida():
+            return await asyncio.gather(agrupador.submeter(valido), return_exceptions=True)
+
+        assert [r.status_code for r in asyncio.run(submeter_repetida())] == [400]
@@ -0,0 +1,157 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.routes.propriedade import TAMANHO_LOTE_UPSERT
+from app.services import orcamento_consultas
+from app.utils.instrumentacao_sql import ler_server_timing
+
+"""
+Testes para a API de Propriedades
+"""
+
+
+class TestPropriedadesAPI:
+
+    def test_create_propriedade_success(self, client, sample_produtor, mock_propriedade_data):
+        """Testa criação bem-sucedida de propriedade"""
+        mock_propriedade_data["produtor_id"] = sample_produtor.id
+        response = client.post("/propriedades/", json=mock_propriedade_data)
+        assert response.status_code == 201
+        assert response.json()["nome"] == mock_propriedade_data["nome"]
+
+    """
+    Testa atualização parcial bem-sucedida
+    """
+
+    def test_update_propriedade_success(self, client, sample_propriedade):
+        response = client.put(f"/propriedades/{sample_propriedade.id}", json={"area_vegetacao": 50.0})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["area_vegetacao"] == 50.0
+        assert data["area_total"] == 500.0
+
+    """
+    Testa atualização parcial que viola a soma das áreas (CHECK constraint)
+    """
+
+    def test_update_propriedade_soma_areas_invalida(self, client, sample_propriedade):
+        response = client.put(f"/propriedades/{sample_propriedade.id}", json={"area_agricultavel": 450.0})
+        assert response.status_code == 400
+        assert "Soma das áreas" in response.json()["detail"]
+
+    """
+    Testa atualização com área não positiva (CHECK constraint)
+    """
+
+    def test_update_propriedade_area_negativa(self, client, sample_propriedade):
+        response = client.put(f"/propriedades/{sample_propriedade.id}", json={"area_vegetacao": -1.0})
+        assert response.status_code == 400
+        assert "Área deve ser maior que zero" in response.json()["detail"]
+
+    """
+    Testa atualização de propriedade inexistente
+    """
+
+    def test_update_propriedade_not_found(self, client):
+        response = client.put("/propriedades/999", json={"nome": "Outra"})
+        assert response.status_code == 404
+        assert "Propriedade não encontrada" in response.json()["detail"]
+
+
+"""
+Testes para controle de concorrência otimista (If-Match / version)
+"""
+
+
+class TestPropriedadeConcorrencia:
+    """
+    Testa que GET devolve a versão como ETag
+    """
+
+    def test_get_propriedade_etag(self, client, sample_propriedade):
+        response = client.get(f"/propriedades/{sample_propriedade.id}")
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"1"'
+        assert response.json()["version"] == 1
+
+    """
+    Testa atualização com If-Match correto incrementando a versão
+    """
+
+    def test_update_if_match_valido(self, client, sample_propriedade):
+        response = client.put(
+            f"/propriedades/{sample_propriedade.id}", json={"nome": "Nova"}, headers={"If-Match": '"1"'}
+        )
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+        assert response.headers["ETag"] == '"2"'
+
+    """
+    Testa atualização com versão desatualizada
+    """
+
+    def test_update_if_match_conflito(self, client, sample_propriedade):
+        client.put(f"/propriedades/{sample_propriedade.id}", json={"nome": "Primeira"})
+        response = client.put(
+            f"/propriedades/{sample_propriedade.id}", json={"nome": "Segunda"}, headers={"If-Match": '"1"'}
+        )
+        assert response.status_code == 409
+
+
+"""
+Testes para o upsert de propriedades por (produtor_id, nome)
+"""
+
+
+class TestPropriedadeUpsert:
+    """
+    Testa inserção, atualização e item inalterado em um mesmo lote
+    """
+
+    def test_upsert_lote(self, client, sample_propriedade):
+        existente = {
+            "nome": sample_propriedade.nome,
+            "cidade": sample_propriedade.cidade,
+            "estado": sample_propriedade.estado,
+            "area_total": sample_propriedade.area_total,
+            "area_agricultavel": sample_propriedade.area_agricultavel,
+            "area_vegetacao": sample_propriedade.area_vegetacao,
+            "produtor_id": sample_propriedade.produtor_id,
+        }
+        nova = {**existente, "nome": "Fazenda Nova"}
+        response = client.put("/propriedades/upsert", json=[existente, nova])
+        assert response.status_code == 200
+        assert response.json() == {"inseridos": 1, "atualizados": 0, "inalterados": 1}
+
+        alterada = {**existente, "cidade": "Goiânia"}
+        response = client.put("/propriedades/upsert", json=alterada)
+        assert response.status_code == 200
+        assert response.json() == {"inseridos": 0, "atualizados": 1, "inalterados": 0}
+
+        data = client.get(f"/propriedades/{sample_propriedade.id}").json()
+        assert data["cidade"] == "Goiânia"
+        assert data["version"] == 2
+
+    """
+    Testa upsert com produtor inexistente
+    """
+
+    def test_upsert_produtor_not_found(self, client, mock_propriedade_data):
+        mock_propriedade_data["produtor_id"] = 999
+        response = client.put("/propriedades/upsert", json=mock_propriedade_data)
+        assert response.status_code == 404
+
+    """
+    Testa a sincronização com mais lotes do que DB_MAX_CONSULTAS (um statement por lote de 1000 linhas)
+    """
+
+    def test_upsert_acima_do_limite_de_consultas(self, client, sample_produtor, monkeypatch):
+        monkeypatch.setattr(orcamento_consultas, "DB_MAX_CONSULTAS", 5)
+        quantidade = 6 * TAMANHO_LOTE_UPSERT
+        propriedades = [{
+            "nome": f"Fazenda {i}", "cidade": "Sorriso", "estado": "MT", "area_total": 100.0,
+            "area_agricultavel": 60.0, "area_vegetacao": 30.0, "produtor_id": sample_produtor.id
+        } for i in range(quantidade)]
+        response = client.put("/propriedades/upsert", json=propriedades)
+        assert response.status_code == 200
+        assert response.json() == {"inseridos": quantidade, "atualizados": 0, "inalterados": 0}
+        assert int(ler_server_timing(response.headers["Server-Timing"])["db-consultas"]) > 5
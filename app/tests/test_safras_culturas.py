@@ -0,0 +1,32 @@
+from sqlalchemy import false, select
+from app.models import consultas
+
+"""
+Testes para as APIs de Safras e Culturas
+"""
+
+
+class TestSafrasCulturasAPI:
+    """
+    Testa o cadastro concorrente do mesmo ano/nome: a verificação prévia não vê o registro da outra requisição
+    e o índice único responde com o mesmo 400
+    """
+
+    def test_cadastro_concorrente(self, client, sample_safra, sample_cultura, monkeypatch):
+        monkeypatch.setattr(consultas, "SAFRA_ANO_EXISTE", select(false()))
+        monkeypatch.setattr(consultas, "CULTURA_NOME_EXISTE", select(false()))
+
+        response = client.post("/safras/", json={"ano": sample_safra.ano})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Já existe uma safra para este ano"
+        response = client.post("/culturas/", json={"nome": sample_cultura.nome})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Já existe uma cultura com este nome"
+
+        outra_safra = client.post("/safras/", json={"ano": sample_safra.ano + 1}).json()
+        outra_cultura = client.post("/culturas/", json={"nome": "Algodão"}).json()
+        response = client.put(f"/safras/{outra_safra['id']}", json={"ano": sample_safra.ano})
+        assert response.status_code == 400
+        response = client.put(f"/culturas/{outra_cultura['id']}", json={"nome": sample_cultura.nome})
+        assert response.status_code == 400
+        assert client.get(f"/safras/{outra_safra['id']}").json()["ano"] == sample_safra.ano + 1
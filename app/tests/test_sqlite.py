@@ -0,0 +1,56 @@
+import asyncio
+from sqlalchemy import text
+from app.models import Safra, database
+
+"""
+Testes para o modo SQLite (pragmas por conexão e escritor único)
+"""
+
+
+class TestSqlite:
+    """
+    Testa que as conexões ao arquivo SQLite saem configuradas com WAL e synchronous=NORMAL
+    """
+
+    def test_pragmas_conexao(self, async_session_factory):
+        async def cenario():
+            async with async_session_factory() as db:
+                return (
+                    await db.scalar(text("PRAGMA journal_mode")),
+                    await db.scalar(text("PRAGMA synchronous")),
+                    await db.scalar(text("PRAGMA foreign_keys")),
+                )
+
+        journal_mode, synchronous, foreign_keys = asyncio.run(cenario())
+        assert journal_mode == "wal"
+        assert synchronous == 1  # NORMAL
+        assert foreign_keys == 1
+
+    """
+    Testa que transações de escrita concorrentes são serializadas pela trava do worker, do flush ao commit
+    """
+
+    def test_escritor_unico(self, async_session_factory, monkeypatch):
+        monkeypatch.setattr(database, "AsyncSessionLocal", async_session_factory)
+        monkeypatch.setattr(database, "ESCRITOR_UNICO", True)
+        em_andamento = 0
+        maximo = 0
+
+        async def escrever(ano):
+            nonlocal em_andamento, maximo
+            async with database.sessao_escrita() as db:
+                db.add(Safra(ano=ano))
+                await db.flush()
+                em_andamento += 1
+                maximo = max(maximo, em_andamento)
+                await asyncio.sleep(0.01)
+                await db.commit()
+                em_andamento -= 1
+
+        async def cenario():
+            await asyncio.gather(*(escrever(2000 + i) for i in range(20)))
+            async with async_session_factory() as db:
+                return await db.scalar(text("SELECT count(*) FROM safras"))
+
+        assert asyncio.run(cenario()) == 20
+        assert maximo == 1
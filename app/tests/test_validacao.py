@@ -0,0 +1,63 @@
+from app.routes import validacao
+from app.services.validators import analisar_lote
+
+"""
+Testes para a validação prévia de documentos
+"""
+
+
+class TestValidacaoDocumentos:
+    """
+    Testa validade, tipo e cadastro de cada documento, na ordem enviada
+    """
+
+    def test_validar_documentos(self, client, sample_produtor):
+        response = client.post("/validacao/documentos", json={"documentos": [
+            "987.654.321-00", "529.982.247-25", "11.222.333/0001-81", "529.982.247-24", "123"
+        ]})
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["total"], data["validos"], data["cadastrados"]) == (5, 3, 1)
+        resultados = [
+            (item["documento"], item["valido"], item["tipo"], item["cadastrado"]) for item in data["resultados"]
+        ]
+        assert resultados == [
+            ("987.654.321-00", True, "CPF", True),
+            ("529.982.247-25", True, "CPF", False),
+            ("11.222.333/0001-81", True, "CNPJ", False),
+            ("529.982.247-24", False, None, False),
+            ("123", False, None, False),
+        ]
+
+    """
+    Testa a consulta de cadastro em blocos (IN fora do Postgres) e o lote vazio
+    """
+
+    def test_blocos_e_lote_vazio(self, client, sample_produtor, monkeypatch):
+        monkeypatch.setattr(validacao, "VALIDACAO_LOTE_IN", 1)
+        response = client.post("/validacao/documentos", json={"documentos": ["52998224725", "98765432100"]})
+        assert [item["cadastrado"] for item in response.json()["resultados"]] == [False, True]
+
+        response = client.post("/validacao/documentos", json={"documentos": []})
+        assert response.json() == {"total": 0, "validos": 0, "cadastrados": 0, "resultados": []}
+
+    """
+    Testa o limite de documentos por requisição
+    """
+
+    def test_limite_documentos(self, client, monkeypatch):
+        monkeypatch.setattr(validacao, "VALIDACAO_MAX_DOCUMENTOS", 2)
+        response = client.post("/validacao/documentos", json={"documentos": ["1", "2", "3"]})
+        assert response.status_code == 413
+
+    """
+    Testa documentos muito longos: 422 na requisição e inválidos (sem alargar a matriz) na validação em lote
+    """
+
+    def test_documento_longo(self, client):
+        response = client.post("/validacao/documentos", json={"documentos": ["529.982.247-25", "1" * 20000]})
+        assert response.status_code == 422
+
+        validos, quantidade = analisar_lote(["529.982.247-25", "1" * 20000, " 11.222.333/0001-81 "])
+        assert validos.tolist() == [True, False, True]
+        assert quantidade.tolist() == [11, 15, 14]
@@ -0,0 +1,48 @@
+import random
+from app.services.validators import TAMANHO_MAXIMO_FORMATADO, validar_cpf_cnpj, validar_lote
+
+"""
+Testes para a validação de CPF/CNPJ em lote
+"""
+
+
+class TestValidarLote:
+    """
+    Testa que validar_lote concorda com validar_cpf_cnpj, documento a documento
+    """
+
+    def test_equivalente_ao_escalar(self):
+        docs = [
+            "529.982.247-25", "52998224725", "  529 982 247 25 ", "529.982.247-24", "111.111.111-11",
+            "11.222.333/0001-81", "11222333000181", "11.222.333/0001-80", "00000000000000",
+            "", "abc", "123", "5299822472", "529982247255", "112223330001810", "١٢٣",
+        ]
+        rng = random.Random(7)
+        for _ in range(500):
+            doc = list(rng.choice(docs[:8]))
+            doc[rng.randrange(len(doc))] = rng.choice("0123456789-./ x")
+            docs.append("".join(doc))
+
+        assert validar_lote(docs).tolist() == [validar_cpf_cnpj(doc) for doc in docs]
+
+    """
+    Testa a equivalência com textos acima de TAMANHO_MAXIMO_FORMATADO (prefixos, espaços, textos enormes)
+    """
+
+    def test_equivalente_ao_escalar_textos_longos(self):
+        docs = [
+            "CPF: 529.982.247-25", "CNPJ: 11.222.333/0001-81", "   11.222.333/0001-81   ", "CPF: 529.982.247-24",
+            "529.982.247-25" + " " * 5000, "x" * 30 + "52998224725", "5" * 19, "52998224725" * 2, "1" * 20000,
+            "documento sem dígitos nenhum",
+        ]
+        assert len(min(docs, key=len)) > TAMANHO_MAXIMO_FORMATADO
+        assert validar_lote(docs).tolist() == [validar_cpf_cnpj(doc) for doc in docs]
+        assert validar_lote(docs).tolist() == [True, True, True, False, True, True, False, False, False, False]
+
+    """
+    Testa lote vazio e entrada a partir de um gerador
+    """
+
+    def test_lote_vazio_e_gerador(self):
+        assert validar_lote([]).tolist() == []
+        assert validar_lote(doc for doc in ["52998224725", "11222333000180"]).tolist() == [True, False]
@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import os
+from datetime import date
+from sqlalchemy import delete, exists, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import PropriedadeSafraCultura, PropriedadeSafraCulturaArquivo, ResumoSafraCultura, Safra
+from app.models.database import AsyncSessionLocal
+from app.services.cache_referencia import cache_referencia
+from app.utils.logger import app_logger
+
+"""
+Arquivamento de safras encerradas
+- Move as associações da safra de propriedade_safra_cultura para propriedade_safra_cultura_arquivo,
+  em lotes de ARQUIVAMENTO_LOTE linhas; o DELETE ... RETURNING garante que só as linhas efetivamente
+  removidas sejam arquivadas, mesmo com escritas concorrentes
+- Recalcula os resumos da safra (resumo_safra_cultura) a partir do arquivo e marca a safra como
+  arquivada, tudo na mesma transação
+- Incrementa a versão dos dados de referência: os workers passam a recusar novas associações na safra
+  e a responder o dashboard da safra pelos resumos
+- Executar novamente recolhe associações gravadas por workers que ainda não tinham visto o arquivamento
+- Remoção de propriedades/produtores: o ON DELETE CASCADE apaga as associações arquivadas, e
+  descontar_dos_resumos retira as mesmas associações dos resumos antes da remoção
+Uso: python -m app.utils.arquivamento --ate-ano 2022
+     python -m app.utils.arquivamento --restaurar 2019
+"""
+
+ARQUIVAMENTO_LOTE = int(os.getenv("ARQUIVAMENTO_LOTE", "5000"))
+# Sem --ate-ano, arquiva as safras anteriores às SAFRAS_ABERTAS mais recentes (ano corrente incluído)
+SAFRAS_ABERTAS = int(os.getenv("SAFRAS_ABERTAS", "2"))
+
+COLUNAS = ("id", "propriedade_id", "safra_id", "cultura_id")
+
+
+async def _mover(db: AsyncSession, origem, destino, safra_id: int, lote: int) -> int:
+    movidas = 0
+    while True:
+        ids = select(origem.id).where(origem.safra_id == safra_id).limit(lote).scalar_subquery()
+        linhas = (await db.execute(
+            delete(origem).where(origem.id.in_(ids))
+            .returning(*(getattr(origem, coluna) for coluna in COLUNAS))
+            .execution_options(synchronize_session=False)
+        )).mappings().all()
+        if not linhas:
+            return movidas
+        await db.execute(insert(destino), [dict(linha) for linha in linhas])
+        movidas += len(linhas)
+
+
+async def arquivar_safra(db: AsyncSession, safra_id: int, lote: int = ARQUIVAMENTO_LOTE) -> int:
+    """Arquiva as associações da safra e recalcula seus resumos; o commit fica com quem chama"""
+    movidas = await _mover(db, PropriedadeSafraCultura, PropriedadeSafraCulturaArquivo, safra_id, lote)
+
+    await db.execute(delete(ResumoSafraCultura).where(ResumoSafraCultura.safra_id == safra_id))
+    await db.execute(insert(ResumoSafraCultura).from_select(
+        ["safra_id", "cultura_id", "quantidade"],
+        select(
+            PropriedadeSafraCulturaArquivo.safra_id,
+            PropriedadeSafraCulturaArquivo.cultura_id,
+            func.count(PropriedadeSafraCulturaArquivo.id)
+        ).where(PropriedadeSafraCulturaArquivo.safra_id == safra_id).group_by(
+            PropriedadeSafraCulturaArquivo.safra_id, PropriedadeSafraCulturaArquivo.cultura_id
+        )
+    ))
+    await db.execute(update(Safra).where(Safra.id == safra_id).values(arquivada=True))
+    return movidas
+
+
+async def descontar_dos_resumos(db: AsyncSession, propriedades_ids):
+    """
+    Retira dos resumos as associações arquivadas das propriedades (select de ids) que serão removidas
+    - Sem associações arquivadas (o caso comum) custa apenas um EXISTS pelo índice de propriedade_id
+    """
+    if not await db.scalar(select(exists().where(PropriedadeSafraCulturaArquivo.propriedade_id.in_(propriedades_ids)))):
+        return
+    arquivadas = select(func.count(PropriedadeSafraCulturaArquivo.id)).where(
+        PropriedadeSafraCulturaArquivo.safra_id == ResumoSafraCultura.safra_id,
+        PropriedadeSafraCulturaArquivo.cultura_id == ResumoSafraCultura.cultura_id,
+        PropriedadeSafraCulturaArquivo.propriedade_id.in_(propriedades_ids)
+    ).scalar_subquery()
+    await db.execute(
+        update(ResumoSafraCultura).where(arquivadas > 0)
+        .values(quantidade=ResumoSafraCultura.quantidade - arquivadas)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        delete(ResumoSafraCultura).where(ResumoSafraCultura.quantidade <= 0)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def restaurar_safra(db: AsyncSession, safra_id: int, lote: int = ARQUIVAMENTO_LOTE) -> int:
+    """Devolve as associações arquivadas à tabela principal e descarta os resumos da safra"""
+    movidas = await _mover(db, PropriedadeSafraCulturaArquivo, PropriedadeSafraCultura, safra_id, lote)
+    await db.execute(delete(ResumoSafraCultura).where(ResumoSafraCultura.safra_id == safra_id))
+    await db.execute(update(Safra).where(Safra.id == safra_id).values(arquivada=False))
+    return movidas
+
+
+async def arquivar(ate_ano: int, lote: int = ARQUIVAMENTO_LOTE):
+    async with AsyncSessionLocal() as db:
+        safras = (await db.execute(
+            select(Safra.id, Safra.ano, Safra.arquivada).where(Safra.ano <= ate_ano).order_by(Safra.ano)
+        )).all()
+
+    # Uma transação por safra: uma falha não desfaz as safras já arquivadas
+    for safra_id, ano, arquivada in safras:
+        async with AsyncSessionLocal() as db:
+            movidas = await arquivar_safra(db, safra_id, lote)
+            if arquivada and movidas == 0:
+                await db.rollback()
+                continue
+            await cache_referencia.registrar_alteracao(db)
+            await db.commit()
+        app_logger.info(f"Safra {ano}: {movidas} associações arquivadas")
+
+
+async def restaurar(ano: int, lote: int = ARQUIVAMENTO_LOTE):
+    async with AsyncSessionLocal() as db:
+        safra_id = await db.scalar(select(Safra.id).where(Safra.ano == ano))
+        if safra_id is None:
+            app_logger.error(f"Safra {ano} não encontrada")
+            return
+        movidas = await restaurar_safra(db, safra_id, lote)
+        await cache_referencia.registrar_alteracao(db)
+        await db.commit()
+    app_logger.info(f"Safra {ano}: {movidas} associações restauradas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arquivamento de safras encerradas")
+    parser.add_argument("--ate-ano", type=int, default=date.today().year - SAFRAS_ABERTAS,
+                        help="Arquiva as safras até este ano (inclusive)")
+    parser.add_argument("--restaurar", type=int, metavar="ANO", help="Restaura a safra arquivada deste ano")
+    parser.add_argument("--lote", type=int, default=ARQUIVAMENTO_LOTE, help="Associações movidas por comando")
+    args = parser.parse_args()
+
+    if args.restaurar is not None:
+        asyncio.run(restaurar(args.restaurar, args.lote))
+    else:
+        asyncio.run(arquivar(args.ate_ano, args.lote))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Connection
+from app.models import (
+    Cultura, ProdutorRural, Propriedade, PropriedadeSafraCultura, PropriedadeSafraCulturaArquivo, Safra
+)
+from app.models.database import DATABASE_URL
+from app.services.validators import validar_lote
+from app.utils.logger import app_logger
+
+"""
+Auditoria de integridade do banco inteiro
+- Encontra linhas que violam as regras de negócio sem passar pela API (seed_custom.py, caminhos antigos,
+  SQL manual): documentos inválidos, soma de áreas, associações órfãs e plantios duplicados
+- Cada tabela é lida com cursor do lado do servidor, em blocos de AUDITORIA_LOTE linhas; as regras são
+  aplicadas a cada bloco de uma vez, com NumPy
+- As tabelas são auditadas em paralelo, uma por processo (cada processo abre a própria conexão)
+- O relatório (JSON) traz os ids que violam cada regra e a vazão em linhas/s, por tabela e no total
+Uso: python -m app.utils.auditoria
+     python -m app.utils.auditoria --tabelas propriedades --lote 100000 --relatorio logs/auditoria.json
+"""
+
+AUDITORIA_LOTE = int(os.getenv("AUDITORIA_LOTE", "50000"))
+AUDITORIA_PROCESSOS = int(os.getenv("AUDITORIA_PROCESSOS", str(os.cpu_count() or 1)))
+
+
+def _blocos(conexao: Connection, query, lote: int) -> Iterator[Dict[str, np.ndarray]]:
+    """Blocos de até `lote` linhas, como um array por coluna"""
+    resultado = conexao.execution_options(stream_results=True, yield_per=lote).execute(query)
+    colunas = list(resultado.keys())
+    for particao in resultado.partitions():
+        yield {coluna: np.array(valores) for coluna, valores in zip(colunas, zip(*particao))}
+
+
+def _ids_existentes(conexao: Connection, coluna) -> np.ndarray:
+    return np.fromiter(conexao.execute(select(coluna)).scalars(), dtype=np.int64)
+
+
+class Violacoes:
+    """Ids que violam cada regra, acumulados bloco a bloco"""
+
+    def __init__(self, *regras: str):
+        self.ids: Dict[str, List[int]] = {regra: [] for regra in regras}
+
+    def registrar(self, regra: str, ids: np.ndarray, mascara: np.ndarray):
+        self.ids[regra].extend(ids[mascara].tolist())
+
+
+"""
+Regras por tabela
+Cada função percorre a tabela em blocos e devolve (linhas lidas, violações)
+"""
+
+
+def auditar_produtores(conexao: Connection, lote: int):
+    violacoes = Violacoes("documento_invalido")
+    linhas = 0
+    query = select(ProdutorRural.id, ProdutorRural.cpf_cnpj)
+    for bloco in _blocos(conexao, query, lote):
+        linhas += len(bloco["id"])
+        violacoes.registrar("documento_invalido", bloco["id"], ~validar_lote(bloco["cpf_cnpj"]))
+    return linhas, violacoes
+
+
+def auditar_propriedades(conexao: Connection, lote: int):
+    violacoes = Violacoes("area_nao_positiva", "soma_areas_excede_total", "produtor_inexistente")
+    produtores = _ids_existentes(conexao, ProdutorRural.id)
+    linhas = 0
+    query = select(
+        Propriedade.id, Propriedade.area_total, Propriedade.area_agricultavel, Propriedade.area_vegetacao,
+        Propriedade.produtor_id
+    )
+    for bloco in _blocos(conexao, query, lote):
+        ids = bloco["id"]
+        linhas += len(ids)
+        total, agricultavel, vegetacao = (
+            bloco[coluna].astype(float) for coluna in ("area_total", "area_agricultavel", "area_vegetacao")
+        )
+        violacoes.registrar("area_nao_positiva", ids, (total <= 0) | (agricultavel <= 0) | (vegetacao <= 0))
+        violacoes.registrar("soma_areas_excede_total", ids, agricultavel + vegetacao > total)
+        violacoes.registrar("produtor_inexistente", ids, ~np.isin(bloco["produtor_id"], produtores))
+    return linhas, violacoes
+
+
+def _auditar_associacoes(modelo, conexao: Connection, lote: int):
+    violacoes = Violacoes("propriedade_inexistente", "safra_inexistente", "cultura_inexistente", "plantio_duplicado")
+    existentes = {
+        "propriedade_id": _ids_existentes(conexao, Propriedade.id),
+        "safra_id": _ids_existentes(conexao, Safra.id),
+        "cultura_id": _ids_existentes(conexao, Cultura.id),
+    }
+    # Ordenado pela associação: duplicatas ficam em linhas vizinhas, inclusive entre um bloco e o seguinte
+    chave = (modelo.propriedade_id, modelo.safra_id, modelo.cultura_id)
+    query = select(modelo.id, *chave).order_by(*chave, modelo.id)
+    anterior = np.full(3, -1)
+    linhas = 0
+    for bloco in _blocos(conexao, query, lote):
+        ids = bloco["id"]
+        linhas += len(ids)
+        for coluna, regra in (("propriedade_id", "propriedade_inexistente"), ("safra_id", "safra_inexistente"),
+                              ("cultura_id", "cultura_inexistente")):
+            violacoes.registrar(regra, ids, ~np.isin(bloco[coluna], existentes[coluna]))
+
+        # A primeira ocorrência (menor id) é mantida; as demais são duplicatas
+        associacoes = np.column_stack([bloco["propriedade_id"], bloco["safra_id"], bloco["cultura_id"]])
+        vizinhas = np.vstack([anterior, associacoes[:-1]])
+        violacoes.registrar("plantio_duplicado", ids, (associacoes == vizinhas).all(axis=1))
+        anterior = associacoes[-1]
+    return linhas, violacoes
+
+
+def auditar_associacoes(conexao: Connection, lote: int):
+    return _auditar_associacoes(PropriedadeSafraCultura, conexao, lote)
+
+
+def auditar_associacoes_arquivadas(conexao: Connection, lote: int):
+    return _auditar_associacoes(PropriedadeSafraCulturaArquivo, conexao, lote)
+
+
+AUDITORIAS = {
+    "produtores": auditar_produtores,
+    "propriedades": auditar_propriedades,
+    "propriedade_safra_cultura": auditar_associacoes,
+    "propriedade_safra_cultura_arquivo": auditar_associacoes_arquivadas,
+}
+
+
+def auditar_tabela(url: str, tabela: str, lote: int = AUDITORIA_LOTE) -> Dict:
+    """Audita uma tabela com uma engine própria (executado em um processo do pool)"""
+    engine = create_engine(url)
+    try:
+        inicio = time.perf_counter()
+        with engine.connect() as conexao:
+            linhas, violacoes = AUDITORIAS[tabela](conexao, lote)
+        segundos = time.perf_counter() - inicio
+    finally:
+        engine.dispose()
+    return {
+        "tabela": tabela,
+        "linhas": linhas,
+        "segundos": round(segundos, 3),
+        "linhas_por_segundo": round(linhas / segundos, 1) if segundos else 0.0,
+        "violacoes": violacoes.ids,
+    }
+
+
+def auditar(url: str = DATABASE_URL, tabelas: Optional[List[str]] = None, lote: int = AUDITORIA_LOTE,
+            processos: int = AUDITORIA_PROCESSOS) -> Dict:
+    tabelas = tabelas or list(AUDITORIAS)
+    inicio = time.perf_counter()
+    if processos <= 1 or len(tabelas) == 1:
+        resultados = [auditar_tabela(url, tabela, lote) for tabela in tabelas]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(tabelas))) as pool:
+            resultados = list(pool.map(auditar_tabela, [url] * len(tabelas), tabelas, [lote] * len(tabelas)))
+    segundos = time.perf_counter() - inicio
+
+    linhas = sum(resultado["linhas"] for resultado in resultados)
+    return {
+        "executado_em": datetime.now().isoformat(timespec="seconds"),
+        "linhas": linhas,
+        "segundos": round(segundos, 3),
+        "linhas_por_segundo": round(linhas / segundos, 1) if segundos else 0.0,
+        "violacoes": sum(len(ids) for resultado in resultados for ids in resultado["violacoes"].values()),
+        "tabelas": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auditoria de integridade do banco")
+    parser.add_argument("--tabelas", nargs="+", choices=sorted(AUDITORIAS), help="Tabelas auditadas (padrão: todas)")
+    parser.add_argument("--lote", type=int, default=AUDITORIA_LOTE, help="Linhas lidas por bloco")
+    parser.add_argument("--processos", type=int, default=AUDITORIA_PROCESSOS, help="Tabelas auditadas em paralelo")
+    parser.add_argument("--relatorio", default="logs/auditoria.json", help="Arquivo JSON do relatório")
+    args = parser.parse_args()
+
+    relatorio = auditar(DATABASE_URL, args.tabelas, args.lote, args.processos)
+    caminho = Path(args.relatorio)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False))
+
+    for resultado in relatorio["tabelas"]:
+        encontradas = {regra: len(ids) for regra, ids in resultado["violacoes"].items() if ids}
+        app_logger.info(f"{resultado['tabela']}: {resultado['linhas']} linhas em {resultado['segundos']}s "
+                        f"({resultado['linhas_por_segundo']:.0f} linhas/s) | violações: {encontradas or 'nenhuma'}")
+    app_logger.info(f"Auditoria: {relatorio['linhas']} linhas, {relatorio['violacoes']} violações, "
+                    f"{relatorio['linhas_por_segundo']:.0f} linhas/s | relatório em {caminho}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.utils.logger import app_logger, log_dedicado
+from app.utils.metricas_http import rota_template
+
+"""
+Registro de consultas lentas
+- Statements executados durante uma requisição (rotas da API, inclusive as chamadas pelo dashboard) que levam
+  SQL_LENTA_MS ou mais são registrados com o SQL, o formato dos parâmetros (tipos e tamanhos, nunca os valores),
+  a duração, a rota e o request_id
+- O plano é obtido depois que o statement terminou, em segundo plano e em outra conexão da mesma engine:
+  EXPLAIN (ANALYZE off) no PostgreSQL e EXPLAIN QUERY PLAN no SQLite; nenhum dos dois executa o statement
+- Um EXPLAIN por statement a cada SQL_LENTA_EXPLAIN_INTERVALO_S (as ocorrências seguintes reaproveitam o plano)
+  e no máximo SQL_LENTA_EXPLAINS_SIMULTANEOS em andamento, para não pesar sobre um banco que já está lento
+- Cada ocorrência vira uma linha JSON em logs/consultas_lentas.log (rotacionado, ao lado de errors.log) e entra
+  nas últimas SQL_LENTA_MEMORIA ocorrências do worker, listadas em GET /metrics/consultas-lentas
+"""
+
+SQL_LENTA_MS = float(os.getenv("SQL_LENTA_MS", "200"))
+SQL_LENTA_EXPLAIN_INTERVALO_S = float(os.getenv("SQL_LENTA_EXPLAIN_INTERVALO_S", "300"))
+SQL_LENTA_EXPLAINS_SIMULTANEOS = int(os.getenv("SQL_LENTA_EXPLAINS_SIMULTANEOS", "2"))
+SQL_LENTA_MEMORIA = int(os.getenv("SQL_LENTA_MEMORIA", "200"))
+
+ARQUIVO_CONSULTAS_LENTAS = "consultas_lentas.log"
+# Statements cujo plano interessa; DDL, BEGIN/SET e INSERT ficam sem EXPLAIN
+PREFIXOS_EXPLAIN = ("select", "with", "update", "delete")
+MAX_PLANOS = 1000
+
+
+def _formato(valor) -> str:
+    if isinstance(valor, (str, bytes, list, tuple, set)):
+        return f"{type(valor).__name__}[{len(valor)}]"
+    return type(valor).__name__
+
+
+def formato_parametros(parametros):
+    """Tipos (e tamanhos de textos e listas) dos parâmetros, ex.: ["int", "str[11]", "list[500]"]"""
+    if isinstance(parametros, dict):
+        return {nome: _formato(valor) for nome, valor in parametros.items()}
+    return [_formato(valor) for valor in parametros or ()]
+
+
+async def explicar(engine, statement: str, parametros) -> Optional[List[str]]:
+    """Plano do statement (uma linha por nó) em uma conexão própria da engine síncrona de uma AsyncEngine"""
+    dialeto = engine.dialect.name
+    if dialeto == "postgresql":
+        prefixo = "EXPLAIN (ANALYZE off) "
+    elif dialeto == "sqlite":
+        prefixo = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+    async with AsyncEngine(engine).connect() as conn:
+        resultado = await conn.exec_driver_sql(prefixo + statement, parametros,
+                                               execution_options={"fora_do_orcamento": True})
+        # PostgreSQL: uma coluna "QUERY PLAN"; SQLite: (id, parent, notused, detail)
+        return [str(linha[-1]) for linha in resultado.all()]
+
+
+class RegistroConsultasLentas:
+    def __init__(self, limite_ms: float = SQL_LENTA_MS, memoria: int = SQL_LENTA_MEMORIA,
+                 intervalo_explain_s: float = SQL_LENTA_EXPLAIN_INTERVALO_S,
+                 explains_simultaneos: int = SQL_LENTA_EXPLAINS_SIMULTANEOS):
+        self.limite_s = limite_ms / 1000
+        self.intervalo_explain = intervalo_explain_s
+        self.explains_simultaneos = explains_simultaneos
+        self.recentes: Deque[dict] = deque(maxlen=memoria)
+        # statement -> (instante do EXPLAIN, plano; None enquanto pendente ou se falhou)
+        self.planos: Dict[str, Tuple[float, Optional[List[str]]]] = {}
+        self.explains_em_andamento = 0
+        self.escrever = None
+        self._tarefas = set()
+
+    def registrar(self, conn, statement: str, parametros, executemany: bool, duracao: float, consultas):
+        """Chamado por instrumentacao_sql (after_cursor_execute) para statements acima do limite"""
+        lote = None
+        if executemany:
+            lote = list(parametros or ())
+            parametros = lote[0] if lote else ()
+        registro = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "request_id": consultas.request_id,
+            "method": consultas.request.method if consultas.request is not None else None,
+            "route": rota_template(consultas.request) if consultas.request is not None else None,
+            "duration_ms": round(duracao * 1000, 3),
+            "sql": " ".join(statement.split()),
+            "parametros": formato_parametros(parametros),
+            "lote": len(lote) if lote is not None else None,
+            "explain": "indisponivel",
+            "plano": None,
+        }
+        self.recentes.append(registro)
+
+        agora = time.monotonic()
+        anterior = self.planos.get(statement)
+        if anterior is not None and agora - anterior[0] < self.intervalo_explain:
+            if anterior[1] is not None:
+                registro["explain"], registro["plano"] = "reaproveitado", anterior[1]
+            return self._gravar(registro)
+        if (not registro["sql"].lower().startswith(PREFIXOS_EXPLAIN)
+                or self.explains_em_andamento >= self.explains_simultaneos):
+            return self._gravar(registro)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self._gravar(registro)
+
+        if len(self.planos) >= MAX_PLANOS:
+            self.planos = {chave: valor for chave, valor in self.planos.items()
+                           if agora - valor[0] < self.intervalo_explain}
+        # Reserva o statement: ocorrências enquanto o EXPLAIN está pendente não disparam outro
+        self.planos[statement] = (agora, None)
+        self.explains_em_andamento += 1
+        tarefa = loop.create_task(self._explicar(conn.engine, statement, parametros, registro))
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _explicar(self, engine, statement: str, parametros, registro: dict):
+        try:
+            plano = await explicar(engine, statement, parametros)
+            if plano is not None:
+                registro["explain"], registro["plano"] = "obtido", plano
+                self.planos[statement] = (time.monotonic(), plano)
+        except Exception as e:
+            registro["explain"] = "falhou"
+            registro["erro"] = str(e)[:300]
+        finally:
+            self.explains_em_andamento -= 1
+            self._gravar(registro)
+
+    async def aguardar(self):
+        """Aguarda os EXPLAINs em andamento (testes e encerramento)"""
+        if self._tarefas:
+            await asyncio.gather(*self._tarefas, return_exceptions=True)
+
+    def _gravar(self, registro: dict):
+        try:
+            if self.escrever is None:
+                self.escrever = log_dedicado(ARQUIVO_CONSULTAS_LENTAS)
+            self.escrever(json.dumps(registro, ensure_ascii=False, default=str))
+        except Exception as e:
+            app_logger.warning(f"Consulta lenta não registrada em {ARQUIVO_CONSULTAS_LENTAS}: {e}")
+
+    def listar(self, limite: int, rota: Optional[str] = None) -> List[dict]:
+        """Ocorrências mais recentes primeiro"""
+        registros = [registro for registro in reversed(self.recentes) if rota is None or registro["route"] == rota]
+        return registros[:limite]
+
+
+consultas_lentas = RegistroConsultasLentas()
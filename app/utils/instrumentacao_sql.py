@@ -0,0 +1,117 @@
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.consultas_lentas import consultas_lentas
+from app.utils.logger import app_logger
+
+"""
+Instrumentação das consultas SQL por requisição
+- before/after_cursor_execute atribuem à requisição atual a quantidade de consultas, o tempo total no banco
+  e as linhas retornadas (quando o driver informa); o middleware devolve os totais no cabeçalho Server-Timing
+  e nas métricas da rota (GET /metrics)
+- N+1: um aviso é registrado quando o mesmo statement (mesmo SQL, parâmetros à parte) se repete mais de
+  SQL_N_MAIS_1_LIMITE vezes na mesma requisição, uma vez por statement
+- Statements acima de SQL_LENTA_MS seguem para o registro de consultas lentas (consultas_lentas), com a rota
+  e o request_id da requisição
+- Sem requisição ativa (Alembic, seeds, auditoria) nada é registrado
+"""
+
+SQL_N_MAIS_1_LIMITE = int(os.getenv("SQL_N_MAIS_1_LIMITE", "10"))
+
+CHAVE_INICIO = "instrumentacao_inicio"
+
+
+class ConsultasRequisicao:
+    def __init__(self, limite_repeticoes: int = SQL_N_MAIS_1_LIMITE, request=None, request_id: Optional[str] = None):
+        self.limite_repeticoes = limite_repeticoes
+        self.request = request
+        self.request_id = request_id
+        self.consultas = 0
+        self.tempo_s = 0.0
+        self.linhas = 0
+        self.repeticoes: Dict[str, int] = {}
+        self.avisos_n_mais_1 = 0
+
+    def registrar(self, statement: str, duracao: float, linhas: int):
+        self.consultas += 1
+        self.tempo_s += duracao
+        self.linhas += linhas
+        repeticoes = self.repeticoes[statement] = self.repeticoes.get(statement, 0) + 1
+        if repeticoes == self.limite_repeticoes + 1:
+            self.avisos_n_mais_1 += 1
+            app_logger.warning(
+                f"Possível N+1: statement repetido mais de {self.limite_repeticoes} vezes na requisição: "
+                f"{' '.join(statement.split())[:200]}"
+            )
+
+
+_consultas_atual: ContextVar[Optional[ConsultasRequisicao]] = ContextVar("consultas_requisicao", default=None)
+
+
+def iniciar_instrumentacao(request=None, request_id: Optional[str] = None) -> ConsultasRequisicao:
+    """Chamado pelo middleware antes de a requisição seguir: o objeto é compartilhado com a tarefa da rota"""
+    consultas = ConsultasRequisicao(request=request, request_id=request_id)
+    _consultas_atual.set(consultas)
+    return consultas
+
+
+def _linhas_retornadas(cursor) -> int:
+    if cursor is None or cursor.description is None:
+        return 0
+    if cursor.rowcount is not None and cursor.rowcount >= 0:
+        return cursor.rowcount
+    # aiosqlite/asyncpg (adaptados pelo SQLAlchemy) já buscaram as linhas, mas informam rowcount = -1 no SELECT
+    linhas = getattr(cursor, "_rows", None)
+    return len(linhas) if linhas is not None else 0
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def iniciar_consulta(conn, cursor, statement, parameters, context, executemany):
+    if _consultas_atual.get() is not None:
+        conn.info[CHAVE_INICIO] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def registrar_consulta(conn, cursor, statement, parameters, context, executemany):
+    consultas = _consultas_atual.get()
+    inicio = conn.info.pop(CHAVE_INICIO, None)
+    if consultas is None or inicio is None:
+        return
+    if context is not None and context.execution_options.get("fora_do_orcamento"):
+        return
+    duracao = time.perf_counter() - inicio
+    consultas.registrar(statement, duracao, _linhas_retornadas(cursor))
+    if duracao >= consultas_lentas.limite_s:
+        consultas_lentas.registrar(conn, statement, parameters, executemany, duracao, consultas)
+
+
+"""
+Cabeçalho Server-Timing
+- db: tempo total no banco (ms); db-consultas e db-linhas: totais da requisição; total: duração da requisição
+- Ex.: Server-Timing: db;dur=3.214, db-consultas;desc="5", db-linhas;desc="12", total;dur=10.532
+"""
+
+
+def server_timing(consultas: ConsultasRequisicao, duracao: float) -> str:
+    return (
+        f'db;dur={consultas.tempo_s * 1000:.3f}, db-consultas;desc="{consultas.consultas}", '
+        f'db-linhas;desc="{consultas.linhas}", total;dur={duracao * 1000:.3f}'
+    )
+
+
+SERVER_TIMING_ITEM = re.compile(r'([\w-]+)(?:;dur=([\d.]+))?(?:;desc="([^"]*)")?')
+
+
+def ler_server_timing(valor: str) -> Dict[str, str]:
+    """Valores do cabeçalho por nome (dur ou desc), ex.: {"db": "3.214", "db-consultas": "5", ...}"""
+    itens = {}
+    for item in valor.split(","):
+        encontrado = SERVER_TIMING_ITEM.match(item.strip())
+        if encontrado:
+            nome, duracao, descricao = encontrado.groups()
+            itens[nome] = duracao if duracao is not None else descricao
+    return itens
@@ -0,0 +1,259 @@
+import argparse
+import gzip
+import io
+import json
+import math
+import os
+import re
+import time
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+"""
+Análise das linhas de requisição dos logs (log_api_request)
+- Lê logs/app.log e os arquivos rotacionados (app.*.log.zip) em sequência, linha a linha: os .zip são lidos
+  direto do arquivo compactado, sem extrair para o disco
+- Aceita os dois formatos de LOG_FORMATO: texto ("... - API Request: GET /produtores/1 - 200 (0.012s)") e JSON
+  (campos time, method, path, status, duration_ms, amostra); nos dois, ids numéricos do caminho viram {id}, de
+  modo que as linhas de uma mesma rota se somam mesmo em logs com os dois formatos
+- Percentis (p50/p95/p99) de um histograma logarítmico esparso (erro relativo de até PRECISAO): a memória
+  depende de rotas e intervalos, não da quantidade de linhas
+- Por rota e por intervalo de tempo: requisições, vazão (req/s), p50/p95/p99 e taxas de 4xx e 5xx
+- Amostragem: cada linha traz a probabilidade com que foi registrada (campo amostra no JSON, " [amostra 0.01]"
+  no texto, omitido quando 1) e vale 1/amostra requisições; com LOG_REQUISICOES_AMOSTRA < 1 apenas parte das
+  respostas bem-sucedidas é registrada (4xx/5xx sempre)
+- --amostra: apenas para linhas gravadas sem o valor da amostra (logs antigos), pondera as bem-sucedidas
+Uso: python -m app.utils.loganalytics
+     python -m app.utils.loganalytics --intervalo 15m --rota "GET /dashboard/" --relatorio logs/latencias.json
+"""
+
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+PRECISAO = 0.01
+MENOR_MS = 0.001
+
+MARCADOR = "API Request: "
+# Mensagem de log_api_request, casada a partir do marcador; o minuto são os 16 primeiros caracteres da linha
+PADRAO_TEXTO = re.compile(r"API Request: (\S+) (\S+) - (\d{3}) \((\d+(?:\.\d+)?)s\)(?: \[amostra ([\d.e-]+)\])?")
+IDS_NO_CAMINHO = re.compile(r"/\d+(?=/|$)")
+UNIDADES_INTERVALO = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+EPOCA = datetime(1970, 1, 1)
+
+_FATOR = 1 / math.log1p(PRECISAO)
+_LOG_MENOR = math.log(MENOR_MS)
+# Caches de caminho -> rota e duração -> faixa (o texto tem resolução de 1 ms: poucas durações distintas)
+MAX_CACHE = 10000
+
+
+def faixa(ms: float) -> int:
+    return int((math.log(ms) - _LOG_MENOR) * _FATOR) if ms > MENOR_MS else 0
+
+
+class Latencias:
+    """Histograma logarítmico esparso das latências (ms), com requisições e erros ponderados pela amostragem"""
+
+    __slots__ = ("faixas", "requisicoes", "erros_4xx", "erros_5xx")
+
+    def __init__(self):
+        self.faixas: Dict[int, float] = {}
+        self.requisicoes = 0.0
+        self.erros_4xx = 0.0
+        self.erros_5xx = 0.0
+
+    def adicionar(self, faixa_ms: int, status: int, peso: float):
+        self.faixas[faixa_ms] = self.faixas.get(faixa_ms, 0.0) + peso
+        self.requisicoes += peso
+        if status >= 500:
+            self.erros_5xx += peso
+        elif status >= 400:
+            self.erros_4xx += peso
+
+    def percentil(self, q: float) -> float:
+        alvo = q * self.requisicoes
+        acumulado = 0.0
+        for faixa in sorted(self.faixas):
+            acumulado += self.faixas[faixa]
+            if acumulado >= alvo:
+                # Centro geométrico da faixa
+                return MENOR_MS * (1 + PRECISAO) ** (faixa + 0.5)
+        return 0.0
+
+    def resumo(self, segundos: float) -> dict:
+        return {
+            "requisicoes": round(self.requisicoes),
+            "req_por_s": round(self.requisicoes / segundos, 3) if segundos > 0 else 0.0,
+            "p50_ms": round(self.percentil(0.50), 3),
+            "p95_ms": round(self.percentil(0.95), 3),
+            "p99_ms": round(self.percentil(0.99), 3),
+            "taxa_4xx": round(self.erros_4xx / self.requisicoes, 4) if self.requisicoes else 0.0,
+            "taxa_5xx": round(self.erros_5xx / self.requisicoes, 4) if self.requisicoes else 0.0,
+        }
+
+
+def ler_intervalo(valor: str) -> int:
+    """"15m", "1h", "1d" em segundos"""
+    encontrado = re.fullmatch(r"(\d+)([smhd])", valor.strip())
+    if not encontrado:
+        raise argparse.ArgumentTypeError(f"Intervalo inválido: {valor} (ex.: 30s, 15m, 1h, 1d)")
+    return int(encontrado.group(1)) * UNIDADES_INTERVALO[encontrado.group(2)]
+
+
+def arquivos_de_log(diretorio: str) -> List[Path]:
+    """app.log e os rotacionados (app.<data>.log[.zip|.gz]), do mais antigo ao atual (a data está no nome)"""
+    return sorted(Path(diretorio).glob("app*.log*"), key=lambda caminho: (caminho.name == "app.log", caminho.name))
+
+
+def linhas(caminho: Path) -> Iterator[str]:
+    if caminho.suffix == ".zip":
+        with zipfile.ZipFile(caminho) as compactado:
+            for nome in compactado.namelist():
+                with compactado.open(nome) as membro:
+                    yield from io.TextIOWrapper(membro, encoding="utf-8", errors="replace")
+    elif caminho.suffix == ".gz":
+        with gzip.open(caminho, "rt", encoding="utf-8", errors="replace") as compactado:
+            yield from compactado
+    else:
+        with open(caminho, encoding="utf-8", errors="replace") as arquivo:
+            yield from arquivo
+
+
+def requisicoes(fonte: Iterator[str]) -> Iterator[Tuple[str, str, int, int, Optional[float]]]:
+    """
+    (minuto "AAAA-MM-DD HH:MM", "MÉTODO rota", status, faixa da duração, amostra) de cada linha de requisição;
+    amostra é None nas linhas gravadas sem ela
+    """
+    rotas: Dict[Tuple[str, str], str] = {}
+    faixas: Dict[str, int] = {}
+    for linha in fonte:
+        posicao = linha.find(MARCADOR)
+        if posicao < 0:
+            continue
+        if linha.startswith("{"):
+            try:
+                registro = json.loads(linha)
+                rota = IDS_NO_CAMINHO.sub("/{id}", registro["path"])
+                amostra = registro.get("amostra")
+                yield (registro["time"][:16].replace("T", " "), f"{registro['method']} {rota}",
+                       int(registro["status"]), faixa(float(registro["duration_ms"])),
+                       float(amostra) if amostra is not None else None)
+            except (ValueError, KeyError, TypeError):
+                continue
+            continue
+        encontrado = PADRAO_TEXTO.match(linha, posicao)
+        if encontrado is None:
+            continue
+        metodo, caminho, status, segundos, amostra = encontrado.groups()
+        chave = rotas.get((metodo, caminho))
+        if chave is None:
+            if len(rotas) >= MAX_CACHE:
+                rotas.clear()
+            chave = rotas[(metodo, caminho)] = f"{metodo} {IDS_NO_CAMINHO.sub('/{id}', caminho)}"
+        faixa_ms = faixas.get(segundos)
+        if faixa_ms is None:
+            if len(faixas) >= MAX_CACHE:
+                faixas.clear()
+            faixa_ms = faixas[segundos] = faixa(float(segundos) * 1000)
+        # Sem o sufixo, a linha foi registrada com amostra 1 ou antes de o valor ser gravado
+        yield linha[:16], chave, int(status), faixa_ms, float(amostra) if amostra is not None else None
+
+
+def analisar(arquivos: List[Path], intervalo_s: int = 3600, amostra: float = 1.0,
+             rota: Optional[str] = None) -> dict:
+    inicio = time.perf_counter()
+    por_rota: Dict[str, Latencias] = {}
+    por_intervalo: Dict[int, Latencias] = {}
+    peso_sucesso = 1 / amostra
+    ultimo_minuto, segundo_minuto = None, 0
+    primeiro, ultimo = None, None
+    linhas_de_requisicao = 0
+
+    for caminho in arquivos:
+        for minuto, chave, status, faixa_ms, amostra_linha in requisicoes(linhas(caminho)):
+            if rota is not None and chave != rota:
+                continue
+            # As linhas chegam em ordem: o minuto só é convertido quando muda
+            if minuto != ultimo_minuto:
+                try:
+                    segundo_minuto = int((datetime.fromisoformat(minuto) - EPOCA).total_seconds())
+                except ValueError:
+                    continue
+                ultimo_minuto = minuto
+                primeiro = segundo_minuto if primeiro is None else min(primeiro, segundo_minuto)
+                ultimo = segundo_minuto if ultimo is None else max(ultimo, segundo_minuto)
+            linhas_de_requisicao += 1
+            if amostra_linha is not None and amostra_linha > 0:
+                peso = 1 / amostra_linha
+            else:
+                peso = peso_sucesso if status < 400 else 1.0
+            latencias = por_rota.get(chave)
+            if latencias is None:
+                latencias = por_rota[chave] = Latencias()
+            latencias.adicionar(faixa_ms, status, peso)
+            janela = segundo_minuto - segundo_minuto % intervalo_s
+            latencias = por_intervalo.get(janela)
+            if latencias is None:
+                latencias = por_intervalo[janela] = Latencias()
+            latencias.adicionar(faixa_ms, status, peso)
+
+    # Período coberto pelos logs, do primeiro ao último minuto com requisições
+    periodo_s = (ultimo - primeiro + 60) if primeiro is not None else 0
+    return {
+        "arquivos": [str(caminho) for caminho in arquivos],
+        "linhas_de_requisicao": linhas_de_requisicao,
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "inicio": (EPOCA + timedelta(seconds=primeiro)).isoformat(sep=" ") if primeiro is not None else None,
+        "fim": (EPOCA + timedelta(seconds=ultimo + 60)).isoformat(sep=" ") if ultimo is not None else None,
+        "intervalo_s": intervalo_s,
+        "rotas": {
+            chave: latencias.resumo(periodo_s)
+            for chave, latencias in sorted(por_rota.items(), key=lambda item: -item[1].requisicoes)
+        },
+        "intervalos": {
+            (EPOCA + timedelta(seconds=janela)).isoformat(sep=" "): latencias.resumo(intervalo_s)
+            for janela, latencias in sorted(por_intervalo.items())
+        },
+    }
+
+
+def _tabela(titulo: str, linhas_resumo: Dict[str, dict]):
+    largura = max([len(titulo)] + [len(nome) for nome in linhas_resumo])
+    print(f"{titulo:<{largura}} {'req':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'4xx %':>7} {'5xx %':>7}")
+    for nome, r in linhas_resumo.items():
+        print(f"{nome:<{largura}} {r['requisicoes']:>9} {r['req_por_s']:>9.3f} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['taxa_4xx'] * 100:>7.2f} {r['taxa_5xx'] * 100:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Percentis de latência por rota e intervalo a partir dos logs")
+    parser.add_argument("arquivos", nargs="*", help="Arquivos de log (padrão: app.log e rotacionados em LOG_DIR)")
+    parser.add_argument("--dir", default=LOG_DIR, help="Diretório dos logs")
+    parser.add_argument("--intervalo", type=ler_intervalo, default=ler_intervalo("1h"),
+                        help="Tamanho dos intervalos de tempo (ex.: 15m, 1h, 1d)")
+    parser.add_argument("--amostra", type=float, default=1.0,
+                        help="LOG_REQUISICOES_AMOSTRA de logs gravados sem o valor da amostra (logs antigos)")
+    parser.add_argument("--rota", help='Apenas uma rota, ex.: "GET /produtores/{id}"')
+    parser.add_argument("--relatorio", help="Arquivo JSON com o resultado completo")
+    args = parser.parse_args()
+    if not 0 < args.amostra <= 1:
+        parser.error("--amostra deve estar entre 0 (exclusive) e 1")
+
+    arquivos = [Path(arquivo) for arquivo in args.arquivos] or arquivos_de_log(args.dir)
+    resultado = analisar(arquivos, args.intervalo, args.amostra, args.rota)
+
+    print(f"{len(arquivos)} arquivos, {resultado['linhas_de_requisicao']} linhas de requisição em "
+          f"{resultado['segundos']}s | {resultado['inicio']} a {resultado['fim']}\n")
+    _tabela("rota", resultado["rotas"])
+    print()
+    _tabela("intervalo", resultado["intervalos"])
+
+    if args.relatorio:
+        caminho = Path(args.relatorio)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        caminho.write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
+        print(f"\nRelatório em {caminho}")
+
+
+if __name__ == "__main__":
+    main()
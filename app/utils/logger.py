@@ -1,46 +1,143 @@
+import copy
+import json
 import logging
+import os
+import queue
 import sys
+import threading
 from loguru import logger
 from pathlib import Path
 
 """
 Configura o sistema de logs
 Utiliza loguru para logs estruturados e rotacionados
+- LOG_ASSINCRONO: a requisição apenas formata o registro e o coloca em uma fila; uma thread dedicada escreve
+  no console e nos arquivos, e a rotação/compactação na virada de LOG_ROTACAO acontece nessa thread
+- LOG_FORMATO: "texto" (padrão, colorido no console) ou "json" (um objeto por linha, com os campos de contexto:
+  request_id, método, rota, status, tempos)
+- LOG_DIR: diretório de app.log, errors.log e dos logs dedicados (log_dedicado, ex.: consultas_lentas.log)
 """
 
+LOG_ASSINCRONO = os.getenv("LOG_ASSINCRONO", "true").lower() == "true"
+LOG_FORMATO = os.getenv("LOG_FORMATO", "texto").lower()
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+LOG_ROTACAO = os.getenv("LOG_ROTACAO", "10 MB")
+# Registros aguardando a escrita; com a fila cheia os novos registros são descartados (e contados)
+LOG_FILA_MAX = int(os.getenv("LOG_FILA_MAX", "10000"))
 
-# Configurar logs
-def setup_logger():
-    # Remover handler padrão do loguru
-    logger.remove()
+FORMATO_TEXTO = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
 
-    # Configurar formato dos logs
-    log_format = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
 
-    # Log para console
-    logger.add(
-        sys.stdout,
-        format=log_format,
-        level="INFO",
-        colorize=True
-    )
+def formatar_json(record) -> str:
+    """Registro em uma linha JSON; os campos de contexto (bind/contextualize) vão no primeiro nível"""
+    dados = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "message": record["message"],
+        **{chave: valor for chave, valor in record["extra"].items() if chave != "_json"},
+    }
+    if record["exception"] is not None:
+        tipo, valor, _ = record["exception"]
+        dados["exception"] = f"{tipo.__name__ if tipo else ''}: {valor}"
+    record["extra"]["_json"] = json.dumps(dados, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
 
+
+"""
+Escrita em segundo plano
+- O enqueue do loguru serializa cada registro (pickle) para uma fila entre processos, o que custa mais na
+  requisição do que a própria escrita; aqui a fila é do processo e recebe o texto já formatado
+- Os arquivos ficam em um logger independente (cópia do loguru sem handlers), usado só pela thread de escrita
+"""
+
+
+class EscritorLogs:
+    def __init__(self, tamanho_fila: int = LOG_FILA_MAX):
+        self.tamanho_fila = tamanho_fila
+        self.arquivos = None
+        self.descartados = 0
+        self._iniciar()
+
+    def _iniciar(self):
+        self.fila = queue.Queue(self.tamanho_fila)
+        self.thread = threading.Thread(target=self._executar, name="escritor-logs", daemon=True)
+        self.thread.start()
+
+    def reiniciar_apos_fork(self):
+        # O processo filho herda a fila, mas não a thread que a consome
+        self.descartados = 0
+        self._iniciar()
+
+    def sink_console(self, mensagem):
+        self._enfileirar((None, None, mensagem))
+
+    def sink_arquivos(self, mensagem):
+        self._enfileirar((self.arquivos, mensagem.record["level"].name, mensagem))
+
+    def escrever_em(self, destino, linha: str):
+        self._enfileirar((destino, "INFO", linha))
+
+    def _enfileirar(self, item):
+        try:
+            self.fila.put_nowait(item)
+        except queue.Full:
+            self.descartados += 1
+
+    def esvaziar(self, timeout: float = 5.0):
+        """Aguarda a escrita de tudo o que já foi enfileirado (encerramento da aplicação, benchmarks)"""
+        concluido = threading.Event()
+        self.fila.put(concluido)
+        concluido.wait(timeout)
+
+    def _executar(self):
+        while True:
+            item = self.fila.get()
+            # Drena o que já estiver na fila antes do flush do console
+            while item is not None:
+                if isinstance(item, threading.Event):
+                    sys.stdout.flush()
+                    item.set()
+                else:
+                    self._escrever(*item)
+                try:
+                    item = self.fila.get_nowait()
+                except queue.Empty:
+                    item = None
+            sys.stdout.flush()
+            if self.descartados:
+                descartados, self.descartados = self.descartados, 0
+                self.arquivos.warning(f"{descartados} registros de log descartados com a fila cheia")
+
+    def _escrever(self, destino, nivel, mensagem):
+        if destino is None:
+            sys.stdout.write(mensagem)
+        else:
+            destino.opt(raw=True).log(nivel, str(mensagem))
+
+
+escritor_logs = EscritorLogs() if LOG_ASSINCRONO else None
+if escritor_logs is not None and hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=escritor_logs.reiniciar_apos_fork)
+
+
+def _adicionar_arquivos(destino, log_format):
     # Log para arquivo
-    log_file = Path("logs/app.log")
-    log_file.parent.mkdir(exist_ok=True)
+    log_file = Path(LOG_DIR) / "app.log"
+    log_file.parent.mkdir(parents=True, exist_ok=True)
 
-    logger.add(
+    destino.add(
         log_file,
         format=log_format,
         level="DEBUG",
-        rotation="10 MB",
+        rotation=LOG_ROTACAO,
         retention="30 days",
         compression="zip"
     )
 
     # Log de erros separado
-    error_log_file = Path("logs/errors.log")
-    logger.add(
+    error_log_file = Path(LOG_DIR) / "errors.log"
+    destino.add(
         error_log_file,
         format=log_format,
         level="ERROR",
@@ -49,17 +146,73 @@ def setup_logger():
         compression="zip"
     )
 
+
+# Cópia do loguru sem handlers, base dos logs dedicados
+_logger_sem_handlers = None
+
+
+# Configurar logs
+def setup_logger():
+    global _logger_sem_handlers
+    # Remover handler padrão do loguru
+    logger.remove()
+    _logger_sem_handlers = copy.deepcopy(logger)
+
+    # Configurar formato dos logs
+    json_ativo = LOG_FORMATO == "json"
+    log_format = formatar_json if json_ativo else FORMATO_TEXTO
+
+    if escritor_logs is None:
+        # Log para console
+        logger.add(sys.stdout, format=log_format, level="INFO", colorize=not json_ativo)
+        _adicionar_arquivos(logger, log_format)
+        return logger
+
+    # Modo assíncrono: os sinks do logger só formatam e enfileiram; os arquivos são escritos pela thread
+    escritor_logs.arquivos = copy.deepcopy(logger)
+    _adicionar_arquivos(escritor_logs.arquivos, "{message}")
+    logger.add(escritor_logs.sink_console, format=log_format, level="INFO", colorize=not json_ativo)
+    logger.add(escritor_logs.sink_arquivos, format=log_format, level="DEBUG", colorize=False)
     return logger
 
 
+def log_dedicado(nome_arquivo: str, rotacao: str = LOG_ROTACAO, retencao: str = "30 days"):
+    """Arquivo de log próprio em LOG_DIR, fora de app.log; retorna a função que escreve uma linha nele"""
+    destino = copy.deepcopy(_logger_sem_handlers)
+    caminho = Path(LOG_DIR) / nome_arquivo
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    destino.add(caminho, format="{message}", level="INFO", rotation=rotacao, retention=retencao, compression="zip")
+
+    def escrever(linha: str):
+        if escritor_logs is not None:
+            escritor_logs.escrever_em(destino, linha + "\n")
+        else:
+            destino.opt(raw=True).info(linha + "\n")
+
+    return escrever
+
+
+def esvaziar_logs():
+    if escritor_logs is not None:
+        escritor_logs.esvaziar()
+
+
 # Instanciar logger configurado
 app_logger = setup_logger()
 
 
-def log_api_request(method: str, path: str, status_code: int, duration: float):
-    """Log de requisições da API"""
+def log_api_request(method: str, path: str, status_code: int, duration: float, amostra: float = 1.0, **campos):
+    """
+    Log de requisições da API; campos extras (rota, tempos do banco) vão para o registro estruturado
+    - amostra: probabilidade de a linha ter sido registrada, usada pela análise dos logs para ponderar a linha;
+      no texto aparece como " [amostra 0.01]" apenas quando menor que 1
+    """
     level = "INFO" if status_code < 400 else "WARNING" if status_code < 500 else "ERROR"
-    app_logger.log(level, f"API Request: {method} {path} - {status_code} ({duration:.3f}s)")
+    mensagem = f"API Request: {method} {path} - {status_code} ({duration:.3f}s)"
+    if amostra < 1:
+        mensagem += f" [amostra {amostra:g}]"
+    app_logger.bind(method=method, path=path, status=status_code, duration_ms=round(duration * 1000, 3),
+                    amostra=amostra, **campos).log(level, mensagem)
 
 
 def log_database_operation(operation: str, table: str, duration: float):
@@ -0,0 +1,72 @@
+import threading
+from typing import Dict, List, Tuple
+from app.utils.metricas_pool import HistogramaEspera
+
+"""
+Métricas das requisições HTTP (por worker)
+- Latência por rota em histograma; a rota é o caminho do template (ex.: /produtores/{produtor_id}),
+  não o caminho da URL, para que ids não multipliquem as séries
+- Contador de respostas por rota e status
+- Requisições em andamento no worker
+- Consultas SQL, tempo no banco, linhas retornadas e avisos de N+1 acumulados por rota (instrumentacao_sql)
+Medidas com relógio monotônico (time.perf_counter) pelo middleware em app/main.py
+"""
+
+# Limites superiores dos buckets do histograma de latência (segundos)
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Requisições que não casaram com nenhuma rota (404 de caminhos arbitrários) compartilham uma única série
+ROTA_NAO_MAPEADA = "nao_mapeada"
+
+
+class MetricasHttp:
+    def __init__(self, buckets=BUCKETS_LATENCIA):
+        self.buckets = buckets
+        self.latencias: Dict[Tuple[str, str], HistogramaEspera] = {}
+        self.respostas: Dict[Tuple[str, str, int], int] = {}
+        # (consultas, tempo no banco em s, linhas, avisos de N+1) por rota
+        self.banco: Dict[Tuple[str, str], List[float]] = {}
+        self.em_andamento = 0
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        with self._lock:
+            self.em_andamento += 1
+
+    def registrar(self, metodo: str, rota: str, status: int, duracao: float, consultas=None):
+        with self._lock:
+            self.em_andamento -= 1
+            chave = (metodo, rota, status)
+            self.respostas[chave] = self.respostas.get(chave, 0) + 1
+            histograma = self.latencias.get((metodo, rota))
+            if histograma is None:
+                histograma = self.latencias[(metodo, rota)] = HistogramaEspera(self.buckets)
+            if consultas is not None and consultas.consultas:
+                banco = self.banco.setdefault((metodo, rota), [0, 0.0, 0, 0])
+                banco[0] += consultas.consultas
+                banco[1] += consultas.tempo_s
+                banco[2] += consultas.linhas
+                banco[3] += consultas.avisos_n_mais_1
+        histograma.observar(duracao)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencias = dict(self.latencias)
+            respostas = dict(self.respostas)
+            banco = {chave: tuple(valores) for chave, valores in self.banco.items()}
+            em_andamento = self.em_andamento
+        return {
+            "latencias": {chave: histograma.snapshot() for chave, histograma in latencias.items()},
+            "respostas": respostas,
+            "banco": banco,
+            "em_andamento": em_andamento,
+        }
+
+
+metricas_http = MetricasHttp()
+
+
+def rota_template(request) -> str:
+    """Caminho do template da rota que atendeu a requisição (disponível após o roteamento)"""
+    rota = request.scope.get("route")
+    return getattr(rota, "path_format", None) or getattr(rota, "path", None) or ROTA_NAO_MAPEADA
@@ -0,0 +1,96 @@
+import threading
+import time
+from bisect import bisect_left
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+"""
+Métricas do pool de conexões
+- Histograma do tempo de espera por uma conexão (checkout), em segundos
+- Contadores de checkouts e de timeouts do pool
+"""
+
+# Limites superiores dos buckets do histograma de espera (segundos)
+BUCKETS_ESPERA = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class HistogramaEspera:
+    def __init__(self, buckets=BUCKETS_ESPERA):
+        self.buckets = buckets
+        self._contagens = [0] * (len(buckets) + 1)
+        self._soma = 0.0
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float):
+        with self._lock:
+            self._contagens[bisect_left(self.buckets, valor)] += 1
+            self._soma += valor
+
+    def snapshot(self):
+        """Contagens acumuladas por limite superior (formato Prometheus, incluindo +Inf)"""
+        with self._lock:
+            contagens = list(self._contagens)
+            soma = self._soma
+        acumulado = 0
+        buckets = {}
+        for limite, quantidade in zip(list(self.buckets) + [float("inf")], contagens):
+            acumulado += quantidade
+            buckets["+Inf" if limite == float("inf") else str(limite)] = acumulado
+        return {"buckets": buckets, "soma": soma, "contagem": acumulado}
+
+
+class EstatisticasPool:
+    def __init__(self):
+        self.espera = HistogramaEspera()
+        self.checkouts = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def registrar_checkout(self, duracao: float):
+        self.espera.observar(duracao)
+        with self._lock:
+            self.checkouts += 1
+
+    def registrar_timeout(self, duracao: float):
+        self.espera.observar(duracao)
+        with self._lock:
+            self.timeouts += 1
+
+
+estatisticas_pool = EstatisticasPool()
+
+
+class _MonitorarEspera:
+    """Mede o tempo de _do_get, que inclui a espera na fila e a abertura de conexões de overflow"""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except exc.TimeoutError:
+            estatisticas_pool.registrar_timeout(time.perf_counter() - inicio)
+            raise
+        estatisticas_pool.registrar_checkout(time.perf_counter() - inicio)
+        return conexao
+
+
+class QueuePoolMonitorado(_MonitorarEspera, QueuePool):
+    pass
+
+
+class AsyncAdaptedQueuePoolMonitorado(_MonitorarEspera, AsyncAdaptedQueuePool):
+    pass
+
+
+def estado_pool(pool) -> dict:
+    """Estado instantâneo do pool; pools sem fila (ex.: SQLite em memória) retornam zeros"""
+    if not isinstance(pool, QueuePool):
+        return {"tamanho": 0, "em_uso": 0, "ociosas": 0, "overflow": 0, "max_overflow": 0, "timeout": 0.0}
+    return {
+        "tamanho": pool.size(),
+        "em_uso": pool.checkedout(),
+        "ociosas": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+    }
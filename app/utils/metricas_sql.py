@@ -0,0 +1,49 @@
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+"""
+Métricas do cache de compilação de statements do SQLAlchemy
+- Cada execução é classificada por context.cache_hit: CACHE_HIT, CACHE_MISS, CACHING_DISABLED,
+  NO_CACHE_KEY (statement sem chave de cache, ex.: SQL textual) ou NO_DIALECT_SUPPORT
+- Um hit rate baixo em regime indica statements montados de forma que a chave varia a cada requisição
+"""
+
+
+class EstatisticasCacheSql:
+    def __init__(self):
+        self.contagens = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, situacao: str):
+        with self._lock:
+            self.contagens[situacao] = self.contagens.get(situacao, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            contagens = dict(self.contagens)
+        hits = contagens.get("CACHE_HIT", 0)
+        cacheaveis = hits + contagens.get("CACHE_MISS", 0)
+        return {
+            "contagens": contagens,
+            "hit_rate": hits / cacheaveis if cacheaveis else 0.0,
+        }
+
+
+estatisticas_cache_sql = EstatisticasCacheSql()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def registrar_cache_hit(conn, cursor, statement, parameters, context, executemany):
+    situacao = getattr(context, "cache_hit", None)
+    if situacao is not None:
+        estatisticas_cache_sql.registrar(getattr(situacao, "name", str(situacao)))
+
+
+def tamanho_cache_compilacao(engine) -> dict:
+    """Entradas no cache de compilação da engine (LRU por engine; capacidade em query_cache_size)"""
+    cache = getattr(engine, "_compiled_cache", None)
+    return {
+        "entradas": len(cache) if cache is not None else 0,
+        "capacidade": getattr(cache, "capacity", 0) if cache is not None else 0,
+    }
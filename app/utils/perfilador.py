@@ -0,0 +1,156 @@
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+from app.utils.logger import LOG_DIR, app_logger
+
+"""
+Profiling sob demanda de uma requisição
+- Ativado pelo cabeçalho X-Profile-Token (ou ?__profile=<token>) igual a PROFILING_TOKEN, ou por amostragem
+  (PROFILING_AMOSTRA, fração de 0 a 1); sem token e com amostra 0 o middleware apenas repassa a requisição
+- Uma thread amostra a pilha da thread do event loop a cada PROFILING_INTERVALO_MS enquanto a requisição
+  é atendida; só entram por completo as amostras em que a tarefa da requisição está executando (a pilha contém
+  o frame do middleware). As demais viram duas pilhas sintéticas, sem os frames de outras requisições:
+  "(event loop ocioso)", que inclui a espera pelo banco, e "(outras tarefas)"
+- Enquanto o profiling dura, sys.setswitchinterval é reduzido ao intervalo de amostragem para que a thread de
+  amostragem obtenha o GIL; a troca vale para o processo inteiro (todas as threads do worker) e o valor
+  anterior é restaurado ao final
+- O resultado vai para logs/profiles/ no formato de pilhas colapsadas ("f1;f2;f3 amostras"), aceito por
+  flamegraph.pl, speedscope e inferno; o caminho volta no cabeçalho X-Profile-Arquivo
+- Um profiling por vez no worker: requisições simultâneas seguem sem profiling
+Uso: curl -H "X-Profile-Token: $PROFILING_TOKEN" http://localhost:8008/dashboard/
+"""
+
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_AMOSTRA = float(os.getenv("PROFILING_AMOSTRA", "0"))
+PROFILING_INTERVALO_MS = float(os.getenv("PROFILING_INTERVALO_MS", "1"))
+DIRETORIO_PROFILES = Path(LOG_DIR) / "profiles"
+
+AMOSTRA_OCIOSA = "(event loop ocioso)"
+AMOSTRA_OUTRAS_TAREFAS = "(outras tarefas)"
+
+CABECALHO_TOKEN = b"x-profile-token"
+PARAMETRO_TOKEN = "__profile"
+
+
+class AmostradorPilhas:
+    """
+    Conta as pilhas de uma thread, amostradas por outra thread em intervalos fixos
+    - Com quadro_alvo, apenas as pilhas que passam por esse frame são registradas por completo
+    """
+
+    def __init__(self, thread_id: int, intervalo_s: float, quadro_alvo: Optional[FrameType] = None):
+        self.thread_id = thread_id
+        self.intervalo = intervalo_s
+        self.quadro_alvo = quadro_alvo
+        self.pilhas: Dict[str, int] = {}
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="perfilador", daemon=True)
+
+    def iniciar(self):
+        # Com o GIL, a thread de amostragem só roda a cada switch interval (5 ms por padrão); a troca afeta o processo
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.intervalo))
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            topo = frame
+            alvo_na_pilha = self.quadro_alvo is None
+            quadros = []
+            while frame is not None:
+                alvo_na_pilha = alvo_na_pilha or frame is self.quadro_alvo
+                codigo = frame.f_code
+                quadros.append(f"{codigo.co_name} ({Path(codigo.co_filename).name}:{codigo.co_firstlineno})")
+                frame = frame.f_back
+            if alvo_na_pilha:
+                pilha = ";".join(reversed(quadros))
+            elif Path(topo.f_code.co_filename).name == "selectors.py":
+                pilha = AMOSTRA_OCIOSA
+            else:
+                pilha = AMOSTRA_OUTRAS_TAREFAS
+            self.pilhas[pilha] = self.pilhas.get(pilha, 0) + 1
+
+    def colapsado(self) -> str:
+        return "".join(f"{pilha} {amostras}\n" for pilha, amostras in self.pilhas.items())
+
+
+def _token_informado(scope) -> Optional[str]:
+    for nome, valor in scope["headers"]:
+        if nome == CABECALHO_TOKEN:
+            return valor.decode("latin-1")
+    if PARAMETRO_TOKEN.encode() in scope.get("query_string", b""):
+        valores = parse_qs(scope["query_string"].decode("latin-1")).get(PARAMETRO_TOKEN)
+        return valores[0] if valores else None
+    return None
+
+
+def deve_perfilar(scope) -> bool:
+    if PROFILING_TOKEN:
+        token = _token_informado(scope)
+        if token is not None and hmac.compare_digest(token, PROFILING_TOKEN):
+            return True
+    return PROFILING_AMOSTRA > 0 and random.random() < PROFILING_AMOSTRA
+
+
+class PerfiladorMiddleware:
+    """Middleware ASGI (sem a tarefa extra do BaseHTTPMiddleware): desativado, custa uma comparação"""
+
+    def __init__(self, app):
+        self.app = app
+        self._em_uso = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (PROFILING_TOKEN or PROFILING_AMOSTRA) or not deve_perfilar(scope):
+            return await self.app(scope, receive, send)
+        if not self._em_uso.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        try:
+            caminho = DIRETORIO_PROFILES / self._nome_arquivo(scope)
+
+            async def enviar(mensagem):
+                if mensagem["type"] == "http.response.start":
+                    mensagem["headers"] = list(mensagem.get("headers", [])) + [
+                        (b"x-profile-arquivo", str(caminho).encode())
+                    ]
+                await send(mensagem)
+
+            # O frame deste __call__ está na pilha sempre que a tarefa da requisição executa
+            amostrador = AmostradorPilhas(threading.get_ident(), PROFILING_INTERVALO_MS / 1000, sys._getframe())
+            inicio = time.perf_counter()
+            amostrador.iniciar()
+            try:
+                await self.app(scope, receive, enviar)
+            finally:
+                amostrador.parar()
+                amostrador.quadro_alvo = None
+                duracao = time.perf_counter() - inicio
+                caminho.parent.mkdir(parents=True, exist_ok=True)
+                caminho.write_text(amostrador.colapsado())
+                app_logger.info(f"Profile: {scope['method']} {scope['path']} ({duracao:.3f}s, "
+                                f"{sum(amostrador.pilhas.values())} amostras) em {caminho}")
+        finally:
+            self._em_uso.release()
+
+    @staticmethod
+    def _nome_arquivo(scope) -> str:
+        rota = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "raiz"
+        return f"{datetime.now():%Y%m%d-%H%M%S}_{scope['method']}_{rota}_{uuid.uuid4().hex[:8]}.folded"
@@ -0,0 +1,54 @@
+from typing import Dict, Iterable, List, Tuple
+
+"""
+Exposição de métricas no formato texto do Prometheus (versão 0.0.4)
+- Monta as linhas # HELP/# TYPE e as amostras com rótulos; os valores vêm dos snapshots já mantidos
+  pelos coletores da aplicação (pool, cache de SQL, cache de referência, requisições HTTP)
+"""
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Rotulos = Tuple[Tuple[str, str], ...]
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _rotulos(rotulos: Rotulos) -> str:
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos) + "}"
+
+
+def _numero(valor) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Exposicao:
+    def __init__(self):
+        self.linhas: List[str] = []
+
+    def _cabecalho(self, nome: str, tipo: str, ajuda: str):
+        self.linhas.append(f"# HELP {nome} {ajuda}")
+        self.linhas.append(f"# TYPE {nome} {tipo}")
+
+    def metrica(self, nome: str, tipo: str, ajuda: str, amostras: Iterable[Tuple[Rotulos, float]]):
+        """Contador ou gauge: uma amostra por combinação de rótulos"""
+        self._cabecalho(nome, tipo, ajuda)
+        for rotulos, valor in amostras:
+            self.linhas.append(f"{nome}{_rotulos(rotulos)} {_numero(valor)}")
+
+    def histograma(self, nome: str, ajuda: str, snapshots: Iterable[Tuple[Rotulos, Dict]]):
+        """Histogramas no formato de HistogramaEspera.snapshot() (buckets acumulados, soma e contagem)"""
+        self._cabecalho(nome, "histogram", ajuda)
+        for rotulos, snapshot in snapshots:
+            for limite, acumulado in snapshot["buckets"].items():
+                self.linhas.append(f"{nome}_bucket{_rotulos(rotulos + (('le', limite),))} {acumulado}")
+            self.linhas.append(f"{nome}_sum{_rotulos(rotulos)} {_numero(float(snapshot['soma']))}")
+            self.linhas.append(f"{nome}_count{_rotulos(rotulos)} {snapshot['contagem']}")
+
+    def texto(self) -> str:
+        return "\n".join(self.linhas) + "\n"
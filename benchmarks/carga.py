@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Teste de carga HTTP com varredura de concorrência
+Mede vazão e latência de uma rota da API para níveis crescentes de requisições simultâneas,
+permitindo comparar o limite de concorrência antes/depois de mudanças (ex.: rotas síncronas
+no threadpool x rotas assíncronas com AsyncSession)
+Uso: python -m benchmarks.carga --url http://localhost:8008 --rota /dashboard/ --concorrencia 10 50 100 200 400
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+
+def percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+async def medir(cliente: httpx.AsyncClient, rota: str, concorrencia: int, duracao: float):
+    latencias = []
+    erros = 0
+    fim = time.perf_counter() + duracao
+
+    async def trabalhador():
+        nonlocal erros
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            try:
+                resposta = await cliente.get(rota)
+                if resposta.status_code >= 500:
+                    erros += 1
+            except httpx.HTTPError:
+                erros += 1
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    total = time.perf_counter() - inicio
+    return {
+        "concorrencia": concorrencia,
+        "requisicoes": len(latencias),
+        "vazao": len(latencias) / total,
+        "p50": statistics.median(latencias) * 1000 if latencias else 0.0,
+        "p95": percentil(latencias, 95) * 1000 if latencias else 0.0,
+        "p99": percentil(latencias, 99) * 1000 if latencias else 0.0,
+        "erros": erros,
+    }
+
+
+async def executar(args):
+    limites = httpx.Limits(max_connections=max(args.concorrencia), max_keepalive_connections=max(args.concorrencia))
+    async with httpx.AsyncClient(base_url=args.url, limits=limites, timeout=args.timeout) as cliente:
+        print(f"{'conc.':>6} {'req':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6}")
+        for concorrencia in args.concorrencia:
+            r = await medir(cliente, args.rota, concorrencia, args.duracao)
+            print(f"{r['concorrencia']:>6} {r['requisicoes']:>8} {r['vazao']:>9.1f} {r['p50']:>8.1f} "
+                  f"{r['p95']:>8.1f} {r['p99']:>8.1f} {r['erros']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga com varredura de concorrência")
+    parser.add_argument("--url", default="http://localhost:8008", help="URL base da API")
+    parser.add_argument("--rota", default="/dashboard/", help="Rota a ser exercitada (GET)")
+    parser.add_argument("--concorrencia", nargs="+", type=int, default=[10, 50, 100, 200, 400],
+                        help="Níveis de concorrência")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Duração de cada nível (s)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por requisição (s)")
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark das consultas pré-construídas (app/models/consultas.py)
+Compara a montagem do select() a cada chamada com a execução de um statement pronto com parâmetros,
+medindo o custo por consulta e o hit rate do cache de compilação do SQLAlchemy
+Uso: python -m benchmarks.consultas_preconstruidas --consultas 20000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker  # noqa: E402
+from app.models import Base, Safra, consultas  # noqa: E402
+from app.utils.metricas_sql import estatisticas_cache_sql  # noqa: E402
+
+SAFRAS = 100
+
+
+async def executar(nome: str, Session, consulta, quantidade: int):
+    antes = estatisticas_cache_sql.snapshot()["contagens"]
+    async with Session() as db:
+        inicio = time.perf_counter()
+        for i in range(quantidade):
+            await consulta(db, i % SAFRAS + 1)
+        duracao = time.perf_counter() - inicio
+    depois = estatisticas_cache_sql.snapshot()["contagens"]
+    hits = depois.get("CACHE_HIT", 0) - antes.get("CACHE_HIT", 0)
+    print(f"{nome:<16} {duracao / quantidade * 1e6:8.1f} µs/consulta  cache hits: {hits}/{quantidade}")
+    return duracao
+
+
+async def comparar(args):
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "consultas.db")
+        engine = create_engine(f"sqlite:///{caminho}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(Safra.__table__.insert(), [{"ano": 2000 + i} for i in range(SAFRAS)])
+        engine.dispose()
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{caminho}")
+        Session = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+        async def montada(db, safra_id):
+            return await db.scalar(select(Safra).where(Safra.id == safra_id))
+
+        async def preconstruida(db, safra_id):
+            return await db.scalar(consultas.SAFRA_POR_ID, {"id": safra_id})
+
+        # Aquecimento: compila as duas formas antes da medição
+        await executar("aquecimento", Session, montada, SAFRAS)
+        await executar("aquecimento", Session, preconstruida, SAFRAS)
+
+        tempo_montada = await executar("montada", Session, montada, args.consultas)
+        tempo_preconstruida = await executar("pré-construída", Session, preconstruida, args.consultas)
+        await async_engine.dispose()
+
+    print(f"Ganho por consulta: {tempo_montada / tempo_preconstruida:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das consultas pré-construídas")
+    parser.add_argument("--consultas", type=int, default=20000, help="Quantidade de consultas por forma")
+    asyncio.run(comparar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark da escrita agrupada (group commit) de associações
+Compara a criação individual (uma transação por requisição) com o AgrupadorEscritas
+Uso: python -m benchmarks.escrita_agrupada --requisicoes 2000 --concorrencia 32 --janela-ms 5 --lote 500
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from app.models import Base, ProdutorRural, Propriedade, Safra, Cultura  # noqa: E402
+from app.routes.propriedade_safra_cultura import create_propriedade_safra_cultura  # noqa: E402
+from app.schemas.propriedade_safra_cultura import PropriedadeSafraCulturaCreate  # noqa: E402
+from app.services.escrita_agrupada import AgrupadorEscritas  # noqa: E402
+
+PROPRIEDADES = 200
+SAFRAS = 5
+CULTURAS = 20
+
+
+def criar_banco(caminho: str):
+    engine = create_engine(f"sqlite:///{caminho}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine, autoflush=False)() as db:
+        produtor = ProdutorRural(nome="Benchmark", cpf_cnpj="52998224725")
+        db.add(produtor)
+        db.flush()
+        db.add_all([
+            Propriedade(nome=f"Fazenda {i}", cidade="Cidade", estado="GO", area_total=100.0,
+                        area_agricultavel=50.0, area_vegetacao=50.0, produtor_id=produtor.id)
+            for i in range(PROPRIEDADES)
+        ])
+        db.add_all([Safra(ano=2000 + i) for i in range(SAFRAS)])
+        db.add_all([Cultura(nome=f"Cultura {i}") for i in range(CULTURAS)])
+        db.commit()
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{caminho}", connect_args={"timeout": 30})
+
+    # fsync a cada commit, como em um banco durável
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=FULL")
+        cursor.close()
+
+    return async_engine, async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def gerar_requisicoes(quantidade: int):
+    requisicoes = []
+    for i in range(quantidade):
+        requisicoes.append(PropriedadeSafraCulturaCreate(
+            propriedade_id=i % PROPRIEDADES + 1,
+            safra_id=(i // PROPRIEDADES) % SAFRAS + 1,
+            cultura_id=(i // (PROPRIEDADES * SAFRAS)) % CULTURAS + 1
+        ))
+    return requisicoes
+
+
+async def executar(nome: str, funcao, requisicoes, concorrencia: int):
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def limitada(psc):
+        async with semaforo:
+            return await funcao(psc)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(limitada(psc) for psc in requisicoes))
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<12} {len(requisicoes):>7} criações em {duracao:7.3f}s -> {len(requisicoes) / duracao:9.1f} req/s")
+    return duracao
+
+
+async def comparar(args):
+    requisicoes = gerar_requisicoes(min(args.requisicoes, PROPRIEDADES * SAFRAS * CULTURAS))
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine, Session = criar_banco(os.path.join(diretorio, "individual.db"))
+
+        async def individual(psc):
+            async with Session() as db:
+                return await create_propriedade_safra_cultura(psc, db)
+
+        tempo_individual = await executar("individual", individual, requisicoes, args.concorrencia)
+        await engine.dispose()
+
+        engine, Session = criar_banco(os.path.join(diretorio, "agrupada.db"))
+        agrupador = AgrupadorEscritas(Session, janela_ms=args.janela_ms, lote_maximo=args.lote)
+        tempo_agrupado = await executar("agrupada", agrupador.submeter, requisicoes, args.concorrencia)
+        await engine.dispose()
+
+    print(f"Ganho de vazão: {tempo_individual / tempo_agrupado:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da escrita agrupada de associações")
+    parser.add_argument("--requisicoes", type=int, default=2000, help="Quantidade de criações")
+    parser.add_argument("--concorrencia", type=int, default=32, help="Requisições concorrentes")
+    parser.add_argument("--janela-ms", type=float, default=5.0, help="Janela de agrupamento (ms)")
+    parser.add_argument("--lote", type=int, default=500, help="Tamanho máximo do lote")
+    args = parser.parse_args()
+    asyncio.run(comparar(args))
+
+
+if __name__ == "__main__":
+    main()
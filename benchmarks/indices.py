@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos índices de chaves estrangeiras e colunas de filtro
+Mede os GROUP BY do dashboard e as verificações de existência dos handlers de criação
+em um banco SQLite temporário, com e sem os índices da migração 9a4e2c7b1d36
+Uso: python -m benchmarks.indices --propriedades 50000 --associacoes 500000 --repeticoes 20
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func, insert, select, text  # noqa: E402
+from app.models import Base, ProdutorRural, Propriedade, Safra, Cultura, PropriedadeSafraCultura  # noqa: E402
+
+ESTADOS = ["SP", "MG", "GO", "MT", "MS", "PR", "RS", "BA", "TO", "MA"]
+SAFRAS = 30
+CULTURAS = 200
+
+INDICES = [
+    "ix_propriedades_estado",
+    "ix_propriedade_safra_cultura_propriedade_id",
+    "ix_propriedade_safra_cultura_safra_id",
+    "ix_propriedade_safra_cultura_cultura_id",
+    "ix_safras_ano",
+    "ix_culturas_nome",
+]
+
+
+def popular(engine, propriedades: int, associacoes: int):
+    aleatorio = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(ProdutorRural), [{"nome": "Benchmark", "cpf_cnpj": "52998224725"}])
+        conn.execute(insert(Safra), [{"ano": 2000 + i} for i in range(SAFRAS)])
+        conn.execute(insert(Cultura), [{"nome": f"Cultura {i}"} for i in range(CULTURAS)])
+        conn.execute(insert(Propriedade), [
+            {"nome": f"Fazenda {i}", "cidade": "Cidade", "estado": aleatorio.choice(ESTADOS), "area_total": 100.0,
+             "area_agricultavel": 50.0, "area_vegetacao": 50.0, "produtor_id": 1}
+            for i in range(propriedades)
+        ])
+        conn.execute(insert(PropriedadeSafraCultura), [
+            {"propriedade_id": aleatorio.randint(1, propriedades), "safra_id": aleatorio.randint(1, SAFRAS),
+             "cultura_id": aleatorio.randint(1, CULTURAS)}
+            for _ in range(associacoes)
+        ])
+        conn.execute(text("ANALYZE"))
+
+
+def consultas(propriedades: int):
+    aleatorio = random.Random(7)
+    return {
+        "dashboard: propriedades por estado": lambda: select(
+            Propriedade.estado, func.count(Propriedade.id)
+        ).group_by(Propriedade.estado),
+        "dashboard: associações por cultura": lambda: select(
+            Cultura.nome, func.count(PropriedadeSafraCultura.id)
+        ).join(PropriedadeSafraCultura).group_by(Cultura.nome),
+        "create_safra: ano existente": lambda: select(Safra.id).where(Safra.ano == 2000 + aleatorio.randrange(SAFRAS)),
+        "create_cultura: nome existente": lambda: select(Cultura.id).where(
+            Cultura.nome == f"Cultura {aleatorio.randrange(CULTURAS)}"
+        ),
+        "create_psc: associação duplicada": lambda: select(PropriedadeSafraCultura.id).where(
+            PropriedadeSafraCultura.propriedade_id == aleatorio.randint(1, propriedades),
+            PropriedadeSafraCultura.safra_id == aleatorio.randint(1, SAFRAS),
+            PropriedadeSafraCultura.cultura_id == aleatorio.randint(1, CULTURAS)
+        ),
+    }
+
+
+def medir(engine, propriedades: int, repeticoes: int):
+    resultados = {}
+    with engine.connect() as conn:
+        for nome, consulta in consultas(propriedades).items():
+            conn.execute(consulta()).all()
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                conn.execute(consulta()).all()
+            resultados[nome] = (time.perf_counter() - inicio) / repeticoes * 1000
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos índices de FKs e filtros")
+    parser.add_argument("--propriedades", type=int, default=50000, help="Quantidade de propriedades")
+    parser.add_argument("--associacoes", type=int, default=500000, help="Quantidade de associações")
+    parser.add_argument("--repeticoes", type=int, default=20, help="Execuções por consulta")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = create_engine(f"sqlite:///{os.path.join(diretorio, 'indices.db')}")
+        Base.metadata.create_all(engine)
+        popular(engine, args.propriedades, args.associacoes)
+        com_indices = medir(engine, args.propriedades, args.repeticoes)
+
+        with engine.begin() as conn:
+            for indice in INDICES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {indice}"))
+        sem_indices = medir(engine, args.propriedades, args.repeticoes)
+        engine.dispose()
+
+    print(f"{'consulta':<36} {'sem índices':>12} {'com índices':>12} {'ganho':>8}")
+    for nome in com_indices:
+        print(f"{nome:<36} {sem_indices[nome]:>10.3f}ms {com_indices[nome]:>10.3f}ms "
+              f"{sem_indices[nome] / com_indices[nome]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
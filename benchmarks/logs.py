@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo dos logs de requisição no middleware
+Exercita GET /health em processo (sem servidor HTTP nem banco), sequencialmente, em quatro perfis:
+- sem_log: LOG_REQUISICOES=false (referência para o overhead)
+- sincrono: comportamento anterior; toda requisição gera uma linha de texto escrita na própria requisição
+  (console e arquivo, com rotação e compactação)
+- assincrono: toda requisição gera uma linha JSON, escrita pela thread de logs
+- amostrado: JSON assíncrono com LOG_REQUISICOES_AMOSTRA=0.01 (4xx/5xx sempre registrados)
+Em seguida, cada perfil escreve LOG_ROTACAO (10 MB) de linhas direto no logger e mede a chamada mais lenta:
+a virada do arquivo com compactação (pico de latência de quem registrou a linha)
+Cada perfil roda em um subprocesso, pois a configuração de logs é lida na importação da aplicação
+Uso: python -m benchmarks.logs --requisicoes 20000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PERFIS = {
+    "sem_log": {"LOG_REQUISICOES": "false"},
+    "sincrono": {"LOG_ASSINCRONO": "false", "LOG_FORMATO": "texto", "LOG_REQUISICOES_AMOSTRA": "1"},
+    "assincrono": {"LOG_ASSINCRONO": "true", "LOG_FORMATO": "json", "LOG_REQUISICOES_AMOSTRA": "1"},
+    "amostrado": {"LOG_ASSINCRONO": "true", "LOG_FORMATO": "json", "LOG_REQUISICOES_AMOSTRA": "0.01"},
+}
+
+
+async def medir(requisicoes: int):
+    import httpx
+    from app.main import app
+    from app.utils.logger import esvaziar_logs
+
+    latencias = []
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark") as cliente:
+        for _ in range(200):
+            await cliente.get("/health")
+        for _ in range(requisicoes):
+            inicio = time.perf_counter()
+            await cliente.get("/health")
+            latencias.append(time.perf_counter() - inicio)
+    esvaziar_logs()
+    latencias.sort()
+    return {
+        "virada": medir_virada(),
+        "mediana": statistics.median(latencias) * 1e6,
+        "p99": latencias[int(len(latencias) * 0.99)] * 1e6,
+        "maximo": latencias[-1] * 1e6,
+    }
+
+
+def medir_virada() -> float:
+    from app.utils.logger import app_logger, esvaziar_logs
+
+    linha = "API Request: GET /produtores/123 - 200 (0.001s) " + "x" * 80
+    maior = 0.0
+    for i in range(90000):
+        inicio = time.perf_counter()
+        app_logger.debug(linha)
+        maior = max(maior, time.perf_counter() - inicio)
+        if i % 2000 == 0:
+            # Mantém a fila abaixo de LOG_FILA_MAX: nenhuma linha é descartada
+            esvaziar_logs()
+    esvaziar_logs()
+    return maior * 1000
+
+
+def executar_perfil(perfil: str, requisicoes: int):
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.environ.update({"DATABASE_URL": "sqlite://", "LOG_DIR": diretorio, "LOG_ROTACAO": "10 MB"})
+        os.environ.update(PERFIS[perfil])
+        r = asyncio.run(medir(requisicoes))
+    # O console do perfil vai para /dev/null; o resultado sai pelo stderr
+    print(f"{perfil}\t{r['mediana']:.1f}\t{r['p99']:.1f}\t{r['maximo']:.1f}\t{r['virada']:.1f}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos logs de requisição")
+    parser.add_argument("--requisicoes", type=int, default=20000, help="Requisições por perfil")
+    parser.add_argument("--perfil", choices=sorted(PERFIS), help="Executa apenas um perfil neste processo")
+    args = parser.parse_args()
+
+    if args.perfil:
+        executar_perfil(args.perfil, args.requisicoes)
+        return
+
+    resultados = {}
+    for perfil in PERFIS:
+        saida = subprocess.run([sys.executable, "-m", "benchmarks.logs", "--perfil", perfil,
+                                "--requisicoes", str(args.requisicoes)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+        nome, *valores = saida.stderr.strip().splitlines()[-1].split("\t")
+        resultados[nome] = [float(valor) for valor in valores]
+
+    base = resultados["sem_log"][0]
+    print(f"{'perfil':<11} {'p50 µs':>9} {'overhead µs':>11} {'p99 µs':>9} {'máx. µs':>9} {'virada ms':>10}")
+    for perfil, (mediana, p99, maximo, virada) in resultados.items():
+        print(f"{perfil:<11} {mediana:>9.1f} {mediana - base:>11.1f} {p99:>9.1f} {maximo:>9.1f} {virada:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Perfil de benchmark do modo SQLite (instalação de um único nó)
+Exercita a API em processo (sem servidor HTTP) sobre um banco SQLite em arquivo, com uma mistura de
+leituras (busca por id, listagem, dashboard) e escritas (criação de propriedades), comparando:
+- padrao: journal em rollback, synchronous=FULL e escritas concorrentes disputando o lock do arquivo
+- otimizado: WAL, synchronous=NORMAL, mmap/cache e escritor único por worker
+Cada perfil roda em um subprocesso, pois a configuração do SQLite é lida na importação da aplicação
+Uso: python -m benchmarks.sqlite --concorrencia 32 --duracao 10 --escritas 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PERFIS = {
+    "padrao": {"SQLITE_OTIMIZADO": "false", "SQLITE_ESCRITOR_UNICO": "false"},
+    "otimizado": {"SQLITE_OTIMIZADO": "true", "SQLITE_ESCRITOR_UNICO": "true"},
+}
+
+PRODUTORES = 200
+PROPRIEDADES = 2000
+
+
+def criar_banco():
+    from sqlalchemy.orm import sessionmaker
+    from app.models import Base, ProdutorRural, Propriedade, Safra, Cultura
+    from app.models.database import engine
+
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine, autoflush=False)() as db:
+        produtores = [ProdutorRural(nome=f"Produtor {i}", cpf_cnpj=f"{i:011d}") for i in range(PRODUTORES)]
+        db.add_all(produtores)
+        db.add_all([Safra(ano=2020 + i) for i in range(5)] + [Cultura(nome=f"Cultura {i}") for i in range(10)])
+        db.flush()
+        db.add_all([
+            Propriedade(nome=f"Fazenda {i}", cidade="Cidade", estado=random.choice(["GO", "MT", "SP", "PR"]),
+                        area_total=100.0, area_agricultavel=50.0, area_vegetacao=50.0,
+                        produtor_id=produtores[i % PRODUTORES].id)
+            for i in range(PROPRIEDADES)
+        ])
+        db.commit()
+    engine.dispose()
+
+
+async def medir(args):
+    import httpx
+    from app.main import app
+
+    latencias = {"leitura": [], "escrita": []}
+    erros = 0
+    sequencia = 0
+    fim = time.perf_counter() + args.duracao
+
+    async def requisicao(cliente):
+        nonlocal sequencia
+        if random.random() < args.escritas:
+            sequencia += 1
+            return "escrita", await cliente.post("/propriedades/", json={
+                "nome": f"Nova {sequencia}", "cidade": "Cidade", "estado": "GO", "area_total": 100.0,
+                "area_agricultavel": 60.0, "area_vegetacao": 40.0,
+                "produtor_id": random.randint(1, PRODUTORES),
+            })
+        rota = random.choice([
+            f"/propriedades/{random.randint(1, PROPRIEDADES)}",
+            f"/produtores/{random.randint(1, PRODUTORES)}",
+            "/dashboard/",
+        ])
+        return "leitura", await cliente.get(rota)
+
+    async def trabalhador(cliente):
+        nonlocal erros
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            tipo, resposta = await requisicao(cliente)
+            latencias[tipo].append(time.perf_counter() - inicio)
+            if resposta.status_code >= 500:
+                erros += 1
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark") as cliente:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabalhador(cliente) for _ in range(args.concorrencia)))
+        total = time.perf_counter() - inicio
+
+    resultado = {"req/s": sum(len(v) for v in latencias.values()) / total, "erros": erros}
+    for tipo, valores in latencias.items():
+        resultado[f"p50 {tipo}"] = statistics.median(valores) * 1000 if valores else 0.0
+    return resultado
+
+
+def executar_perfil(args):
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(diretorio, 'benchmark.db')}"
+        os.environ.update(PERFIS[args.perfil])
+        criar_banco()
+        r = asyncio.run(medir(args))
+    print(f"{args.perfil:<10} {r['req/s']:>9.1f} {r['p50 leitura']:>11.1f} {r['p50 escrita']:>11.1f} {r['erros']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do modo SQLite")
+    parser.add_argument("--concorrencia", type=int, default=32, help="Clientes simultâneos")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Duração de cada perfil (s)")
+    parser.add_argument("--escritas", type=float, default=0.2, help="Fração de requisições de escrita")
+    parser.add_argument("--perfil", choices=sorted(PERFIS), help="Executa apenas um perfil neste processo")
+    args = parser.parse_args()
+
+    if args.perfil:
+        executar_perfil(args)
+        return
+
+    print(f"{'perfil':<10} {'req/s':>9} {'p50 leit.ms':>11} {'p50 escr.ms':>11} {'erros':>6}")
+    for perfil in PERFIS:
+        subprocess.run([sys.executable, "-m", "benchmarks.sqlite", "--perfil", perfil,
+                        "--concorrencia", str(args.concorrencia), "--duracao", str(args.duracao),
+                        "--escritas", str(args.escritas)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark da validação de CPF/CNPJ em lote
+Compara validar_cpf_cnpj (um documento por chamada) com validar_lote (NumPy) sobre a mesma massa:
+CPFs e CNPJs, metade formatados, com uma fração de dígitos verificadores corrompidos
+Uso: python -m benchmarks.validacao_documentos --documentos 1000000 --invalidos 0.1
+"""
+
+import argparse
+import time
+import numpy as np
+from app.services.validators import (
+    PESOS_CNPJ_1, PESOS_CNPJ_2, PESOS_CPF_1, PESOS_CPF_2, validar_cpf_cnpj, validar_lote
+)
+
+
+def gerar_digitos(rng, quantidade: int, tamanho: int):
+    base = rng.integers(0, 10, size=(quantidade, tamanho - 2))
+    if tamanho == 11:
+        dig1 = ((base @ PESOS_CPF_1) * 10 % 11) % 10
+        dig2 = ((np.column_stack([base, dig1]) @ PESOS_CPF_2) * 10 % 11) % 10
+    else:
+        dig1 = 11 - (base @ PESOS_CNPJ_1) % 11
+        dig1 = np.where(dig1 < 10, dig1, 0)
+        dig2 = 11 - (np.column_stack([base, dig1]) @ PESOS_CNPJ_2) % 11
+        dig2 = np.where(dig2 < 10, dig2, 0)
+    return np.column_stack([base, dig1, dig2])
+
+
+def formatar(digitos: str) -> str:
+    if len(digitos) == 11:
+        return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+    return f"{digitos[:2]}.{digitos[2:5]}.{digitos[5:8]}/{digitos[8:12]}-{digitos[12:]}"
+
+
+def gerar_documentos(quantidade: int, invalidos: float, semente: int = 42):
+    rng = np.random.default_rng(semente)
+    metade = quantidade // 2
+    docs = []
+    for matriz in (gerar_digitos(rng, metade, 11), gerar_digitos(rng, quantidade - metade, 14)):
+        # Corrompe o último dígito verificador de uma fração das linhas
+        corrompidos = rng.random(len(matriz)) < invalidos
+        matriz[corrompidos, -1] = (matriz[corrompidos, -1] + 1) % 10
+        textos = ["".join(map(str, linha)) for linha in matriz.tolist()]
+        docs += [formatar(texto) if i % 2 else texto for i, texto in enumerate(textos)]
+    rng.shuffle(docs)
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da validação de CPF/CNPJ em lote")
+    parser.add_argument("--documentos", type=int, default=1_000_000, help="Quantidade de documentos")
+    parser.add_argument("--invalidos", type=float, default=0.1, help="Fração com dígito verificador errado")
+    args = parser.parse_args()
+
+    docs = gerar_documentos(args.documentos, args.invalidos)
+
+    inicio = time.perf_counter()
+    escalar = [validar_cpf_cnpj(doc) for doc in docs]
+    tempo_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    lote = validar_lote(docs)
+    tempo_lote = time.perf_counter() - inicio
+
+    assert lote.tolist() == escalar, "validar_lote divergiu de validar_cpf_cnpj"
+    print(f"{'validador':<18} {'tempo s':>9} {'docs/s':>12}")
+    print(f"{'validar_cpf_cnpj':<18} {tempo_escalar:>9.2f} {len(docs) / tempo_escalar:>12,.0f}")
+    print(f"{'validar_lote':<18} {tempo_lote:>9.2f} {len(docs) / tempo_lote:>12,.0f}")
+    print(f"Válidos: {int(lote.sum())} de {len(docs)} | Ganho: {tempo_escalar / tempo_lote:.1f}x")
+
+
+if __name__ == "__main__":
+    main()